@@ -1,5 +1,6 @@
 from .core import (
     MDKVDocument,
+    DocumentSnapshot,
     Track,
     allowed_track_types,
     ValidationError,
@@ -19,6 +20,7 @@ __all__ = [
     "cli",
     # surfaced API
     "MDKVDocument",
+    "DocumentSnapshot",
     "Track",
     "allowed_track_types",
     "ValidationError",
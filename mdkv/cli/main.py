@@ -1,18 +1,43 @@
 from __future__ import annotations
 
+import dataclasses
 import json
+import re
+import sys
+import time
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
 import click
 
-from mdkv.storage import load_mdkv, save_mdkv
+from mdkv.storage import (
+    container_features,
+    iter_mdkv_base,
+    iter_mdkv_paths,
+    load_index,
+    load_mdkv,
+    save_mdkv,
+    validate_container,
+    validate_containers,
+)
 from mdkv.core.model import MDKVDocument, Track
-from mdkv.core.validate import validate_document
-from mdkv.core.errors import ValidationError
-from mdkv.services.export import to_markdown, to_html
-from mdkv.services.search import search_document
+from mdkv.services.export import to_markdown, write_html, write_markdown
+from mdkv.services.align import align_matches, aligned_segments
+from mdkv.services.batch import BATCH_FORMATS, export_batch
+from mdkv.services.corpus import search_corpus
+from mdkv.services.markdown_import import import_markdown
+from mdkv.services.site import build_site
+from mdkv.services.index import FullTextIndex, query_document
+from mdkv.services.links import check_corpus_links, check_links
+from mdkv.services.index_cache import IndexCache
+from mdkv.services.lines import add_context
+from mdkv.services.rank import TermStatsIndex, ranked_search
+from mdkv.services.structure import iter_search_elements
+from mdkv.services.search import iter_search, iter_search_terms, search_document
+from mdkv.services.trigram import TrigramIndex, sidecar_path
 from mdkv.gui import run as run_gui
+from mdkv.library import build_library
 from mdkv import __version__, __license__
 
 
@@ -33,6 +58,12 @@ def init(title: str, author: list[str], out: Path) -> None:
     click.echo(f"Created {out}")
 
 
+def _resave(doc: MDKVDocument, path: Path) -> None:
+    """Save `doc` over `path`, keeping its stored index and HTML (rebuilt for changed tracks)."""
+    features = container_features(path)
+    save_mdkv(doc, path, build_index=features["index"], prerender=features["rendered"])
+
+
 @main.command()
 @click.argument("path", type=click.Path(dir_okay=False, path_type=Path))
 def info(path: Path) -> None:
@@ -70,7 +101,7 @@ def list_tracks(path: Path) -> None:
 def add_track_cmd(path: Path, track_id: str, track_type: str, language: str | None, content: str) -> None:
     doc = load_mdkv(path)
     doc.add_track(Track(track_id, track_type, language if language else None, f"tracks/{track_id}.md", content))
-    save_mdkv(doc, path)
+    _resave(doc, path)
     click.echo("OK")
 
 
@@ -90,7 +121,7 @@ def export_tracks(path: Path, types: str) -> None:
 def rename_track_cmd(path: Path, old_id: str, new_id: str) -> None:
     doc = load_mdkv(path)
     doc.rename_track(old_id, new_id)
-    save_mdkv(doc, path)
+    _resave(doc, path)
     click.echo("OK")
 
 
@@ -101,7 +132,7 @@ def rename_track_cmd(path: Path, old_id: str, new_id: str) -> None:
 def update_track_cmd(path: Path, track_id: str, content: str) -> None:
     doc = load_mdkv(path)
     doc.update_track_content(track_id, content)
-    save_mdkv(doc, path)
+    _resave(doc, path)
     click.echo("OK")
 
 
@@ -112,7 +143,7 @@ def update_track_cmd(path: Path, track_id: str, content: str) -> None:
 def set_meta(path: Path, key: str, value: str) -> None:
     doc = load_mdkv(path)
     doc.set_metadata(key, value)
-    save_mdkv(doc, path)
+    _resave(doc, path)
     click.echo("OK")
 
 
@@ -125,43 +156,332 @@ def get_meta(path: Path, key: str) -> None:
     click.echo(val or "")
 
 
+def _match_row(m) -> dict:
+    row = {"track_id": m.track_id, "start": m.start, "end": m.end, "extract": m.extract}
+    for extra in ("kind", "distance", "score", "line", "column", "heading_path"):
+        value = getattr(m, extra, None)
+        if value is not None:
+            row[extra] = list(value) if isinstance(value, tuple) else value
+    return row
+
+
+def _segment_row(seg) -> dict:
+    return {"track_id": seg.track_id, "language": seg.language, "start": seg.start, "end": seg.end, "text": seg.text}
+
+
 @main.command("search")
 @click.argument("path", type=click.Path(dir_okay=False, path_type=Path))
 @click.option("--pattern", required=True)
 @click.option("--types", default="", help="comma-separated track types filter")
 @click.option("--languages", default="", help="comma-separated languages filter")
-def search_cmd(path: Path, pattern: str, types: str, languages: str) -> None:
+@click.option("--indexed", is_flag=True, help="Treat pattern as a term/phrase query using the stored index")
+@click.option("--limit", type=int, default=None, help="maximum number of matches")
+@click.option("--offset", type=int, default=0, help="number of matches to skip")
+@click.option("--ndjson", is_flag=True, help="Stream one JSON object per line")
+@click.option("--mode", type=click.Choice(["regex", "substring", "fuzzy", "ranked"]), default="regex")
+@click.option("--max-edits", type=int, default=1, help="edit distance for --mode fuzzy")
+@click.option("--elements", default="", help="comma-separated Markdown element kinds to search (heading, code, link, ...)")
+@click.option("--context", "with_context", is_flag=True, help="Add line, column and heading path to each match")
+@click.option("--window", type=int, default=20, help="extract context characters per side (with --context)")
+@click.option("--aligned", "with_aligned", is_flag=True, help="Add aligned translation extracts to each match")
+@click.option("--cache", "use_cache", is_flag=True, help="Reuse per-track index segments from the on-disk index cache")
+def search_cmd(
+    path: Path,
+    pattern: str,
+    types: str,
+    languages: str,
+    indexed: bool,
+    limit: int | None,
+    offset: int,
+    ndjson: bool,
+    mode: str,
+    max_edits: int,
+    elements: str,
+    with_context: bool,
+    window: int,
+    with_aligned: bool,
+    use_cache: bool,
+) -> None:
     doc = load_mdkv(path)
     tt = [t.strip() for t in types.split(",") if t.strip()] if types else None
     ll = [l.strip() for l in languages.split(",") if l.strip()] if languages else None
-    matches = search_document(doc, pattern=pattern, track_types=tt, languages=ll)
-    click.echo(json.dumps([
-        {"track_id": m.track_id, "start": m.start, "end": m.end, "extract": m.extract}
-        for m in matches
-    ], indent=2))
+    cache = IndexCache() if use_cache else None
+    if indexed:
+        index = load_index(path) or FullTextIndex()
+        index.cache = cache
+        matches = iter(query_document(doc, pattern, index=index, track_types=tt, languages=ll))
+    elif mode == "ranked":
+        # ranked results are already top-k; --limit sets k
+        stats = TermStatsIndex(cache=cache)
+        matches = iter(ranked_search(doc, pattern, k=offset + (limit or 10), track_types=tt, languages=ll, index=stats))
+    elif mode != "regex":
+        sidecar = sidecar_path(path)
+        trigrams = TrigramIndex.load(sidecar) if sidecar.exists() else None
+        if cache is not None:
+            trigrams = trigrams or TrigramIndex()
+            trigrams.cache = cache
+        matches = iter(search_document(
+            doc, pattern, track_types=tt, languages=ll, mode=mode, max_edits=max_edits, trigram_index=trigrams
+        ))
+    elif elements:
+        kinds = [k.strip() for k in elements.split(",") if k.strip()]
+        matches = iter_search_elements(doc, pattern, kinds=kinds, track_types=tt, languages=ll)
+    else:
+        matches = iter_search(doc, pattern=pattern, track_types=tt, languages=ll)
+    if with_context:
+        matches = add_context(doc, matches, window=window)
+    page = islice(matches, offset, offset + limit if limit is not None else None)
+    if with_aligned:
+        rows = (
+            dict(_match_row(m), aligned=[_segment_row(seg) for seg in aligned])
+            for m, aligned in align_matches(doc, page)
+        )
+    else:
+        rows = (_match_row(m) for m in page)
+    if ndjson:
+        for row in rows:
+            click.echo(json.dumps(row))
+        return
+    click.echo(json.dumps(list(rows), indent=2))
 
 
-@main.command()
+@main.command("align")
+@click.argument("path", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--track", "track_id", default="primary", help="source track id")
+@click.option("--offset", type=int, default=None, help="character offset in the source track")
+@click.option("--pattern", default=None, help="locate the first regex match instead of --offset")
+def align_cmd(path: Path, track_id: str, offset: int | None, pattern: str | None) -> None:
+    """Show the block at an offset and the aligned blocks of the translation tracks."""
+    doc = load_mdkv(path)
+    if track_id not in doc.tracks:
+        raise click.ClickException(f"track not found: {track_id}")
+    if pattern is not None:
+        found = re.search(pattern, doc.tracks[track_id].content)
+        if found is None:
+            raise click.ClickException("pattern not found")
+        offset = found.start()
+    if offset is None:
+        raise click.UsageError("provide --offset or --pattern")
+    source, aligned = aligned_segments(doc, track_id, offset)
+    click.echo(json.dumps({
+        "source": _segment_row(source) if source else None,
+        "aligned": [_segment_row(seg) for seg in aligned],
+    }, indent=2))
+
+
+@main.command("cache")
+@click.option("--clear", is_flag=True, help="Remove every cached index segment")
+@click.option("--max-bytes", type=int, default=None, help="Evict least recently used segments down to this size")
+def cache_cmd(clear: bool, max_bytes: int | None) -> None:
+    """Show or trim the on-disk index cache ($MDKV_CACHE_DIR, default ~/.cache/mdkv)."""
+    cache = IndexCache()
+    if clear:
+        cache.clear()
+    elif max_bytes is not None:
+        cache.evict(max_bytes)
+    click.echo(json.dumps({"directory": str(cache.directory), "bytes": cache.size()}))
+
+
+@main.command("search-terms")
 @click.argument("path", type=click.Path(dir_okay=False, path_type=Path))
-def validate(path: Path) -> None:  # type: ignore[override]
+@click.option("--terms-file", type=click.Path(dir_okay=False, path_type=Path), required=True, help="one term per line")
+@click.option("--types", default="", help="comma-separated track types filter")
+@click.option("--languages", default="", help="comma-separated languages filter")
+@click.option("--ignore-case", is_flag=True)
+@click.option("--whole-words", is_flag=True)
+def search_terms_cmd(
+    path: Path, terms_file: Path, types: str, languages: str, ignore_case: bool, whole_words: bool
+) -> None:
+    """Search for a glossary of terms in one pass; prints NDJSON."""
     doc = load_mdkv(path)
-    try:
-        validate_document(doc)
+    terms = [line.strip() for line in terms_file.read_text(encoding="utf-8").splitlines() if line.strip()]
+    tt = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    ll = [l.strip() for l in languages.split(",") if l.strip()] if languages else None
+    flags = re.IGNORECASE if ignore_case else 0
+    for m in iter_search_terms(doc, terms, flags=flags, track_types=tt, languages=ll, whole_words=whole_words):
+        click.echo(json.dumps(
+            {"term": m.term, "track_id": m.track_id, "start": m.start, "end": m.end, "extract": m.extract}
+        ))
+
+
+@main.command("search-corpus")
+@click.argument("target")
+@click.option("--pattern", required=True)
+@click.option("--types", default="", help="comma-separated track types filter")
+@click.option("--languages", default="", help="comma-separated languages filter")
+@click.option("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+@click.option("--limit", type=int, default=None, help="stop after this many matches")
+def search_corpus_cmd(target: str, pattern: str, types: str, languages: str, workers: int | None, limit: int | None) -> None:
+    """Search every .mdkv under a directory or glob; prints NDJSON as results arrive."""
+    tt = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    ll = [l.strip() for l in languages.split(",") if l.strip()] if languages else None
+    results = search_corpus(
+        iter_mdkv_paths(target), pattern, track_types=tt, languages=ll, workers=workers, limit=limit
+    )
+    for path, m in results:
+        click.echo(json.dumps(
+            {"path": str(path), "track_id": m.track_id, "start": m.start, "end": m.end, "extract": m.extract}
+        ))
+
+
+@main.command("index")
+@click.argument("path", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--trigrams", is_flag=True, help="Also write a trigram sidecar for substring/fuzzy search")
+def index_cmd(path: Path, trigrams: bool) -> None:
+    """Store a full-text index inside the container."""
+    doc = load_mdkv(path)
+    save_mdkv(doc, path, build_index=True, prerender=container_features(path)["rendered"])
+    if trigrams:
+        TrigramIndex.build(doc).save(sidecar_path(path))
+    click.echo("OK")
+
+
+@main.command("prerender")
+@click.argument("path", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--remove", is_flag=True, help="Drop stored HTML instead of writing it")
+def prerender_cmd(path: Path, remove: bool) -> None:
+    """Store each track's rendered HTML inside the container for fast viewing."""
+    doc = load_mdkv(path)
+    save_mdkv(doc, path, build_index=container_features(path)["index"], prerender=not remove)
+    click.echo("OK")
+
+
+def _issue_row(issue) -> dict:
+    return {k: v for k, v in dataclasses.asdict(issue).items() if v is not None}
+
+
+@main.command()
+@click.argument("target")
+@click.option("--workers", type=int, default=None, help="worker processes for directories/globs (default: CPU count)")
+def validate(target: str, workers: int | None) -> None:  # type: ignore[override]
+    """Check containers against the format rules without loading their tracks.
+
+    A single file prints `LEVEL: message` lines and `OK` when there are no
+    errors. A directory or glob prints one JSON line per issue and a summary
+    on stderr. Exits with status 1 if any container has errors.
+    """
+    path = Path(target)
+    if path.is_file():
+        issues = validate_container(path)
+        for issue in issues:
+            where = f" [{issue.track_id or issue.entry}]" if issue.track_id or issue.entry else ""
+            click.echo(f"{issue.level}: {issue.message}{where}")
+        if any(i.level == "ERROR" for i in issues):
+            raise SystemExit(1)
         click.echo("OK")
-    except ValidationError as e:
-        click.echo(f"ERROR: {e}")
+        return
+    started = time.perf_counter()
+    checked = invalid = 0
+    for container, issues in validate_containers(iter_mdkv_paths(target), workers=workers):
+        checked += 1
+        invalid += any(i.level == "ERROR" for i in issues)
+        for issue in issues:
+            click.echo(json.dumps({"path": str(container), **_issue_row(issue)}))
+    click.echo(f"checked {checked} containers in {time.perf_counter() - started:.2f}s: {invalid} invalid", err=True)
+    if invalid or not checked:
+        raise SystemExit(1)
+
+
+@main.command("check-links")
+@click.argument("target")
+def check_links_cmd(target: str) -> None:
+    """Report broken links between tracks and anchors (offline).
+
+    A directory or glob also checks links between the documents found. Prints
+    one JSON line per broken link; exits with status 1 if there are any.
+    """
+    path = Path(target)
+    if path.is_file():
+        results = [(path, check_links(load_mdkv(path)))]
+    else:
+        results = check_corpus_links(iter_mdkv_paths(target))
+    broken = 0
+    for container, issues in results:
+        for issue in issues:
+            broken += 1
+            click.echo(json.dumps({"path": str(container), **_issue_row(issue)}))
+    if broken:
         raise SystemExit(1)
 
 
 @main.command()
 @click.argument("path", type=click.Path(dir_okay=False, path_type=Path))
 @click.option("--html", "as_html", is_flag=True, help="Export HTML instead of Markdown")
-def export(path: Path, as_html: bool) -> None:
+@click.option("--out", "out_path", type=click.Path(dir_okay=False, path_type=Path), default=None, help="Write to a file instead of stdout")
+def export(path: Path, as_html: bool, out_path: Path | None) -> None:
     doc = load_mdkv(path)
-    if as_html:
-        click.echo(to_html(doc))
-    else:
-        click.echo(to_markdown(doc))
+    write = write_html if as_html else write_markdown
+    if out_path is not None:
+        with out_path.open("w", encoding="utf-8", newline="") as fp:
+            write(doc, fp)
+        return
+    write(doc, sys.stdout)
+    sys.stdout.write("\n")
+
+
+@main.command("export-batch")
+@click.argument("target")
+@click.option("--out", "out_dir", type=click.Path(file_okay=False, path_type=Path), required=True)
+@click.option("--format", "fmt", type=click.Choice(list(BATCH_FORMATS)), default="md")
+@click.option("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+@click.option("--force", is_flag=True, help="Re-export documents even if unchanged")
+@click.option("--quiet", is_flag=True, help="Do not report progress on stderr")
+def export_batch_cmd(target: str, out_dir: Path, fmt: str, workers: int | None, force: bool, quiet: bool) -> None:
+    """Export every .mdkv under a directory or glob, skipping unchanged documents; prints a JSON summary."""
+    def progress(done: int, total: int, source: Path, status: str) -> None:
+        click.echo(f"[{done}/{total}] {status} {source}", err=True)
+
+    report = export_batch(
+        iter_mdkv_paths(target), out_dir, fmt=fmt, workers=workers, base=iter_mdkv_base(target),
+        force=force, progress=None if quiet else progress,
+    )
+    click.echo(json.dumps(report.to_dict(), indent=2))
+    if report.failures:
+        raise SystemExit(1)
+
+
+@main.command("export-site")
+@click.argument("target")
+@click.option("--out", "out_dir", type=click.Path(file_okay=False, path_type=Path), required=True)
+@click.option("--force", is_flag=True, help="Rewrite every page")
+def export_site_cmd(target: str, out_dir: Path, force: bool) -> None:
+    """Build a static site (one page per document and language); only changed pages are rewritten."""
+    report = build_site(iter_mdkv_paths(target), out_dir, base=iter_mdkv_base(target), force=force)
+    click.echo(json.dumps(report.to_dict(), indent=2))
+
+
+@main.command("import-markdown")
+@click.argument("source", type=click.Path(dir_okay=False, exists=True, path_type=Path))
+@click.argument("output", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--author", "authors", multiple=True, help="Author name (repeatable)")
+@click.option("--title", default=None, help="Title (default: the MDKV title line, else the file name)")
+def import_markdown_cmd(source: Path, output: Path, authors: tuple[str, ...], title: str | None) -> None:
+    """Rebuild a container from Markdown exported by `mdkv export` (streamed, bounded memory)."""
+    with source.open("r", encoding="utf-8", newline="\n") as fp:
+        first = fp.readline()
+        fp.seek(0)
+        if title is None and not first.startswith("<!-- MDKV: "):
+            title = source.stem
+        count = import_markdown(fp, output, authors=authors, title=title)
+    click.echo(f"OK {count} tracks")
+
+
+@main.group("library")
+def library_group() -> None:
+    """Example library built from YAML definitions."""
+
+
+@library_group.command("build")
+@click.option("--definitions", "definitions_dir", type=click.Path(file_okay=False, path_type=Path), default=Path("library/definitions"), show_default=True)
+@click.option("--out", "out_dir", type=click.Path(file_okay=False, path_type=Path), default=Path("library/_built"), show_default=True)
+@click.option("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+@click.option("--force", is_flag=True, help="Rebuild every definition")
+def library_build_cmd(definitions_dir: Path, out_dir: Path, workers: int | None, force: bool) -> None:
+    """Build containers for changed definitions only; prints a JSON summary."""
+    report = build_library(definitions_dir, out_dir, workers=workers, force=force)
+    click.echo(json.dumps(report.to_dict(), indent=2))
+    if report.failures:
+        raise SystemExit(1)
 
 
 @main.command("gui")
@@ -1,5 +1,5 @@
 from .logging import get_logger, configure_logging  # pragma: no cover
+from .cache import LRUCache
+from .fs import atomic_write, common_parent, file_sha256, load_json_manifest, write_json_manifest
 
-__all__ = ["get_logger", "configure_logging"]
-
-
+__all__ = ["get_logger", "configure_logging", "LRUCache", "atomic_write", "common_parent", "file_sha256", "load_json_manifest", "write_json_manifest"]
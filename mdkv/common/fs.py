@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, Optional
+
+
+_umask_lock = threading.Lock()
+_umask_fallback: Optional[int] = None
+
+
+def _umask() -> int:
+    """Return the process umask without changing it where possible.
+
+    Linux reports it in `/proc/self/status`. Elsewhere it can only be queried
+    by setting it, so it is read once, under a lock, on first use.
+    """
+    global _umask_fallback
+    try:
+        with open("/proc/self/status", encoding="ascii", errors="replace") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    with _umask_lock:
+        if _umask_fallback is None:
+            _umask_fallback = os.umask(0)
+            os.umask(_umask_fallback)
+        return _umask_fallback
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "w", encoding: Optional[str] = "utf-8", newline: Optional[str] = "") -> Iterator[IO]:
+    """Open a temporary file next to `path` and rename it over `path` on success.
+
+    Readers never observe a partially written file; on error the temporary
+    file is removed and `path` is left untouched.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        if "b" in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding=encoding, newline=newline)
+        with f:
+            yield f
+        # mkstemp creates 0600 files; give the result normal permissions
+        os.chmod(tmp, 0o666 & ~_umask())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of the file at `path`."""
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def common_parent(paths: Iterable[Path]) -> Path:
+    """Return the deepest directory holding every file in `paths` (`.` when empty)."""
+    parents = [str(Path(p).parent.resolve()) for p in paths]
+    return Path(os.path.commonpath(parents)) if parents else Path(".")
+
+
+def load_json_manifest(path: Path, fmt: int, key: str) -> Dict[str, Any]:
+    """Return the `key` mapping of the JSON manifest at `path`.
+
+    Returns `{}` when the file is missing, unreadable or written in another
+    format than `fmt`, so callers simply rebuild everything.
+    """
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != fmt or not isinstance(data.get(key), dict):
+        return {}
+    return data[key]
+
+
+def write_json_manifest(path: Path, fmt: int, key: str, entries: Dict[str, Any]) -> None:
+    """Atomically write `{"format": fmt, key: entries}` to `path`."""
+    with atomic_write(path) as fp:
+        json.dump({"format": fmt, key: entries}, fp, indent=1, sort_keys=True)
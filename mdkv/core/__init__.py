@@ -1,14 +1,16 @@
 from .errors import ValidationError
-from .model import MDKVDocument, Track, allowed_track_types
-from .validate import validate_document, ValidationIssue
+from .model import DocumentSnapshot, MDKVDocument, Track, allowed_track_types
+from .validate import IncrementalValidator, validate_document, ValidationIssue
 
 __all__ = [
     "ValidationError",
     "MDKVDocument",
+    "DocumentSnapshot",
     "Track",
     "allowed_track_types",
     "validate_document",
     "ValidationIssue",
+    "IncrementalValidator",
 ]
 
 
@@ -10,11 +10,15 @@ Invariants:
   `allowed_track_types()`.
 - `Track.path` must live under the `tracks/` directory.
 - An `MDKVDocument` maps unique `track_id` values to `Track` instances.
+- Document mutators replace `Track` objects rather than editing them in place,
+  so a `DocumentSnapshot` can share unchanged tracks (copy-on-write).
 """
 
-from dataclasses import dataclass, field
+import hashlib
+from dataclasses import dataclass, field, replace
 from datetime import datetime
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 from .errors import ValidationError
 
@@ -35,6 +39,11 @@ def allowed_track_types() -> List[str]:
     ]
 
 
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of `text` encoded as UTF-8."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 @dataclass
 class Track:
     """A single Markdown content track within a document.
@@ -59,10 +68,63 @@ class Track:
             raise ValueError("track_id must not be empty")
         if not self.path.startswith("tracks/"):
             raise ValueError("track path must be under 'tracks/' directory")
+        self._digest: Optional[Tuple[str, str]] = None
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of `content`, memoized until `content` is reassigned.
+
+        Used as the cache key for derived data (indexes, rendered HTML).
+        """
+        cached = self._digest
+        if cached is None or cached[0] is not self.content:
+            cached = (self.content, content_hash(self.content))
+            self._digest = cached
+        return cached[1]
+
+
+class _TrackQueries:
+    """Read-only track helpers shared by documents and snapshots."""
+
+    tracks: Mapping[str, Track]
+
+    def get_track(self, track_id: str) -> Track | None:
+        """Return track by id or None if missing."""
+        return self.tracks.get(track_id)
+
+    def list_languages(self) -> List[str]:
+        """Return sorted list of languages present across tracks (excluding None)."""
+        langs = {t.language for t in self.tracks.values() if t.language}
+        return sorted(langs)
+
+    def find_tracks_by_type(self, track_type: str) -> List[Track]:
+        """Return all tracks with the given `track_type`."""
+        return [t for t in self.tracks.values() if t.track_type == track_type]
+
+
+@dataclass(frozen=True)
+class DocumentSnapshot(_TrackQueries):
+    """Immutable, point-in-time view of an `MDKVDocument`.
+
+    Snapshots share `Track` objects with the document they were taken from;
+    the document replaces a track on mutation instead of editing it, so a
+    snapshot stays consistent while edits continue. Treat tracks as read-only.
+    Accepted anywhere a document is read (export, search, `save_mdkv`).
+    """
+    title: str
+    authors: Tuple[str, ...]
+    created: datetime
+    version: str
+    tracks: Mapping[str, Track]
+    metadata: Mapping[str, str]
+
+    def snapshot(self) -> "DocumentSnapshot":
+        """Return `self`; snapshots are already immutable."""
+        return self
 
 
 @dataclass
-class MDKVDocument:
+class MDKVDocument(_TrackQueries):
     """In-memory representation of a `.mdkv` document.
 
     Includes metadata and a mapping of `track_id` → `Track`.
@@ -74,6 +136,23 @@ class MDKVDocument:
     tracks: Dict[str, Track] = field(default_factory=dict)
     metadata: Dict[str, str] = field(default_factory=dict)
 
+    def snapshot(self) -> DocumentSnapshot:
+        """Return an immutable `DocumentSnapshot` of the current state.
+
+        Costs one shallow copy of the track and metadata mappings, i.e.
+        O(number of tracks); `Track` objects are shared, not copied, so the
+        cost does not depend on content size and unchanged tracks are the
+        same objects in successive snapshots.
+        """
+        return DocumentSnapshot(
+            title=self.title,
+            authors=tuple(self.authors),
+            created=self.created,
+            version=self.version,
+            tracks=MappingProxyType(dict(self.tracks)),
+            metadata=MappingProxyType(dict(self.metadata)),
+        )
+
     def add_track(self, track: Track) -> None:
         """Add a new `track`.
 
@@ -83,10 +162,6 @@ class MDKVDocument:
             raise ValidationError(f"duplicate track_id: {track.track_id}")
         self.tracks[track.track_id] = track
 
-    def get_track(self, track_id: str) -> Track | None:
-        """Return track by id or None if missing."""
-        return self.tracks.get(track_id)
-
     def remove_track(self, track_id: str) -> Track:
         """Remove and return a track by id.
 
@@ -96,25 +171,26 @@ class MDKVDocument:
             raise KeyError(track_id)
         return self.tracks.pop(track_id)
 
-    def list_languages(self) -> List[str]:
-        """Return sorted list of languages present across tracks (excluding None)."""
-        langs = {t.language for t in self.tracks.values() if t.language}
-        return sorted(langs)
-
     # management helpers
-    def find_tracks_by_type(self, track_type: str) -> List[Track]:
-        """Return all tracks with the given `track_type`."""
-        return [t for t in self.tracks.values() if t.track_type == track_type]
+    def update_track(self, track_id: str, **changes: Any) -> Track:
+        """Replace track `track_id` with a copy carrying `changes`.
+
+        The previous `Track` object is left untouched for snapshot readers.
+        Raises `KeyError` if missing and `ValueError` if the result is invalid.
+        """
+        track = self.get_track(track_id)
+        if track is None:
+            raise KeyError(track_id)
+        updated = replace(track, **changes)
+        self.tracks[track_id] = updated
+        return updated
 
     def update_track_content(self, track_id: str, new_content: str) -> None:
         """Replace the Markdown `content` of the track `track_id`.
 
         Raises `KeyError` if missing.
         """
-        track = self.get_track(track_id)
-        if track is None:
-            raise KeyError(track_id)
-        track.content = new_content
+        self.update_track(track_id, content=new_content)
 
     def rename_track(self, old_id: str, new_id: str) -> None:
         """Rename `old_id` to `new_id` and adjust its path if it targets a `.md` file.
@@ -127,11 +203,11 @@ class MDKVDocument:
         if track is None:
             raise KeyError(old_id)
         # update mapping and track path
+        path = track.path
+        if path.startswith("tracks/") and path.endswith(".md"):
+            path = f"tracks/{new_id}.md"
         self.tracks.pop(old_id)
-        track.track_id = new_id
-        if track.path.startswith("tracks/") and track.path.endswith(".md"):
-            track.path = f"tracks/{new_id}.md"
-        self.tracks[new_id] = track
+        self.tracks[new_id] = replace(track, track_id=new_id, path=path)
 
     # metadata helpers
     def set_metadata(self, key: str, value: str) -> None:
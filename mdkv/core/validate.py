@@ -1,31 +1,65 @@
 from __future__ import annotations
 
-"""Validation helpers for MDKV documents."""
+"""Validation helpers for MDKV documents.
+
+`validate_document` runs every check on each call. `IncrementalValidator`
+runs the same document-level checks plus per-track rules, caching each
+track's issues by its content hash, so repeated validation of an edited
+document only re-checks the tracks that changed.
+"""
 
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from mdkv.common.cache import LRUCache
 
 from .errors import ValidationError
+from .model import Track
 
 
 @dataclass
 class ValidationIssue:
     level: str  # ERROR/WARN
     message: str
+    track_id: Optional[str] = None
+    entry: Optional[str] = None  # container entry, for container-level checks
 
 
-def validate_document(doc) -> List[ValidationIssue]:
-    """Validate required fields and presence of a primary track.
+TrackRule = Callable[[Track], Iterable[ValidationIssue]]
+DocumentRule = Callable[[Any], Iterable[ValidationIssue]]
 
-    Returns a list of issues and raises `ValidationError` if any ERRORs exist.
+
+def check_document(doc) -> List[ValidationIssue]:
+    """Document-level checks: required metadata and a track of type `primary`.
+
+    Same rule as the container validator (`mdkv.storage.validate`).
     """
     issues: List[ValidationIssue] = []
     if not doc.title:
         issues.append(ValidationIssue("ERROR", "title is required"))
     if not doc.authors:
         issues.append(ValidationIssue("ERROR", "at least one author is required"))
-    if "primary" not in doc.tracks:
+    if not any(t.track_type == "primary" for t in doc.tracks.values()):
         issues.append(ValidationIssue("ERROR", "primary track is required"))
+    return issues
+
+
+def check_track(track: Track) -> List[ValidationIssue]:
+    """Per-track checks that only depend on the track itself."""
+    issues: List[ValidationIssue] = []
+    if not track.content.strip():
+        issues.append(ValidationIssue("WARN", "track is empty", track_id=track.track_id))
+    if track.track_type == "translation" and not track.language:
+        issues.append(ValidationIssue("WARN", "translation track has no language", track_id=track.track_id))
+    return issues
+
+
+def validate_document(doc) -> List[ValidationIssue]:
+    """Validate required fields and presence of a primary track.
+
+    Returns a list of issues and raises `ValidationError` if any ERRORs exist.
+    """
+    issues = check_document(doc)
     # fail on any ERROR
     errors = [i for i in issues if i.level == "ERROR"]
     if errors:
@@ -35,3 +69,61 @@ def validate_document(doc) -> List[ValidationIssue]:
     return issues
 
 
+def _track_key(track: Track) -> Tuple[str, str, Optional[str], str, str]:
+    return (track.track_id, track.track_type, track.language, track.path, track.content_hash)
+
+
+class IncrementalValidator:
+    """Validate successive revisions of a document, re-checking only what changed.
+
+    - `track_rules` run per track; results are cached by track id, type,
+      language, path and content hash, so an unchanged or reverted track is
+      never re-checked
+    - `document_rules` run on the whole document and are re-run only when
+      its metadata or any track key changes
+
+    `validate` never raises; `checked_tracks` is the number of tracks the
+    last call actually re-checked.
+    """
+
+    def __init__(
+        self,
+        track_rules: Sequence[TrackRule] = (check_track,),
+        document_rules: Sequence[DocumentRule] = (check_document,),
+        maxsize: int = 1024,
+    ) -> None:
+        self.track_rules = list(track_rules)
+        self.document_rules = list(document_rules)
+        self._tracks: "LRUCache[List[ValidationIssue]]" = LRUCache(maxsize=maxsize)
+        self._last: Dict[str, Tuple[Track, List[ValidationIssue]]] = {}
+        self._document_key: Optional[Hashable] = None
+        self._document_issues: List[ValidationIssue] = []
+        self.checked_tracks = 0
+
+    def _check(self, track: Track) -> List[ValidationIssue]:
+        self.checked_tracks += 1
+        return [issue for rule in self.track_rules for issue in rule(track)]
+
+    def validate(self, doc) -> List[ValidationIssue]:
+        """Return the document-level issues followed by each track's, in document order."""
+        self.checked_tracks = 0
+        last: Dict[str, Tuple[Track, List[ValidationIssue]]] = {}
+        track_issues: List[ValidationIssue] = []
+        keys = []
+        for track_id, track in doc.tracks.items():
+            key = _track_key(track)
+            keys.append(key)
+            previous = self._last.get(track_id)
+            # tracks are replaced on edit, so an identical object is unchanged
+            if previous is not None and previous[0] is track:
+                issues = previous[1]
+            else:
+                issues = self._tracks.get_or_create(key, lambda: self._check(track))
+            last[track_id] = (track, issues)
+            track_issues.extend(issues)
+        self._last = last
+        document_key = (doc.title, tuple(doc.authors), tuple(sorted(doc.metadata.items())), tuple(keys))
+        if document_key != self._document_key:
+            self._document_issues = [issue for rule in self.document_rules for issue in rule(doc)]
+            self._document_key = document_key
+        return self._document_issues + track_issues
@@ -1,25 +1,49 @@
 from __future__ import annotations
 
+import dataclasses
 import json
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
 from mdkv.core.model import MDKVDocument, Track
-from mdkv.core.validate import validate_document
-from mdkv.core.errors import ValidationError
-from mdkv.services.export import to_html, to_markdown
-from mdkv.storage import load_mdkv, save_mdkv
-from mdkv.library import build_all_examples
+from mdkv.core.validate import IncrementalValidator, check_document
+from mdkv.services.export import to_html, to_markdown, tracks_to_html
+from mdkv.services.blocks import IncrementalRenderer
+from mdkv.services.links import check_links
+from mdkv.services.parse import render_track
+from mdkv.storage import container_features, load_mdkv, save_mdkv
+from mdkv.library import LIBRARY_CATALOG, LibraryCatalog, build_library
 
 
 class MDKVState:
     def __init__(self) -> None:
         self.path: Optional[Path] = None
         self.doc: Optional[MDKVDocument] = None
+        self.renderer = IncrementalRenderer()
+        self.validator = IncrementalValidator(document_rules=(check_document, check_links))
+        # holds `definitions/` and `_built/`
+        self.library_dir = Path(__file__).resolve().parents[2] / "library"
+        self.library_build: Optional[threading.Thread] = None
+        self.library_build_started = 0.0
+        self.catalog: Optional[Tuple[int, LibraryCatalog]] = None  # (catalog mtime_ns, catalog)
+
+
+# minimum seconds between background library refreshes
+LIBRARY_REFRESH_INTERVAL = 30.0
+
+
+def _library_catalog(catalog_path: Path) -> LibraryCatalog:
+    """Return the catalog at `catalog_path`, reloading it only when the file changed."""
+    mtime = catalog_path.stat().st_mtime_ns
+    if state.catalog is None or state.catalog[0] != mtime:
+        state.catalog = (mtime, LibraryCatalog.load(catalog_path))
+    return state.catalog[1]
 
 
 state = MDKVState()
@@ -53,27 +77,60 @@ def create_app(static_dir: Path | None = None) -> FastAPI:
         }
 
     @app.get("/api/library")
-    def list_library() -> dict:
-        """Return available example `.mdkv` files under `library/definitions`.
-
-        If built files are missing under `library/_built`, they are generated.
+    def list_library(
+        q: Optional[str] = None,
+        language: Optional[str] = None,
+        track_type: Optional[str] = None,
+        author: Optional[str] = None,
+        sort: str = "name",
+        order: str = "asc",
+        offset: int = 0,
+        limit: int = 500,
+    ) -> dict:
+        """List example documents from the catalog of `<library_dir>/_built`.
+
+        Supports filtering (`q` on name/title, `language`, `track_type`,
+        `author`), sorting (`sort`: name, title, size, tracks; `order`: asc or
+        desc) and pagination. Changed definitions are rebuilt by a background
+        incremental build, never inside the request; until a catalog exists,
+        the built files are listed by name without filtering.
         """
-        repo_root = Path(__file__).resolve().parents[2]
-        defs = repo_root / "library" / "definitions"
-        out_dir = repo_root / "library" / "_built"
-        out_dir.mkdir(parents=True, exist_ok=True)
-        built_paths = list(out_dir.glob("*.mdkv"))
-        if not built_paths:
-            try:
-                build_all_examples(defs, out_dir)
-                built_paths = list(out_dir.glob("*.mdkv"))
-            except Exception as e:
-                raise HTTPException(500, f"failed to build examples: {e}")
+        defs = state.library_dir / "definitions"
+        out_dir = state.library_dir / "_built"
+        catalog_path = out_dir / LIBRARY_CATALOG
+        idle = state.library_build is None or not state.library_build.is_alive()
+        if idle and (
+            not catalog_path.exists()
+            or time.monotonic() - state.library_build_started > LIBRARY_REFRESH_INTERVAL
+        ):
+            state.library_build_started = time.monotonic()
+            state.library_build = threading.Thread(target=build_library, args=(defs, out_dir), daemon=True)
+            state.library_build.start()
+        if order not in ("asc", "desc") or offset < 0 or limit < 0:
+            raise HTTPException(400, "invalid order, offset or limit")
+        building = state.library_build is not None and state.library_build.is_alive()
+        if not catalog_path.exists():
+            names = sorted(p.name for p in out_dir.glob("*.mdkv"))
+            return {
+                "files": [{"name": n, "path": str(out_dir / n)} for n in names[offset:offset + limit]],
+                "total": len(names),
+                "offset": offset,
+                "limit": limit,
+                "building": building,
+            }
+        try:
+            total, page = _library_catalog(catalog_path).query(
+                q=q, language=language, track_type=track_type, author=author,
+                sort=sort, descending=order == "desc", offset=offset, limit=limit,
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
         return {
-            "files": [
-                {"name": p.name, "path": str(p)}
-                for p in sorted(built_paths)
-            ]
+            "files": [dict(d, path=str(out_dir / d["name"])) for d in page],
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "building": building,
         }
 
     @app.post("/api/open")
@@ -93,7 +150,9 @@ def create_app(static_dir: Path | None = None) -> FastAPI:
     def save() -> dict:
         if not state.doc or not state.path:
             raise HTTPException(400, "no document loaded")
-        save_mdkv(state.doc, state.path)
+        # write a stable view so concurrent edits cannot tear the saved file
+        features = container_features(state.path) if state.path.exists() else {"index": False, "rendered": False}
+        save_mdkv(state.doc.snapshot(), state.path, build_index=features["index"], prerender=features["rendered"])
         return {"ok": True}
 
     @app.get("/api/document")
@@ -174,9 +233,15 @@ def create_app(static_dir: Path | None = None) -> FastAPI:
                 raise HTTPException(400, str(e))
             state.doc.add_track(t)
         else:
-            t.track_type = payload.get("type", t.track_type)
-            t.language = payload.get("language", t.language)
-            t.content = payload.get("content", t.content)
+            try:
+                state.doc.update_track(
+                    track_id,
+                    track_type=payload.get("type", t.track_type),
+                    language=payload.get("language", t.language),
+                    content=payload.get("content", t.content),
+                )
+            except ValueError as e:
+                raise HTTPException(400, str(e))
         return {"ok": True}
 
     @app.delete("/api/track/{track_id}")
@@ -190,13 +255,13 @@ def create_app(static_dir: Path | None = None) -> FastAPI:
     def render_html() -> str:
         if not state.doc:
             raise HTTPException(400, "no document loaded")
-        return to_html(state.doc)
+        return to_html(state.doc.snapshot())
 
     @app.get("/api/render/markdown")
     def render_markdown() -> JSONResponse:
         if not state.doc:
             raise HTTPException(400, "no document loaded")
-        return JSONResponse({"markdown": to_markdown(state.doc)})
+        return JSONResponse({"markdown": to_markdown(state.doc.snapshot())})
 
     @app.get("/api/render/track_html", response_class=HTMLResponse)
     def render_track_html(track_id: str) -> str:
@@ -205,51 +270,62 @@ def create_app(static_dir: Path | None = None) -> FastAPI:
         t = state.doc.get_track(track_id)
         if t is None:
             raise HTTPException(404, "track not found")
-        # render only this track's content
-        from markdown_it import MarkdownIt
+        return render_track(t)
 
-        return MarkdownIt().render(t.content)
+    @app.get("/api/render/track_blocks")
+    def render_track_blocks(track_id: str) -> dict:
+        """Block HTML of one track plus the block ranges changed since the last call."""
+        if not state.doc:
+            raise HTTPException(400, "no document loaded")
+        t = state.doc.get_track(track_id)
+        if t is None:
+            raise HTTPException(404, "track not found")
+        result = state.renderer.render(t.content, key=track_id)
+        return {
+            "html": result.html,
+            "blocks": [{"start": b.start, "end": b.end, "html": b.html} for b in result.blocks],
+            "changes": [
+                {"old": [c.old_start, c.old_end], "new": [c.new_start, c.new_end]} for c in result.changes
+            ],
+        }
 
     @app.get("/api/render/all_html", response_class=HTMLResponse)
     def render_all_html() -> str:
         if not state.doc:
             raise HTTPException(400, "no document loaded")
-        from markdown_it import MarkdownIt
-
-        return MarkdownIt().render(to_markdown(state.doc))
+        return tracks_to_html(state.doc.snapshot())
 
     @app.post("/api/render/tracks_html", response_class=HTMLResponse)
     def render_tracks_html(payload: dict) -> str:
         if not state.doc:
             raise HTTPException(400, "no document loaded")
-        from markdown_it import MarkdownIt
         # Accept a list of track_ids; if missing, render all; if empty list, render nothing
         ids = payload.get("track_ids")
+        doc = state.doc.snapshot()
         if ids is None:
-            return MarkdownIt().render(to_markdown(state.doc))
+            return tracks_to_html(doc)
         if not isinstance(ids, list):
             raise HTTPException(422, "track_ids must be a list")
         if len(ids) == 0:
-            return MarkdownIt().render("<!-- MDKV: empty selection -->")
-        # Compose markdown from subset in document order
-        parts: list[str] = [f"<!-- MDKV: {state.doc.title} -->"]
-        idset = set(str(x) for x in ids)
-        for t in state.doc.tracks.values():
-            if t.track_id not in idset:
-                continue
-            header = f"\n\n<!-- track:{t.track_id} type:{t.track_type} lang:{t.language} -->\n\n"
-            parts.append(header + t.content)
-        return MarkdownIt().render("".join(parts))
+            return "<!-- MDKV: empty selection -->"
+        # Compose cached track fragments in document order
+        return tracks_to_html(doc, track_ids=[str(x) for x in ids])
 
     @app.post("/api/validate")
     def validate() -> dict:
         if not state.doc:
             raise HTTPException(400, "no document loaded")
-        try:
-            validate_document(state.doc)
-            return {"ok": True}
-        except ValidationError as e:
-            return {"ok": False, "error": str(e)}
+        # cheap enough to call after every edit: only changed tracks are re-checked
+        issues = state.validator.validate(state.doc.snapshot())
+        errors = [i.message for i in issues if i.level == "ERROR"]
+        result = {
+            "ok": not errors,
+            "issues": [dataclasses.asdict(i) for i in issues],
+            "checked_tracks": state.validator.checked_tracks,
+        }
+        if errors:
+            result["error"] = "; ".join(errors)
+        return result
 
     return app
 
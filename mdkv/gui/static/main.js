@@ -49,9 +49,15 @@ async function save() {
   setStatus('Saved');
 }
 
+function validationSummary(r) {
+  const warnings = r.issues.filter(i => i.level === 'WARN').length;
+  const summary = r.ok ? 'Validation OK' : 'Validation failed: ' + r.error;
+  return warnings ? `${summary} (${warnings} warning${warnings === 1 ? '' : 's'})` : summary;
+}
+
 async function validate() {
   const r = await api('/api/validate', { method: 'POST' });
-  setStatus(r.ok ? 'Validation OK' : 'Validation failed: ' + r.error);
+  setStatus(validationSummary(r));
 }
 
 function setStatus(msg) {
@@ -75,7 +81,9 @@ const liveUpdate = debounce(async () => {
       await api('/api/track', { method: 'POST', body: JSON.stringify({ id: s.id, content: s.content }) });
     }
     await renderSelectedTracks();
-    setStatus('Live updated');
+    // incremental on the server: only edited tracks are re-checked
+    const r = await api('/api/validate', { method: 'POST' });
+    setStatus('Live updated · ' + validationSummary(r));
   } catch (e) {
     // ignore during typing
   }
@@ -207,7 +215,14 @@ window.addEventListener('DOMContentLoaded', async () => {
 
 async function populateLibrarySelect() {
   try {
-    const r = await api('/api/library');
+    // page through the catalog; the endpoint caps each response at `limit`
+    const files = [];
+    let r;
+    do {
+      r = await api(`/api/library?offset=${files.length}`);
+      files.push(...r.files);
+    } while (r.files.length && files.length < r.total);
+    if (r.building) setTimeout(populateLibrarySelect, 2000);
     const select = document.getElementById('libSelect');
     const existing = select.value;
     select.innerHTML = '';
@@ -215,10 +230,10 @@ async function populateLibrarySelect() {
     placeholder.value = '';
     placeholder.textContent = 'Select from library…';
     select.appendChild(placeholder);
-    for (const f of r.files) {
+    for (const f of files) {
       const opt = document.createElement('option');
       opt.value = f.path;
-      opt.textContent = f.name;
+      opt.textContent = f.title ? `${f.title} (${f.name})` : f.name;
       select.appendChild(opt);
     }
     if (existing) select.value = existing;
@@ -1,43 +1,335 @@
 from __future__ import annotations
 
+"""Build example `.mdkv` containers from YAML definitions.
+
+A definition file may hold several YAML documents (`---` separated), one
+definition each; they are parsed one at a time with libyaml's `CSafeLoader`
+when PyYAML provides it. A track may give its content inline (`content:`)
+or as `content_file:`, a path relative to the definition file, so large
+tracks are read as plain text instead of being parsed as YAML scalars.
+The first definition of `name.yaml` builds `name.mdkv`, the n-th one
+`name-n.mdkv`, unless it sets `name:`.
+
+`build_library` is incremental: a manifest in the output directory records,
+per definition file, its size, mtime and hash, the size and mtime of the
+content files it references and the containers built from it. Definitions
+whose files are unchanged (same size and mtime, or same hash) and whose
+outputs are intact are skipped; the rest are built in a process pool and
+written atomically. Outputs no longer produced by any definition are
+removed.
+
+The build also maintains `catalog.json` in the output directory: per
+document its title, authors, languages, track types and counts, output size
+and hash. `LibraryCatalog` loads it once and answers filtered, sorted and
+paginated listings from in-memory indexes, without touching the containers.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import yaml
 
+from .common.fs import atomic_write, file_sha256, load_json_manifest, write_json_manifest
+from .common.logging import get_logger
 from .core.model import MDKVDocument, Track
 from .storage import save_mdkv
 
 
-def build_document_from_definition(defn: Dict[str, Any]) -> MDKVDocument:
-    doc = MDKVDocument(title=defn["title"], authors=list(defn.get("authors", [])), created=defn.get("created") or __import__("datetime").datetime.utcnow())
+LIBRARY_MANIFEST = ".mdkv-library.json"
+LIBRARY_CATALOG = "catalog.json"
+CATALOG_SORT_KEYS = ("name", "title", "size", "tracks")
+# format 3: several outputs and content files per definition file
+_MANIFEST_FORMAT = 3
+_CATALOG_FORMAT = 1
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+logger = get_logger("mdkv.library")
+
+
+def _track_content(t: Dict[str, Any], base_dir: Optional[Path]) -> str:
+    content_file = t.get("content_file")
+    if content_file is None:
+        return t.get("content", "")
+    if "content" in t:
+        raise ValueError(f"track '{t['id']}' sets both content and content_file")
+    return (Path(base_dir or ".") / content_file).read_text(encoding="utf-8")
+
+
+def build_document_from_definition(defn: Dict[str, Any], base_dir: Optional[Path] = None) -> MDKVDocument:
+    """Build a document from one definition; `content_file` paths are relative to `base_dir`."""
+    doc = MDKVDocument(title=defn["title"], authors=list(defn.get("authors", [])), created=defn.get("created") or datetime.utcnow())
     for t in defn.get("tracks", []):
         track = Track(
             track_id=t["id"],
             track_type=t["type"],
             language=t.get("language"),
             path=f"tracks/{t['id']}.md",
-            content=t.get("content", ""),
+            content=_track_content(t, base_dir),
         )
         doc.add_track(track)
     return doc
 
 
+def iter_definitions(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield the definitions of a (multi-document) YAML file one at a time; empty documents are skipped."""
+    with Path(path).open("r", encoding="utf-8") as f:
+        for defn in yaml.load_all(f, Loader=_YAML_LOADER):
+            if defn is not None:
+                yield defn
+
+
 def load_example_definition(path: Path) -> Dict[str, Any]:
-    return yaml.safe_load(Path(path).read_text(encoding="utf-8"))
+    """Return the first definition in `path` (see `iter_definitions` for multi-document files)."""
+    for defn in iter_definitions(path):
+        return defn
+    raise ValueError(f"no definition in {path}")
+
+
+def content_files(defn: Dict[str, Any]) -> List[str]:
+    """Return the `content_file` paths referenced by a definition."""
+    return [t["content_file"] for t in defn.get("tracks", []) if t.get("content_file") is not None]
+
+
+def _output_name(definition: Path, defn: Dict[str, Any], index: int) -> str:
+    name = defn.get("name")
+    if name:
+        return Path(str(name)).name + ".mdkv"
+    return definition.stem + (".mdkv" if index == 0 else f"-{index + 1}.mdkv")
+
+
+@dataclass
+class LibraryReport:
+    """Outcome of `build_library`: counts, failures `(definition, error)`, outputs and wall time."""
+    built: int = 0
+    skipped: int = 0
+    removed: int = 0
+    failures: List[Tuple[str, str]] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "built": self.built,
+            "skipped": self.skipped,
+            "removed": self.removed,
+            "failed": len(self.failures),
+            "failures": [{"path": p, "error": e} for p, e in self.failures],
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def _catalog_entry(doc: MDKVDocument, out_path: Path) -> Dict[str, Any]:
+    return {
+        "title": doc.title,
+        "authors": list(doc.authors),
+        "languages": doc.list_languages(),
+        "track_types": sorted({t.track_type for t in doc.tracks.values()}),
+        "tracks": len(doc.tracks),
+        "size": out_path.stat().st_size,
+        "sha256": file_sha256(out_path),
+    }
 
 
-def build_all_examples(definitions_dir: Path, out_dir: Path) -> List[Path]:
+def _stat_key(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _build_one(definition: Path, out_dir: Path) -> Dict[str, Any]:
+    """Build every definition in `definition`; return its outputs' catalog entries and content files."""
+    outputs: Dict[str, Any] = {}
+    files: Dict[str, List[int]] = {}
+    for index, defn in enumerate(iter_definitions(definition)):
+        name = _output_name(definition, defn, index)
+        if name in outputs:
+            raise ValueError(f"duplicate output name: {name}")
+        for rel in content_files(defn):
+            files[rel] = _stat_key(definition.parent / rel)
+        # without `created`, use the definition's mtime so rebuilds are reproducible
+        defn.setdefault("created", datetime.utcfromtimestamp(definition.stat().st_mtime).replace(microsecond=0))
+        doc = build_document_from_definition(defn, definition.parent)
+        save_mdkv(doc, out_dir / name)
+        outputs[name] = _catalog_entry(doc, out_dir / name)
+    return {"outputs": outputs, "content_files": files}
+
+
+def _unchanged(definition: Path, entry: Dict[str, Any], fingerprint: Dict[str, Any], out_dir: Path) -> bool:
+    """True if the outputs recorded in `entry` are intact and no input changed."""
+    try:
+        if any((out_dir / name).stat().st_size != info["size"] for name, info in entry["outputs"].items()):
+            return False
+        if any(_stat_key(definition.parent / rel) != key for rel, key in entry["content_files"].items()):
+            return False
+    except FileNotFoundError:
+        return False
+    same_stat = all(entry.get(k) == v for k, v in fingerprint.items())
+    return same_stat or entry.get("sha256") == file_sha256(definition)
+
+
+def build_library(
+    definitions_dir: Path,
+    out_dir: Path,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> LibraryReport:
+    """Build the containers of every `<definitions_dir>/*.yaml` into `out_dir`, skipping unchanged ones.
+
+    - `workers`: process count (defaults to CPU count); `<= 1` builds in-process
+    - `force`: rebuild every definition
+    `built`/`skipped` count definition files. Failures are logged, reported
+    and retried on the next run.
+    """
+    started = time.perf_counter()
     definitions_dir = Path(definitions_dir)
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-    outputs: List[Path] = []
-    for yml in sorted(definitions_dir.glob("*.yaml")):
-        defn = load_example_definition(yml)
-        doc = build_document_from_definition(defn)
-        out_path = out_dir / (yml.stem + ".mdkv")
-        save_mdkv(doc, out_path)
-        outputs.append(out_path)
-    return outputs
+    manifest_path = out_dir / LIBRARY_MANIFEST
+    previous = load_json_manifest(manifest_path, _MANIFEST_FORMAT, "definitions")
+    current: Dict[str, Any] = {}
+    report = LibraryReport()
+
+    jobs: List[Tuple[Path, Dict[str, Any]]] = []
+    for definition in sorted(definitions_dir.glob("*.yaml")):
+        stat = definition.stat()
+        fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        entry = previous.get(definition.name)
+        if entry is not None and not force and _unchanged(definition, entry, fingerprint, out_dir):
+            current[definition.name] = dict(entry, **fingerprint)
+            report.skipped += 1
+            continue
+        jobs.append((definition, fingerprint))
+
+    def completed(definition: Path, fingerprint: Dict[str, Any], result: Dict[str, Any]) -> None:
+        current[definition.name] = dict(fingerprint, sha256=file_sha256(definition), **result)
+        report.built += 1
+
+    def failed(definition: Path, error: Exception) -> None:
+        logger.warning("building %s failed: %s", definition, error)
+        report.failures.append((str(definition), str(error)))
+
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    try:
+        if workers <= 1 or len(jobs) <= 1:
+            for definition, fingerprint in jobs:
+                try:
+                    completed(definition, fingerprint, _build_one(definition, out_dir))
+                except Exception as e:
+                    failed(definition, e)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(_build_one, definition, out_dir): (definition, fingerprint)
+                    for definition, fingerprint in jobs
+                }
+                for future in as_completed(futures):
+                    definition, fingerprint = futures[future]
+                    try:
+                        completed(definition, fingerprint, future.result())
+                    except Exception as e:
+                        failed(definition, e)
+        # outputs no longer produced: deleted definitions or documents; failed ones keep theirs
+        produced = {name for entry in current.values() for name in entry["outputs"]}
+        failed_names = {Path(p).name for p, _ in report.failures}
+        for name, entry in previous.items():
+            if name in failed_names:
+                produced.update(entry["outputs"])
+        for name, entry in previous.items():
+            for output in set(entry["outputs"]) - produced:
+                (out_dir / output).unlink(missing_ok=True)
+                report.removed += 1
+        report.outputs = sorted(out_dir / name for name in produced if (out_dir / name).exists())
+    finally:
+        catalog_path = out_dir / LIBRARY_CATALOG
+        if report.built or report.removed or report.failures or not catalog_path.exists():
+            documents = [
+                dict(info, name=name)
+                for entry in current.values()
+                for name, info in entry["outputs"].items()
+            ]
+            with atomic_write(catalog_path) as fp:
+                json.dump({"format": _CATALOG_FORMAT, "documents": sorted(documents, key=lambda d: d["name"])}, fp, separators=(",", ":"))
+        write_json_manifest(manifest_path, _MANIFEST_FORMAT, "definitions", current)
+        report.seconds = time.perf_counter() - started
+    return report
+
+
+def build_all_examples(definitions_dir: Path, out_dir: Path, workers: Optional[int] = None) -> List[Path]:
+    """Build the library incrementally (see `build_library`) and return the output paths."""
+    return build_library(definitions_dir, out_dir, workers=workers).outputs
+
+
+class LibraryCatalog:
+    """In-memory view of `catalog.json` with indexes for `query`."""
+
+    def __init__(self, documents: Iterable[Dict[str, Any]]) -> None:
+        self.documents: List[Dict[str, Any]] = sorted(documents, key=lambda d: d["name"])
+        self._text = [f"{d['name']}\x00{d['title']}".lower() for d in self.documents]
+        self._facets: Dict[str, Dict[str, Set[int]]] = {"languages": {}, "track_types": {}, "authors": {}}
+        for i, d in enumerate(self.documents):
+            for facet, index in self._facets.items():
+                for value in d.get(facet, ()):
+                    index.setdefault(value, set()).add(i)
+        self._orders: Dict[str, List[int]] = {"name": list(range(len(self.documents)))}
+
+    @classmethod
+    def load(cls, path: Path) -> "LibraryCatalog":
+        """Load a catalog file; raises `ValueError` on an unknown format."""
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("format") != _CATALOG_FORMAT:
+            raise ValueError(f"unsupported catalog format: {data.get('format')}")
+        return cls(data["documents"])
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _order(self, sort: str) -> List[int]:
+        if sort not in CATALOG_SORT_KEYS:
+            raise ValueError(f"unsupported sort key: {sort}")
+        order = self._orders.get(sort)
+        if order is None:
+            docs = self.documents
+            key = (lambda i: docs[i]["title"].lower()) if sort == "title" else (lambda i: docs[i][sort])
+            order = self._orders[sort] = sorted(range(len(docs)), key=key)
+        return order
 
+    def query(
+        self,
+        q: Optional[str] = None,
+        language: Optional[str] = None,
+        track_type: Optional[str] = None,
+        author: Optional[str] = None,
+        sort: str = "name",
+        descending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return `(total, page)` of documents matching every given filter.
 
+        `q` matches a case-insensitive substring of the file name or title;
+        `language`, `track_type` and `author` match exactly. `sort` is one of
+        `CATALOG_SORT_KEYS`; ties are in name order (reversed with
+        `descending`). Raises `ValueError` for an unknown sort key.
+        """
+        order = self._order(sort)
+        selected: Optional[Set[int]] = None
+        for facet, value in (("languages", language), ("track_types", track_type), ("authors", author)):
+            if value is not None:
+                ids = self._facets[facet].get(value, set())
+                selected = ids if selected is None else selected & ids
+        if q:
+            needle = q.lower()
+            pool = range(len(self.documents)) if selected is None else selected
+            selected = {i for i in pool if needle in self._text[i]}
+        if descending:
+            order = order[::-1]
+        stop = None if limit is None else offset + limit
+        if selected is None:
+            return len(order), [self.documents[i] for i in order[offset:stop]]
+        matching = [i for i in order if i in selected] if len(selected) < len(order) else order
+        return len(selected), [self.documents[i] for i in matching[offset:stop]]
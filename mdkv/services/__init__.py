@@ -1,12 +1,59 @@
-from .search import search_document, SearchMatch
-from .export import to_markdown, to_html, export_to_files
+from .search import (
+    search_document,
+    SearchMatch,
+    iter_search,
+    search_page,
+    SearchPage,
+    search_terms,
+    TermMatch,
+)
+from .export import to_markdown, to_html, tracks_to_html, write_markdown, write_html, export_to_files, FileExportReport
+from .index import FullTextIndex, query_document
+from .corpus import search_corpus
+from .batch import BatchReport, export_batch
+from .site import SiteReport, build_site
+from .markdown_import import from_markdown, import_markdown
+from .rank import RankedMatch, TermStatsIndex, ranked_search
+from .lines import ContextMatch, add_context
+from .structure import ElementMatch, search_elements
+from .align import AlignedSegment, aligned_segments
+from .links import check_corpus_links, check_links
 
 __all__ = [
     "search_document",
     "SearchMatch",
+    "iter_search",
+    "search_page",
+    "SearchPage",
+    "search_terms",
+    "TermMatch",
     "to_markdown",
     "to_html",
+    "tracks_to_html",
+    "write_markdown",
+    "write_html",
     "export_to_files",
+    "FileExportReport",
+    "FullTextIndex",
+    "query_document",
+    "search_corpus",
+    "export_batch",
+    "BatchReport",
+    "build_site",
+    "SiteReport",
+    "from_markdown",
+    "import_markdown",
+    "ranked_search",
+    "RankedMatch",
+    "TermStatsIndex",
+    "ContextMatch",
+    "add_context",
+    "ElementMatch",
+    "search_elements",
+    "AlignedSegment",
+    "aligned_segments",
+    "check_links",
+    "check_corpus_links",
 ]
 
 
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+"""Cross-track alignment between a source track and its translations.
+
+Translation tracks mirror the primary track section by section. Each
+top-level Markdown block gets an alignment key derived from the heading
+structure (`("h", (1, 2))` is the second heading below the first top-level
+heading) and its ordinal within the section (`("p", (1, 2), 0)`). An
+explicit `<!-- align:NAME -->` comment before a block overrides the key with
+`("a", NAME)`, for passages whose position differs between languages.
+
+`TrackAlignment` indexes are cached by content hash; a lookup is a bisect
+in the source track plus a dict lookup per target track.
+"""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mdkv.common.cache import LRUCache
+from mdkv.core.model import MDKVDocument, Track
+
+from .parse import parse_track
+from .search import SearchMatch
+
+
+_ANCHOR_RE = re.compile(r"^\s*<!--\s*align:([\w.\-]+)\s*-->\s*$")
+_BLOCK_OPENERS = {
+    "paragraph_open", "bullet_list_open", "ordered_list_open", "blockquote_open",
+    "table_open", "fence", "code_block", "html_block", "hr",
+}
+_alignments: "LRUCache[TrackAlignment]" = LRUCache(maxsize=128)
+
+AlignKey = Tuple[object, ...]
+
+
+@dataclass(frozen=True)
+class AlignedSegment:
+    """A block of `track_id` at `start:end` identified by alignment `key`."""
+    track_id: str
+    language: Optional[str]
+    key: AlignKey
+    start: int
+    end: int
+    text: str
+
+
+class TrackAlignment:
+    """Alignment keys and spans of the top-level blocks of one track revision."""
+
+    def __init__(self, track: Track) -> None:
+        parsed = parse_track(track)
+        self.spans: List[Tuple[AlignKey, int, int]] = []
+        counters: List[int] = []
+        ordinal = 0
+        anchor: Optional[str] = None
+        for token in parsed.tokens:
+            if token.level != 0 or not token.map:
+                continue
+            start, end = parsed.line_span(*token.map)
+            if token.type == "heading_open":
+                level = int(token.tag[1])
+                counters = (counters + [0] * level)[:level]
+                counters[level - 1] += 1
+                key: AlignKey = ("h", tuple(counters))
+                ordinal = 0
+            elif token.type in _BLOCK_OPENERS:
+                found = _ANCHOR_RE.match(token.content) if token.type == "html_block" else None
+                if found:
+                    anchor = found.group(1)
+                    continue
+                key = ("p", tuple(counters), ordinal)
+                ordinal += 1
+            else:
+                continue
+            if anchor is not None:
+                key, anchor = ("a", anchor), None
+            self.spans.append((key, start, end))
+        self.starts = [start for _, start, _ in self.spans]
+        self.by_key: Dict[AlignKey, Tuple[int, int]] = {}
+        for key, start, end in self.spans:
+            self.by_key.setdefault(key, (start, end))
+
+    def locate(self, offset: int) -> Optional[Tuple[AlignKey, int, int]]:
+        """Return `(key, start, end)` of the block containing (or preceding) `offset`."""
+        idx = bisect_right(self.starts, offset) - 1
+        return self.spans[idx] if idx >= 0 else None
+
+
+def alignment_for(track: Track) -> TrackAlignment:
+    """Return the cached `TrackAlignment` for the current content of `track`."""
+    return _alignments.get_or_create(track.content_hash, lambda: TrackAlignment(track))
+
+
+def _segment(track: Track, key: AlignKey, start: int, end: int) -> AlignedSegment:
+    return AlignedSegment(track.track_id, track.language, key, start, end, track.content[start:end])
+
+
+def aligned_segments(
+    doc: MDKVDocument,
+    track_id: str,
+    offset: int,
+    target_track_ids: Optional[Iterable[str]] = None,
+) -> Tuple[Optional[AlignedSegment], List[AlignedSegment]]:
+    """Return the source block at `offset` in `track_id` and its aligned blocks.
+
+    Targets default to the `primary` and `translation` tracks other than the
+    source. Targets without a block for the key are omitted. Raises `KeyError` if
+    `track_id` is missing.
+    """
+    source = doc.tracks[track_id]
+    located = alignment_for(source).locate(offset)
+    if located is None:
+        return None, []
+    key, start, end = located
+    if target_track_ids is None:
+        targets = [
+            t for t in doc.tracks.values()
+            if t.track_type in ("primary", "translation") and t.track_id != track_id
+        ]
+    else:
+        targets = [doc.tracks[tid] for tid in target_track_ids]
+    aligned: List[AlignedSegment] = []
+    for target in targets:
+        span = alignment_for(target).by_key.get(key)
+        if span is not None:
+            aligned.append(_segment(target, key, *span))
+    return _segment(source, key, start, end), aligned
+
+
+def align_matches(
+    doc: MDKVDocument,
+    matches: Iterable[SearchMatch],
+) -> Iterator[Tuple[SearchMatch, List[AlignedSegment]]]:
+    """Pair each match with the translation blocks aligned to its enclosing block."""
+    for m in matches:
+        _, aligned = aligned_segments(doc, m.track_id, m.start)
+        yield m, aligned
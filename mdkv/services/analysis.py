@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+"""Language-aware text analysis for ranked search.
+
+Small, pure-Python analyzers (tokenizer, stopword list and light suffix
+stemmer) for English, Spanish, French and German. They aim at recall for
+BM25 ranking, not linguistic accuracy. Unknown languages fall back to a
+generic analyzer that only case-folds.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, Optional, Tuple
+
+
+_WORD_RE = re.compile(r"\w+")
+
+SuffixGroup = Tuple[Tuple[str, str], ...]
+
+
+def _strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@dataclass(frozen=True)
+class Analyzer:
+    """Tokenizer + stopwords + stemmer for one language.
+
+    `steps` are applied in order; each strips at most one suffix (first match)
+    and never leaves a stem shorter than `min_stem` characters.
+    """
+    language: str
+    stopwords: FrozenSet[str] = frozenset()
+    steps: Tuple[SuffixGroup, ...] = ()
+    fold_accents: bool = False
+    min_stem: int = 3
+
+    def normalize(self, word: str) -> str:
+        word = word.casefold()
+        return _strip_accents(word) if self.fold_accents else word
+
+    def stem(self, term: str) -> str:
+        for group in self.steps:
+            for suffix, replacement in group:
+                if term.endswith(suffix) and len(term) - len(suffix) >= self.min_stem:
+                    term = term[: len(term) - len(suffix)] + replacement
+                    break
+        return term
+
+    def analyze(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield `(term, start, end)` for non-stopword tokens of `text`."""
+        for m in _WORD_RE.finditer(text):
+            word = self.normalize(m.group())
+            if word in self.stopwords:
+                continue
+            yield self.stem(word), m.start(), m.end()
+
+
+_STOPWORDS: Dict[str, str] = {
+    "en": "a an and are as at be but by for from has have in is it its of on or that the this to was were "
+          "which with will not no can we you they he she their our into than then there these those",
+    "es": "a al algo como con de del el ella ellos en entre era es esta este esto fue ha la las le lo los "
+          "mas me mi no o para pero por que se sin sobre su sus también tu un una uno y ya",
+    "fr": "à au aux avec ce ces cette dans de des du elle en est et il ils je la le les leur mais ne nous "
+          "ou par pas pour qu que qui sa se ses son sur un une vous y",
+    "de": "aber als am an auch auf aus bei bin bis das dass dem den der des die doch du ein eine einem einen "
+          "einer er es für hat ich im in ist mit nach nicht noch oder sie sind so über um und von war wie zu",
+}
+
+_STEPS: Dict[str, Tuple[SuffixGroup, ...]] = {
+    "en": (
+        (("sses", "ss"), ("ies", "y"), ("ss", "ss"), ("s", "")),
+        (("ingly", ""), ("edly", ""), ("ing", ""), ("ed", ""), ("ly", "")),
+        (("e", ""),),
+    ),
+    "es": (
+        (("mente", ""), ("ciones", "cion"), ("es", ""), ("s", "")),
+        (("a", ""), ("o", ""), ("e", "")),
+    ),
+    "fr": (
+        (("ements", ""), ("ement", ""), ("ments", ""), ("ment", ""), ("eaux", "eau"), ("aux", "al"), ("s", ""), ("x", "")),
+        (("e", ""),),
+    ),
+    "de": (
+        (("ungen", "ung"), ("heiten", "heit"), ("keiten", "keit"), ("ern", ""), ("en", ""), ("er", ""), ("es", ""), ("e", ""), ("n", ""), ("s", "")),
+    ),
+}
+
+
+def supported_languages() -> Tuple[str, ...]:
+    """Return language codes with a bundled analyzer."""
+    return tuple(sorted(_STEPS))
+
+
+@lru_cache(maxsize=None)
+def get_analyzer(language: Optional[str]) -> Analyzer:
+    """Return the analyzer for `language` (BCP-47 region tags are ignored)."""
+    code = (language or "").split("-")[0].split("_")[0].lower()
+    if code not in _STEPS:
+        return Analyzer(language=code or "und")
+    return Analyzer(
+        language=code,
+        stopwords=frozenset(_strip_accents(w) for w in _STOPWORDS[code].split()) | frozenset(_STOPWORDS[code].split()),
+        steps=_STEPS[code],
+        fold_accents=code != "en",
+    )
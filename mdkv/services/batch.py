@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+"""Batch export of many `.mdkv` files.
+
+Each document is exported independently (in a process pool when
+`workers > 1`) to Markdown, primary-track HTML, or one file per track. A
+manifest in the output directory records, per source, its hash and the hash
+and size of every output, so re-running skips documents whose source and
+outputs are unchanged. Outputs are written atomically; outputs of sources
+that are no longer listed are removed.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from mdkv.common.fs import atomic_write, common_parent, file_sha256, load_json_manifest, write_json_manifest
+from mdkv.common.logging import get_logger
+from mdkv.storage.io import load_mdkv
+
+from .export import export_to_files, write_html, write_markdown
+
+
+BATCH_MANIFEST = ".mdkv-export.json"
+BATCH_FORMATS = ("md", "html", "files")
+_MANIFEST_FORMAT = 1
+
+logger = get_logger("mdkv.batch")
+
+Progress = Callable[[int, int, Path, str], None]
+
+
+@dataclass
+class BatchReport:
+    """Outcome of `export_batch`: counts, failures `(source, error)` and wall time."""
+    exported: int = 0
+    skipped: int = 0
+    failures: List[Tuple[str, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.exported + self.skipped + len(self.failures)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "exported": self.exported,
+            "skipped": self.skipped,
+            "failed": len(self.failures),
+            "failures": [{"path": p, "error": e} for p, e in self.failures],
+            "seconds": round(self.seconds, 3),
+            "docs_per_second": round(self.total / self.seconds, 1) if self.seconds else None,
+        }
+
+
+def _target_for(rel: Path, out_dir: Path, fmt: str) -> Path:
+    if fmt == "files":
+        return out_dir / rel.with_suffix("")
+    return out_dir / rel.with_suffix("." + fmt)
+
+
+def _record(path: Path, out_dir: Path) -> Tuple[str, List[Any]]:
+    return path.relative_to(out_dir).as_posix(), [file_sha256(path), path.stat().st_size]
+
+
+def _export_one(source: Path, out_dir: Path, target: Path, fmt: str) -> Dict[str, List[Any]]:
+    """Export one document; return `{output: [sha256, size]}` relative to `out_dir`."""
+    doc = load_mdkv(source)
+    if fmt == "files":
+        export_to_files(doc, target, prune=True)
+        return dict(_record(p, out_dir) for p in sorted(target.glob("*.md")))
+    with atomic_write(target) as fp:
+        (write_html if fmt == "html" else write_markdown)(doc, fp)
+    return dict([_record(target, out_dir)])
+
+
+def _outputs_intact(out_dir: Path, outputs: Dict[str, List[Any]]) -> bool:
+    for name, (_, size) in outputs.items():
+        try:
+            if (out_dir / name).stat().st_size != size:
+                return False
+        except FileNotFoundError:
+            return False
+    return bool(outputs)
+
+
+def _prune(out_dir: Path, outputs: Dict[str, List[Any]]) -> None:
+    """Delete `outputs` and the directories they leave empty below `out_dir`."""
+    for name in outputs:
+        path = out_dir / name
+        path.unlink(missing_ok=True)
+        for parent in path.parents:
+            if parent == out_dir:
+                break
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+
+
+def export_batch(
+    paths: Iterable[Path],
+    out_dir: Path,
+    fmt: str = "md",
+    workers: Optional[int] = None,
+    base: Optional[Path] = None,
+    force: bool = False,
+    progress: Optional[Progress] = None,
+) -> BatchReport:
+    """Export every document in `paths` below `out_dir`, mirroring paths relative to `base`.
+
+    - `fmt`: `md` (all tracks), `html` (primary track) or `files` (a directory
+      of `<track_id>.md` per document)
+    - `workers`: process count (defaults to CPU count); `<= 1` exports in-process
+    - `base`: defaults to the common parent directory of `paths`; pass a fixed
+      directory so the layout does not depend on which sources are present
+    - `force`: export even when the manifest says the outputs are current
+    - `progress`: called as `progress(done, total, source, status)` with status
+      `exported`, `skipped` or `failed`
+    Failures are logged, reported and retried on the next run. Outputs of
+    manifest entries not among `paths` are deleted.
+    """
+    if fmt not in BATCH_FORMATS:
+        raise ValueError(f"unsupported export format: {fmt}")
+    started = time.perf_counter()
+    sources = [Path(p) for p in paths]
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if base is None:
+        base = common_parent(sources)
+    manifest_path = out_dir / BATCH_MANIFEST
+    manifest = load_json_manifest(manifest_path, _MANIFEST_FORMAT, "sources")
+    report = BatchReport()
+    done = 0
+
+    def finish(source: Path, status: str) -> None:
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, len(sources), source, status)
+
+    jobs: List[Tuple[Path, str, Path, Dict[str, Any]]] = []
+    listed = set()
+    for source in sources:
+        key = source.resolve().relative_to(base.resolve()).as_posix()
+        listed.add(key)
+        stat = source.stat()
+        entry = manifest.get(key)
+        fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if entry is not None and not force and entry.get("format") == fmt:
+            unchanged = all(entry.get(k) == v for k, v in fingerprint.items()) or entry.get("source") == file_sha256(source)
+            if unchanged and _outputs_intact(out_dir, entry.get("outputs", {})):
+                entry.update(fingerprint)
+                report.skipped += 1
+                finish(source, "skipped")
+                continue
+        jobs.append((source, key, _target_for(Path(key), out_dir, fmt), fingerprint))
+
+    def completed(source: Path, key: str, fingerprint: Dict[str, Any], outputs: Dict[str, List[Any]]) -> None:
+        manifest[key] = dict(fingerprint, source=file_sha256(source), format=fmt, outputs=outputs)
+        report.exported += 1
+        finish(source, "exported")
+
+    def failed(source: Path, key: str, error: Exception) -> None:
+        logger.warning("export failed for %s: %s", source, error)
+        manifest.pop(key, None)
+        report.failures.append((str(source), str(error)))
+        finish(source, "failed")
+
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    try:
+        if workers <= 1 or len(jobs) <= 1:
+            for source, key, target, fingerprint in jobs:
+                try:
+                    completed(source, key, fingerprint, _export_one(source, out_dir, target, fmt))
+                except Exception as e:
+                    failed(source, key, e)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(_export_one, source, out_dir, target, fmt): (source, key, fingerprint)
+                    for source, key, target, fingerprint in jobs
+                }
+                for future in as_completed(futures):
+                    source, key, fingerprint = futures[future]
+                    try:
+                        completed(source, key, fingerprint, future.result())
+                    except Exception as e:
+                        failed(source, key, e)
+        for key in set(manifest) - listed:
+            _prune(out_dir, manifest.pop(key).get("outputs", {}))
+    finally:
+        write_json_manifest(manifest_path, _MANIFEST_FORMAT, "sources", manifest)
+        report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+"""Block-level incremental Markdown rendering.
+
+`iter_blocks` splits content into top-level blocks at blank lines, without
+cutting inside fenced code (including fences inside list items) or HTML blocks,
+before indented lines, or between items of the same list. The split follows the
+CommonMark block rules closely enough that rendering the blocks one by one
+gives the same HTML as rendering the whole content; trailing blank lines stay
+with the last block, where an unclosed fence would own them. Each block is
+rendered on its own with the shared parser and cached by the hash of its
+source; reference-link definitions from the whole content are collected first
+and injected into the render of every block that may use them, so a block's
+HTML depends only on its source and (when it contains brackets) the document's
+definitions.
+
+`IncrementalRenderer` remembers the block sequence last rendered per key and
+reports which block ranges changed, so a client can patch only those.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from markdown_it.common.html_blocks import block_names
+from markdown_it.common.html_re import HTML_OPEN_CLOSE_TAG_STR
+
+from mdkv.common.cache import LRUCache
+
+from .parse import markdown_parser
+
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+# list markers (possibly nested) before an item's content, and a fence right after them
+_ITEM_PREFIX_RE = re.compile(r"^(?: {0,3}(?:[-*+]|\d{1,9}[.)])[ \t]+)+")
+_ITEM_FENCE_RE = re.compile(_ITEM_PREFIX_RE.pattern + r"(`{3,}|~{3,})")
+# unindented lines that interrupt a paragraph, so they cannot continue a list item lazily
+_LIST_END_RE = re.compile(r"^(?:>|#{1,6}(?:[ \t]|$)| {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$)")
+# headings and thematic breaks: the next line starts a new construct
+_SINGLE_LINE_RE = re.compile(r"^ {0,3}(?:#{1,6}(?:[ \t]|$)|([-*_])(?:[ \t]*\1){2,}[ \t]*$)")
+# list items that may interrupt a paragraph: non-empty, ordered ones starting at 1
+_ITEM_INTERRUPTS_RE = re.compile(r"^ {0,3}(?:[-*+]|1[.)])[ \t]+\S")
+_LIST_RE = re.compile(r"^ {0,3}(?:[-*+]|\d{1,9}[.)])(?:[ \t]|$)")
+_HTML_OPEN = [
+    (re.compile(r"^ {0,3}<(?:script|pre|style|textarea)(?:\s|>|$)", re.I), re.compile(r"</(?:script|pre|style|textarea)>", re.I)),
+    (re.compile(r"^ {0,3}<!--"), re.compile(r"-->")),
+    (re.compile(r"^ {0,3}<\?"), re.compile(r"\?>")),
+    (re.compile(r"^ {0,3}<![A-Za-z]"), re.compile(r">")),
+    (re.compile(r"^ {0,3}<!\[CDATA\["), re.compile(r"\]\]>")),
+]
+# HTML blocks that end at a blank line: block-level tags (may interrupt a
+# paragraph) and a lone open/close tag (only at the start of a block)
+_HTML_BLOCK_TAG_RE = re.compile(r"^ {0,3}</?(?:" + "|".join(block_names) + r")(?=\s|/?>|$)", re.I)
+_HTML_TAG_LINE_RE = re.compile(r"^ {0,3}" + HTML_OPEN_CLOSE_TAG_STR + r"\s*$")
+# a complete, title-less reference definition on one line
+_REF_LINE_RE = re.compile(r"^ {0,3}\[[^\]\n]+\]:[ \t]*\S+[ \t]*$")
+# loose on purpose: a false positive only costs one extra parse
+_REF_DEF_RE = re.compile(r"^[ \t>*+\-\d.)]*\[[^\]\n]+\]:", re.M)
+
+_block_html: "LRUCache[str]" = LRUCache(maxsize=4096)
+_block_refs: "LRUCache[Dict[str, Any]]" = LRUCache(maxsize=1024)
+
+
+def iter_blocks(content: str) -> Iterator[Tuple[int, int]]:
+    """Yield `(start, end)` character spans of the top-level blocks of `content`.
+
+    Spans exclude the blank lines between blocks and the final newline,
+    except blank lines inside a code block opened on a list item's line.
+    """
+    pos = 0
+    start: Optional[int] = None
+    end = 0
+    fence = ""
+    html_end: Optional[re.Pattern] = None
+    html_until_blank = False
+    item_fence = ""
+    item_indent = 0
+    in_list = False
+    list_indent = 0  # content indent of the current list item
+    construct_start = -1  # a line known to start a block-level construct
+    paragraph = False  # the previous line is paragraph text outside a blockquote
+    quoted = False  # inside a blockquote, possibly on lazy continuation lines
+    pending_cut = False
+    length = len(content)
+    while pos < length:
+        newline = content.find("\n", pos)
+        line_start, pos = pos, (length if newline < 0 else newline + 1)
+        text = content[line_start:pos].rstrip("\r\n")
+        if html_until_blank or item_fence or fence or html_end is not None or not text.strip():
+            paragraph = quoted = False
+        if html_until_blank:
+            if text.strip():
+                end = line_start + len(text)
+                continue
+            html_until_blank = False  # the blank line ends the HTML block and this block
+        if item_fence:
+            if not text.strip():
+                # blank lines inside the item's code are part of it
+                pending_cut = start is not None
+                end = line_start + len(text)
+                continue
+            if len(text) - len(text.lstrip(" ")) >= item_indent:
+                m = _FENCE_RE.match(text[item_indent:])
+                if m and m.group(1)[0] == item_fence[0] and len(m.group(1)) >= len(item_fence):
+                    item_fence = ""
+                pending_cut = False
+                end = line_start + len(text)
+                continue
+            # a less indented line ends the item and its code and starts a new construct
+            item_fence = ""
+            in_list = bool(_LIST_RE.match(text))
+            construct_start = line_start
+        if fence or html_end is not None:
+            if fence:
+                m = _FENCE_RE.match(text)
+                if m and m.group(1)[0] == fence[0] and len(m.group(1)) >= len(fence) and not text.strip(" \t`~"):
+                    fence = ""
+            elif html_end.search(text):
+                html_end = None
+            end = line_start + len(text)
+            continue
+        if not text.strip():
+            pending_cut = start is not None
+            continue
+        if pending_cut:
+            pending_cut = False
+            continued = text[0] in " \t" or (in_list and _LIST_RE.match(text))
+            if not continued:
+                yield start, end  # type: ignore[misc]
+                start = None
+        if start is None:
+            start = line_start
+            in_list = False
+        if in_list and _LIST_END_RE.match(text):
+            in_list = False
+        elif _LIST_RE.match(text) and (
+            in_list or not paragraph or line_start in (start, construct_start) or _ITEM_INTERRUPTS_RE.match(text)
+        ):
+            in_list, quoted = True, False
+            prefix = _ITEM_PREFIX_RE.match(text)
+            list_indent = prefix.end() if prefix else len(text) + 1
+        end = line_start + len(text)
+        # only paragraph text restricts which lists may start on the next line:
+        # indented lines continue a paragraph but otherwise are code, and a
+        # blockquote (with its lazy lines) or a reference definition ends at
+        # any list item
+        indent = len(text) - len(text.lstrip(" "))
+        quoted = quoted or (indent < 4 and text.lstrip(" ").startswith(">"))
+        paragraph = (paragraph or (indent < 4 and not _REF_LINE_RE.match(text))) and not quoted
+        if _SINGLE_LINE_RE.match(text):
+            construct_start = pos
+            paragraph = quoted = False
+        # fences inside a list item (on the marker line or indented to its
+        # content) close with the item, not at a blank line
+        m = _ITEM_FENCE_RE.match(text)
+        if m and not (m.group(1)[0] == "`" and "`" in text[m.end():]):
+            item_fence, item_indent = m.group(1), m.start(1)
+            continue
+        nested = in_list and len(text) - len(text.lstrip(" ")) >= list_indent
+        m = _FENCE_RE.match(text[list_indent:] if nested else text)
+        if m and not (m.group(1)[0] == "`" and "`" in text[(list_indent if nested else 0) + m.end():]):
+            if nested:
+                item_fence, item_indent = m.group(1), list_indent
+            else:
+                fence = m.group(1)
+            continue
+        for opener, closer in _HTML_OPEN:
+            if opener.match(text):
+                if not closer.search(text, opener.match(text).end()):
+                    html_end = closer
+                paragraph = quoted = False
+                break
+        else:
+            # fences inside these do not open code blocks
+            html_until_blank = bool(
+                _HTML_BLOCK_TAG_RE.match(text) or (line_start in (start, construct_start) and _HTML_TAG_LINE_RE.match(text))
+            )
+    if start is not None:
+        yield start, end
+
+
+def _line_end(content: str, end: int) -> int:
+    """Extend `end` past the newline terminating its line, if any."""
+    if content.startswith("\r\n", end):
+        return end + 2
+    return end + 1 if content.startswith(("\n", "\r"), end) else end
+
+
+def _block_sources(content: str, spans: Iterable[Tuple[int, int]]) -> Iterator[Tuple[int, int, str]]:
+    """Yield `(start, end, source)` per block; sources keep their terminating newline.
+
+    The last block also keeps the trailing blank lines of `content`: an
+    unclosed fence (possibly inside a list item) runs to the end of the
+    input, so they belong to its code.
+    """
+    previous: Optional[Tuple[int, int]] = None
+    for span in spans:
+        if previous is not None:
+            yield previous[0], previous[1], content[previous[0]:_line_end(content, previous[1])]
+        previous = span
+    if previous is not None:
+        yield previous[0], previous[1], content[previous[0]:]
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _definitions(block: str, digest: str) -> Dict[str, Any]:
+    def collect() -> Dict[str, Any]:
+        env: Dict[str, Any] = {}
+        markdown_parser().parse(block, env)
+        return {label: {"title": ref["title"], "href": ref["href"]} for label, ref in env.get("references", {}).items()}
+    return _block_refs.get_or_create(digest, collect)
+
+
+def _block_key(block: str, digest: str, refs_sig: str) -> str:
+    # only blocks with brackets can use reference definitions
+    return digest + refs_sig if "]" in block else digest
+
+
+def _render_source(block: str, refs: Dict[str, Any]) -> str:
+    parser = markdown_parser()
+    # every definition is already present, so parsing never mutates `refs`
+    env: Dict[str, Any] = {"references": refs} if refs and "]" in block else {}
+    return parser.renderer.render(parser.parse(block, env), parser.options, env)
+
+
+def _collect_definitions(content: str, spans: Iterable[Tuple[int, int]]) -> Tuple[Dict[str, Any], str]:
+    """Return the document's reference definitions (first wins) and their signature."""
+    refs: Dict[str, Any] = {}
+    for _, _, text in _block_sources(content, spans):
+        if _REF_DEF_RE.search(text):
+            for label, ref in _definitions(text, _digest(text)).items():
+                refs.setdefault(label, ref)
+    return refs, (_digest(json.dumps(refs, sort_keys=True)) if refs else "")
+
+
+@dataclass(frozen=True)
+class RenderedBlock:
+    """HTML of the block at `content[start:end]`; `key` identifies source plus definitions."""
+    start: int
+    end: int
+    key: str
+    html: str
+
+
+@dataclass(frozen=True)
+class BlockChange:
+    """Blocks `old_start:old_end` of the previous render were replaced by `new_start:new_end`."""
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+
+
+@dataclass
+class BlockRender:
+    """Result of an incremental render: the full `html`, its blocks and the changed ranges."""
+    html: str
+    blocks: List[RenderedBlock]
+    changes: List[BlockChange]
+
+
+def render_blocks(content: str, previous: Optional[Dict[str, str]] = None) -> List[RenderedBlock]:
+    """Render `content` block by block, reusing cached block HTML.
+
+    `previous` maps block keys to HTML from an earlier render of the same
+    content; it is consulted before the shared cache, so large tracks stay
+    incremental even when they hold more blocks than the cache.
+    """
+    spans = list(iter_blocks(content))
+    refs, refs_sig = _collect_definitions(content, spans)
+    blocks: List[RenderedBlock] = []
+    # blocks keep their terminating newline: HTML blocks and code render it verbatim
+    for start, end, text in _block_sources(content, spans):
+        key = _block_key(text, _digest(text), refs_sig)
+        html = previous.get(key) if previous else None
+        if html is None:
+            html = _block_html.get_or_create(key, lambda: _render_source(text, refs))
+        blocks.append(RenderedBlock(start, end, key, html))
+    return blocks
+
+
+def iter_block_html(content: str) -> Iterator[str]:
+    """Yield the HTML of each block of `content` in order.
+
+    Cached block HTML is used when present but rendered blocks are not
+    added to the HTML cache, so memory beyond `content` itself stays bounded
+    by the largest block (only the reference definitions of blocks that
+    hold some are cached). Used for streaming export.
+    """
+    refs, refs_sig = _collect_definitions(content, iter_blocks(content))
+    for _, _, text in _block_sources(content, iter_blocks(content)):
+        html = _block_html.get(_block_key(text, _digest(text), refs_sig))
+        yield html if html is not None else _render_source(text, refs)
+
+
+class IncrementalRenderer:
+    """Render successive revisions of contents, reporting changed block ranges per key."""
+
+    def __init__(self, maxkeys: int = 64) -> None:
+        self._previous: "LRUCache[List[RenderedBlock]]" = LRUCache(maxsize=maxkeys)
+
+    def render(self, content: str, key: Hashable = None) -> BlockRender:
+        """Render `content`; `changes` are relative to the last render under `key`.
+
+        The first render of a key reports the whole block list as changed.
+        """
+        previous = self._previous.get(key) or []
+        blocks = render_blocks(content, {b.key: b.html for b in previous})
+        matcher = SequenceMatcher(None, [b.key for b in previous], [b.key for b in blocks], autojunk=False)
+        changes = [
+            BlockChange(i1, i2, j1, j2)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+            if tag != "equal"
+        ]
+        self._previous.put(key, blocks)
+        return BlockRender("".join(b.html for b in blocks), blocks, changes)
+
+
+_track_renderer = IncrementalRenderer(maxkeys=128)
+
+
+def render_track_blocks(track_id: str, content: str) -> str:
+    """Render one track's content, reusing the blocks of its previous revision."""
+    return _track_renderer.render(content, key=track_id).html
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+"""Corpus-wide search across many `.mdkv` files.
+
+Files are searched independently (in a process pool when `workers > 1`) and
+results are yielded as each file finishes, so callers can stream them.
+Only tracks passing the type/language filters are decompressed.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mdkv.common.logging import get_logger
+from mdkv.storage.io import load_mdkv
+
+from .search import SearchMatch, search_document
+
+
+logger = get_logger("mdkv.corpus")
+
+
+def _search_file(
+    path: Path,
+    pattern: str,
+    flags: int,
+    track_types: Optional[List[str]],
+    languages: Optional[List[str]],
+) -> List[SearchMatch]:
+    doc = load_mdkv(path, track_types=track_types, languages=languages)
+    return search_document(doc, pattern, flags=flags, track_types=track_types, languages=languages)
+
+
+def search_corpus(
+    paths: Iterable[Path],
+    pattern: str,
+    flags: int = 0,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Tuple[Path, SearchMatch]]:
+    """Yield `(path, match)` for `pattern` across `paths` as files complete.
+
+    - `workers`: process count (defaults to CPU count); `<= 1` searches in-process
+    - `limit`: stop after this many matches and cancel outstanding files
+    Files that fail to load are logged and skipped. With more than one worker,
+    file order in the output is completion order.
+    """
+    types = list(track_types) if track_types else None
+    langs = list(languages) if languages else None
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if limit is not None and limit <= 0:
+        return
+    emitted = 0
+    if workers <= 1:
+        for path in paths:
+            try:
+                matches = _search_file(path, pattern, flags, types, langs)
+            except Exception as e:
+                logger.warning("skipping %s: %s", path, e)
+                continue
+            for match in matches:
+                yield path, match
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
+        return
+
+    pending_paths = iter(paths)
+    in_flight: Dict[Future, Path] = {}
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # keep a bounded window in flight so early termination wastes little work
+        for path in pending_paths:
+            in_flight[executor.submit(_search_file, path, pattern, flags, types, langs)] = path
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    matches = future.result()
+                except Exception as e:
+                    logger.warning("skipping %s: %s", path, e)
+                    matches = []
+                for match in matches:
+                    yield path, match
+                    emitted += 1
+                    if limit is not None and emitted >= limit:
+                        return
+                next_path = next(pending_paths, None)
+                if next_path is not None:
+                    in_flight[executor.submit(_search_file, next_path, pattern, flags, types, langs)] = next_path
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -3,14 +3,26 @@ from __future__ import annotations
 """Export utilities for MDKV documents.
 
 Compose multi-track Markdown or single-track HTML renderings for distribution.
+`write_markdown` and `write_html` stream the same output to a text stream
+without building it in memory.
 """
 
+import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Iterable, List, Optional, TextIO
 
-from markdown_it import MarkdownIt
+from mdkv.common.fs import atomic_write
+from mdkv.core.model import MDKVDocument, Track
 
-from mdkv.core.model import MDKVDocument
+from .blocks import iter_block_html
+from .parse import cached_render, render_track
+
+
+def _track_header(track: Track) -> str:
+    """Return the round-trip comment header for `track`."""
+    return f"<!-- track:{track.track_id} type:{track.track_type} lang:{track.language} -->"
 
 
 def to_markdown(doc: MDKVDocument, include_track_types: List[str] | None = None) -> str:
@@ -20,34 +32,125 @@ def to_markdown(doc: MDKVDocument, include_track_types: List[str] | None = None)
     Each track is prefixed with a lightweight HTML comment header encoding
     metadata for round-trip compatibility.
     """
+    buffer = io.StringIO()
+    write_markdown(doc, buffer, include_track_types)
+    return buffer.getvalue()
+
+
+def write_markdown(doc: MDKVDocument, fp: TextIO, include_track_types: List[str] | None = None) -> None:
+    """Write the `to_markdown` output of `doc` to the text stream `fp`."""
+    include = set(include_track_types) if include_track_types else None
+    fp.write(f"<!-- MDKV: {doc.title} -->")
+    for track in doc.tracks.values():
+        if include is not None and track.track_type not in include:
+            continue
+        fp.write(f"\n\n{_track_header(track)}\n\n")
+        fp.write(track.content)
+
+
+def tracks_to_html(
+    doc: MDKVDocument,
+    track_ids: Optional[Iterable[str]] = None,
+    include_track_types: Optional[Iterable[str]] = None,
+) -> str:
+    """Render the selected tracks of `doc` (all by default) to HTML, in document order.
+
+    The result is the concatenation of cached per-track fragments (see
+    `render_track`). It equals rendering the matching `to_markdown` output as
+    long as no Markdown construct (e.g. an unclosed fence) spans track
+    boundaries.
+    """
+    ids = set(track_ids) if track_ids is not None else None
     include = set(include_track_types) if include_track_types else None
-    parts: List[str] = [f"<!-- MDKV: {doc.title} -->"]
+    parts: List[str] = [f"<!-- MDKV: {doc.title} -->\n"]
     for track in doc.tracks.values():
+        if ids is not None and track.track_id not in ids:
+            continue
         if include is not None and track.track_type not in include:
             continue
-        header = f"\n\n<!-- track:{track.track_id} type:{track.track_type} lang:{track.language} -->\n\n"
-        parts.append(header + track.content)
+        parts.append(f"{_track_header(track)}\n")
+        parts.append(render_track(track))
     return "".join(parts)
 
 
 def to_html(doc: MDKVDocument) -> str:
     """Render HTML for the primary track of `doc`."""
-    md = MarkdownIt()
-    return md.render(to_markdown(doc, include_track_types=["primary"]))
+    return tracks_to_html(doc, include_track_types=["primary"])
 
 
-def export_to_files(doc: MDKVDocument, output_dir: Path, include_track_types: List[str] | None = None) -> None:
-    """Write track contents to individual `.md` files in `output_dir`.
+def write_html(doc: MDKVDocument, fp: TextIO) -> None:
+    """Write the `to_html` output of `doc` to the text stream `fp`, one block at a time.
 
-    Filenames are derived from `track_id`.
+    Cached (or pre-rendered) fragments are reused but not created, so memory
+    use beyond the document stays bounded by the largest Markdown block.
     """
-    output_dir.mkdir(parents=True, exist_ok=True)
-    include = set(include_track_types) if include_track_types else None
+    fp.write(f"<!-- MDKV: {doc.title} -->\n")
     for track in doc.tracks.values():
-        if include is not None and track.track_type not in include:
+        if track.track_type != "primary":
+            continue
+        fp.write(f"{_track_header(track)}\n")
+        cached = cached_render(track)
+        if cached is not None:
+            fp.write(cached)
             continue
-        # write each track content to a file named after track_id with .md extension
-        out = output_dir / f"{track.track_id}.md"
-        out.write_text(track.content, encoding="utf-8")
+        for html in iter_block_html(track.content):
+            fp.write(html)
+
+
+@dataclass
+class FileExportReport:
+    """Counts of track files written, skipped (already identical) and pruned by `export_to_files`."""
+    written: int = 0
+    skipped: int = 0
+    deleted: int = 0
+
 
+def _write_track_file(path: Path, data: bytes) -> bool:
+    """Write `data` to `path` atomically unless the file already holds exactly `data`."""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    with atomic_write(path, "wb") as f:
+        f.write(data)
+    return True
 
+
+def export_to_files(
+    doc: MDKVDocument,
+    output_dir: Path,
+    include_track_types: List[str] | None = None,
+    prune: bool = False,
+    workers: Optional[int] = None,
+) -> FileExportReport:
+    """Write track contents to individual `.md` files in `output_dir`.
+
+    Filenames are derived from `track_id`. Files whose bytes already match
+    are left untouched (no mtime change); others are written via a temporary
+    file and atomic rename on a thread pool of `workers` threads. With
+    `prune`, other `.md` files in `output_dir` (e.g. from removed tracks)
+    are deleted.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    include = set(include_track_types) if include_track_types else None
+    jobs = [
+        (output_dir / f"{track.track_id}.md", track.content.encode("utf-8"))
+        for track in doc.tracks.values()
+        if include is None or track.track_type in include
+    ]
+    report = FileExportReport()
+    if len(jobs) > 1 and workers != 1:
+        with ThreadPoolExecutor(max_workers=workers or min(8, len(jobs))) as executor:
+            results = list(executor.map(lambda job: _write_track_file(*job), jobs))
+    else:
+        results = [_write_track_file(path, data) for path, data in jobs]
+    report.written = sum(results)
+    report.skipped = len(results) - report.written
+    if prune:
+        keep = {path.name for path, _ in jobs}
+        for stale in output_dir.glob("*.md"):
+            if stale.name not in keep:
+                stale.unlink()
+                report.deleted += 1
+    return report
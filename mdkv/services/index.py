@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+"""Tokenized inverted full-text index for MDKV documents.
+
+The index maps each term to its occurrences per track (token position plus
+character span), so term and phrase queries avoid rescanning track content.
+Postings are stored per track together with the track's content hash; a track
+whose content changed since indexing is re-tokenized on the fly, so a stale
+index degrades to a scan of the changed tracks instead of wrong answers.
+
+An index can be stored inside the `.mdkv` archive (see
+`save_mdkv(..., build_index=True)` and `load_index`), and per-track postings
+can be shared across documents and runs through an `IndexCache`.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mdkv.core.model import MDKVDocument, Track
+
+from .search import SearchMatch, _extract, search_document
+
+if TYPE_CHECKING:
+    from .index_cache import IndexCache
+
+
+INDEX_ENTRY = "index/fulltext.json"
+INDEX_FORMAT = 1
+
+_TOKEN_RE = re.compile(r"\w+")
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield `(term, start, end)` for each word token in `text`.
+
+    Terms are case-folded; spans refer to the original text.
+    """
+    for m in _TOKEN_RE.finditer(text):
+        yield m.group().casefold(), m.start(), m.end()
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """Split `query` into phrases; quoted text is one phrase, other words are single terms."""
+    phrases: List[List[str]] = []
+    for m in _QUERY_RE.finditer(query):
+        text = m.group(1) if m.group(1) is not None else m.group(2)
+        terms = [term for term, _, _ in tokenize(text)]
+        if terms:
+            phrases.append(terms)
+    return phrases
+
+
+@dataclass
+class TrackPostings:
+    """Postings of one track: term → flat `[position, start, end, ...]` list."""
+    content_hash: str
+    terms: Dict[str, List[int]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, track: Track) -> "TrackPostings":
+        terms: Dict[str, List[int]] = {}
+        for position, (term, start, end) in enumerate(tokenize(track.content)):
+            terms.setdefault(term, []).extend((position, start, end))
+        return cls(content_hash=track.content_hash, terms=terms)
+
+    def occurrences(self, term: str) -> Dict[int, Tuple[int, int]]:
+        """Return `{position: (start, end)}` for `term`."""
+        flat = self.terms.get(term, [])
+        return {flat[i]: (flat[i + 1], flat[i + 2]) for i in range(0, len(flat), 3)}
+
+    def find_phrase(self, phrase: List[str]) -> List[Tuple[int, int]]:
+        """Return character spans of consecutive occurrences of `phrase`."""
+        first = self.occurrences(phrase[0])
+        if len(phrase) == 1:
+            return sorted(first.values())
+        rest = [self.occurrences(term) for term in phrase[1:]]
+        spans: List[Tuple[int, int]] = []
+        for position, (start, _) in sorted(first.items()):
+            if all(position + offset in occ for offset, occ in enumerate(rest, start=1)):
+                spans.append((start, rest[-1][position + len(rest)][1]))
+        return spans
+
+
+class FullTextIndex:
+    """Per-track inverted index over a document's tracks.
+
+    With a `cache`, stale or missing track postings are read from (and
+    written to) the on-disk `IndexCache` before falling back to tokenizing.
+    """
+
+    def __init__(
+        self,
+        tracks: Optional[Dict[str, TrackPostings]] = None,
+        cache: Optional["IndexCache"] = None,
+    ) -> None:
+        self.tracks: Dict[str, TrackPostings] = dict(tracks or {})
+        self.cache = cache
+
+    @classmethod
+    def build(cls, doc: MDKVDocument, cache: Optional["IndexCache"] = None) -> "FullTextIndex":
+        """Index every track of `doc`."""
+        index = cls(cache=cache)
+        for track in doc.tracks.values():
+            index.postings_for(track)
+        return index
+
+    def postings_for(self, track: Track) -> TrackPostings:
+        """Return up-to-date postings for `track`, re-indexing it if stale."""
+        postings = self.tracks.get(track.track_id)
+        if postings is None or postings.content_hash != track.content_hash:
+            postings = self._load_or_build(track)
+            self.tracks[track.track_id] = postings
+        return postings
+
+    def _load_or_build(self, track: Track) -> TrackPostings:
+        if self.cache is None:
+            return TrackPostings.build(track)
+        kind = f"fulltext-{INDEX_FORMAT}"
+        data = self.cache.get(kind, track.content_hash)
+        if data is not None:
+            return TrackPostings(content_hash=track.content_hash, terms=data["terms"])
+        postings = TrackPostings.build(track)
+        self.cache.put(kind, track.content_hash, {"terms": postings.terms})
+        return postings
+
+    def search(
+        self,
+        doc: MDKVDocument,
+        query: str,
+        track_types: Optional[Iterable[str]] = None,
+        languages: Optional[Iterable[str]] = None,
+    ) -> List[SearchMatch]:
+        """Return matches for every term/phrase of `query` in tracks containing all of them.
+
+        Quoted text is matched as a phrase; matching is case-insensitive.
+        Results follow document track order, then position.
+        """
+        phrases = parse_query(query)
+        if not phrases:
+            return []
+        allowed_types = set(track_types) if track_types else None
+        allowed_langs = set(languages) if languages else None
+        results: List[SearchMatch] = []
+        for track_id, track in doc.tracks.items():
+            if allowed_types is not None and track.track_type not in allowed_types:
+                continue
+            if allowed_langs is not None and track.language not in allowed_langs:
+                continue
+            postings = self.postings_for(track)
+            spans: List[Tuple[int, int]] = []
+            for phrase in phrases:
+                found = postings.find_phrase(phrase)
+                if not found:
+                    break
+                spans.extend(found)
+            else:
+                for start, end in sorted(spans):
+                    extract = _extract(track.content, start, end)
+                    results.append(SearchMatch(track_id=track_id, start=start, end=end, extract=extract))
+        return results
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": INDEX_FORMAT,
+            "tracks": {
+                tid: {"content_hash": p.content_hash, "terms": p.terms}
+                for tid, p in self.tracks.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FullTextIndex":
+        if data.get("format") != INDEX_FORMAT:
+            return cls()
+        return cls({
+            tid: TrackPostings(content_hash=p["content_hash"], terms=p["terms"])
+            for tid, p in data.get("tracks", {}).items()
+        })
+
+    def dumps(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"), ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, text: str) -> "FullTextIndex":
+        return cls.from_dict(json.loads(text))
+
+
+def query_document(
+    doc: MDKVDocument,
+    query: str,
+    index: Optional[FullTextIndex] = None,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+    raw: bool = False,
+    flags: int = 0,
+) -> List[SearchMatch]:
+    """Search `doc` with `query`, using `index` for term/phrase queries.
+
+    With `raw=True`, `query` is a regular expression and the regex scan of
+    `search_document` is used instead. Without an `index`, one is built on the
+    fly for the selected tracks.
+    """
+    if raw:
+        return search_document(doc, query, flags=flags, track_types=track_types, languages=languages)
+    index = index if index is not None else FullTextIndex()
+    return index.search(doc, query, track_types=track_types, languages=languages)
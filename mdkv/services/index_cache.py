@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+"""On-disk cache of per-track index segments keyed by content hash.
+
+Full-text postings, trigram postings and BM25 statistics are all derived from
+a single track's content. `IndexCache` stores each such segment as a gzip JSON
+file under `<directory>/<kind>/<hash[:2]>/<key>.json.gz`, so opening a
+document reuses segments of unchanged tracks and only re-indexes modified
+ones. The cache is bounded by total size; the least recently used segments
+(by file mtime, refreshed on every hit) are evicted first.
+
+The directory defaults to `$MDKV_CACHE_DIR`, else `$XDG_CACHE_HOME/mdkv`, else
+`~/.cache/mdkv`.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from mdkv.common.logging import get_logger
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_SUFFIX = ".json.gz"
+
+log = get_logger("mdkv.index_cache")
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory from the environment (see module docstring)."""
+    explicit = os.environ.get("MDKV_CACHE_DIR")
+    if explicit:
+        return Path(explicit).expanduser()
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base).expanduser() if base else Path.home() / ".cache") / "mdkv"
+
+
+class IndexCache:
+    """Size-bounded directory of index segments.
+
+    `kind` names the index type and format (e.g. `"fulltext-1"`); `key` is
+    the track content hash, optionally suffixed with build parameters.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.directory / kind / key[:2] / (key + _SUFFIX)
+
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored segment, or None on a miss or unreadable file."""
+        path = self._path(kind, key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            log.warning("Discarding unreadable index segment %s: %s", path, e)
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, kind: str, key: str, data: Dict[str, Any]) -> None:
+        """Store a segment atomically, then evict old segments if over budget."""
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=1) as f:
+                f.write(json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("Could not write index segment %s: %s", path, e)
+            Path(tmp).unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += path.stat().st_size
+            over = self._size is None or self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*/*/*" + _SUFFIX):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        """Return the total size in bytes of stored segments."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Delete least recently used segments until under `max_bytes`; return the count removed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in entries:
+                if total <= limit:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            self._size = total
+        return removed
+
+    def clear(self) -> None:
+        """Remove every stored segment."""
+        with self._lock:
+            for _, _, path in self._entries():
+                path.unlink(missing_ok=True)
+            self._size = 0
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+"""Line/column and heading context for offsets within track content.
+
+`LineIndex` stores line-start offsets and ATX headings (outside fenced code)
+for one content revision; lookups are `bisect` over those arrays. Indexes are
+cached by track content hash, so repeated searches do not rebuild them.
+"""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Tuple
+
+from mdkv.common.cache import LRUCache
+from mdkv.core.model import MDKVDocument, Track
+
+from .search import SearchMatch
+
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_ATX_RE = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_line_indexes: "LRUCache[LineIndex]" = LRUCache(maxsize=128)
+
+
+@dataclass
+class ContextMatch(SearchMatch):
+    """A `SearchMatch` with 1-based `line`/`column` and the enclosing `heading_path`."""
+    __slots__ = ("line", "column", "heading_path")
+    line: int
+    column: int
+    heading_path: Tuple[str, ...]
+
+
+class LineIndex:
+    """Line starts and heading outline of one content string."""
+
+    def __init__(self, content: str) -> None:
+        self.line_starts: List[int] = [0]
+        self.heading_offsets: List[int] = []
+        self.heading_paths: List[Tuple[str, ...]] = []
+        stack: List[Tuple[int, str]] = []
+        fence = ""
+        offset = 0
+        lines = content.split("\n")
+        for number, line in enumerate(lines):
+            fence_match = _FENCE_RE.match(line)
+            if fence:
+                if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+                    fence = ""
+            elif fence_match:
+                fence = fence_match.group(1)
+            else:
+                heading = _ATX_RE.match(line.rstrip("\r"))
+                if heading:
+                    level = len(heading.group(1))
+                    while stack and stack[-1][0] >= level:
+                        stack.pop()
+                    stack.append((level, (heading.group(2) or "").strip()))
+                    self.heading_offsets.append(offset)
+                    self.heading_paths.append(tuple(title for _, title in stack))
+            offset += len(line) + 1
+            if number < len(lines) - 1:
+                self.line_starts.append(offset)
+
+    def locate(self, offset: int) -> Tuple[int, int]:
+        """Return 1-based `(line, column)` of character `offset`."""
+        line = bisect_right(self.line_starts, offset) - 1
+        return line + 1, offset - self.line_starts[line] + 1
+
+    def heading_path(self, offset: int) -> Tuple[str, ...]:
+        """Return titles of the headings enclosing `offset`, outermost first."""
+        idx = bisect_right(self.heading_offsets, offset) - 1
+        return self.heading_paths[idx] if idx >= 0 else ()
+
+
+def line_index_for(track: Track) -> LineIndex:
+    """Return the cached `LineIndex` for the current content of `track`."""
+    content = track.content
+    return _line_indexes.get_or_create(track.content_hash, lambda: LineIndex(content))
+
+
+def snap_extract(content: str, start: int, end: int, window: int = 20, snap_words: bool = True) -> str:
+    """Return `content[start:end]` with up to `window` characters of context per side.
+
+    With `snap_words`, the context is trimmed so it does not cut words in half.
+    """
+    lo = max(0, start - window)
+    hi = min(len(content), end + window)
+    if snap_words:
+        while lo < start and lo > 0 and content[lo - 1].isalnum() and content[lo].isalnum():
+            lo += 1
+        while hi > end and hi < len(content) and content[hi - 1].isalnum() and content[hi].isalnum():
+            hi -= 1
+    return content[lo:hi]
+
+
+def add_context(
+    doc: MDKVDocument,
+    matches: Iterable[SearchMatch],
+    window: int = 20,
+    snap_words: bool = True,
+) -> Iterator[ContextMatch]:
+    """Yield `matches` as `ContextMatch` with line, column, heading path and a new extract.
+
+    Works on the output of any search mode; `doc` must hold the searched tracks.
+    """
+    for m in matches:
+        track = doc.tracks[m.track_id]
+        index = line_index_for(track)
+        line, column = index.locate(m.start)
+        yield ContextMatch(
+            track_id=m.track_id,
+            start=m.start,
+            end=m.end,
+            extract=snap_extract(track.content, m.start, m.end, window, snap_words),
+            line=line,
+            column=column,
+            heading_path=index.heading_path(m.start),
+        )
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+"""Offline checker for links between tracks, anchors and documents.
+
+Each track gets a `TrackLinks` index, cached by content hash: the anchors it
+defines (GitHub-style heading slugs, with `-1`, `-2`, ... for repeats, plus
+`id`/`name` attributes in inline HTML) and the link targets it contains,
+taken from the shared parse. Checking a document is then one dict lookup per
+link, so an edit only re-indexes the edited track.
+
+Targets are resolved as follows; external URLs and other relative paths are
+not checked:
+
+- `#anchor`: a heading of the same track
+- `notes.md`, `notes.md#anchor`: another track, by path relative to the
+  linking track's path (`tracks/`)
+- `other.mdkv`, `other.mdkv#anchor`, `other.mdkv/tracks/notes.md#anchor`:
+  another container relative to this one's directory; the anchor is looked up
+  in its primary track unless a track path is given (corpus mode only)
+"""
+
+import posixpath
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from mdkv.common.cache import LRUCache
+from mdkv.common.logging import get_logger
+from mdkv.core.model import Track
+from mdkv.core.validate import ValidationIssue
+from mdkv.storage.io import load_mdkv
+
+from .lines import line_index_for
+from .parse import parse_track
+
+
+_HTML_ID_RE = re.compile(r"""<[A-Za-z][^>]*?\s(?:id|name)\s*=\s*["']([^"']+)["']""")
+_SLUG_DROP_RE = re.compile(r"[^\w\- ]")
+_track_links: "LRUCache[TrackLinks]" = LRUCache(maxsize=4096)
+
+logger = get_logger("mdkv.links")
+
+
+def slugify(text: str) -> str:
+    """Return the GitHub-style anchor slug of heading `text`."""
+    return _SLUG_DROP_RE.sub("", text.strip().lower()).replace(" ", "-")
+
+
+@dataclass(frozen=True)
+class LinkTarget:
+    """A checkable link at `offset`: `kind` is `anchor`, `track` or `container`.
+
+    `path` is the resolved track path (`track`) or the container path plus an
+    optional track path (`container`).
+    """
+    offset: int
+    href: str
+    kind: str
+    path: str
+    anchor: str
+    track_path: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class TrackLinks:
+    """Anchors defined by one content revision and its checkable links."""
+    anchors: FrozenSet[str]
+    links: Tuple[LinkTarget, ...]
+
+
+def _target(offset: int, href: str, base: str) -> Optional[LinkTarget]:
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc:
+        return None
+    path, anchor = unquote(parts.path), unquote(parts.fragment)
+    container = path.find(".mdkv")
+    if container >= 0 and path[container + 5:container + 6] in ("", "/"):
+        return LinkTarget(offset, href, "container", path[:container + 5], anchor, path[container + 6:] or None)
+    if not path:
+        return LinkTarget(offset, href, "anchor", "", anchor) if anchor else None
+    if path.endswith(".md"):
+        return LinkTarget(offset, href, "track", posixpath.normpath(posixpath.join(base, path)), anchor)
+    return None
+
+
+def _build(track: Track) -> TrackLinks:
+    parsed = parse_track(track)
+    anchors = set(_HTML_ID_RE.findall(track.content))
+    seen: Dict[str, int] = {}
+    tokens = parsed.tokens
+    for i, token in enumerate(tokens):
+        if token.type != "heading_open" or i + 1 >= len(tokens):
+            continue
+        inline = tokens[i + 1]
+        text = "".join(c.content for c in inline.children or () if c.type in ("text", "code_inline"))
+        slug = slugify(text)
+        count = seen.get(slug, 0)
+        seen[slug] = count + 1
+        anchors.add(slug if count == 0 else f"{slug}-{count}")
+    base = posixpath.dirname(track.path)
+    links = (_target(s.start, s.info, base) for s in parsed.segments if s.kind == "link")
+    return TrackLinks(frozenset(anchors), tuple(link for link in links if link is not None))
+
+
+def links_for(track: Track) -> TrackLinks:
+    """Return the cached `TrackLinks` of `track`'s current content and directory."""
+    key = (track.content_hash, posixpath.dirname(track.path))
+    return _track_links.get_or_create(key, lambda: _build(track))
+
+
+@dataclass(frozen=True)
+class CrossLink:
+    """A link from `track_id` (at `line`) to `container`, resolved in corpus mode."""
+    track_id: str
+    entry: str
+    line: int
+    href: str
+    container: str
+    track_path: Optional[str]
+    anchor: str
+
+
+def _issue(track: Track, offset: int, href: str, reason: str) -> ValidationIssue:
+    line, _ = line_index_for(track).locate(offset)
+    return ValidationIssue("WARN", f"broken link '{href}' (line {line}): {reason}", track_id=track.track_id, entry=track.path)
+
+
+def check_links(doc, cross_links: Optional[List[CrossLink]] = None) -> List[ValidationIssue]:
+    """Return a WARN issue for every broken intra-document link or anchor in `doc`.
+
+    Links to other containers are skipped, or appended to `cross_links` for
+    `check_corpus_links` when a list is given. Usable as a document rule of
+    `IncrementalValidator`.
+    """
+    by_path = {t.path: t for t in doc.tracks.values()}
+    issues: List[ValidationIssue] = []
+    for track in doc.tracks.values():
+        indexed = links_for(track)
+        for link in indexed.links:
+            if link.kind == "anchor":
+                if link.anchor not in indexed.anchors:
+                    issues.append(_issue(track, link.offset, link.href, f"no anchor '{link.anchor}' in {track.path}"))
+            elif link.kind == "track":
+                target = by_path.get(link.path)
+                if target is None:
+                    issues.append(_issue(track, link.offset, link.href, f"no track at {link.path}"))
+                elif link.anchor and link.anchor not in links_for(target).anchors:
+                    issues.append(_issue(track, link.offset, link.href, f"no anchor '{link.anchor}' in {target.path}"))
+            elif cross_links is not None:
+                line, _ = line_index_for(track).locate(link.offset)
+                cross_links.append(CrossLink(
+                    track.track_id, track.path, line, link.href, link.path, link.track_path, link.anchor,
+                ))
+    return issues
+
+
+def check_corpus_links(paths: Iterable[Path]) -> Iterator[Tuple[Path, List[ValidationIssue]]]:
+    """Check intra- and cross-document links across `paths`; yield `(path, issues)` in input order.
+
+    Every container is loaded once. Only the anchors of each track are kept
+    until cross-document links are resolved at the end, so memory does not
+    grow with content size. Links to containers outside `paths` only check
+    that the file exists.
+    """
+    results: Dict[Path, List[ValidationIssue]] = {}
+    order: List[Path] = []
+    anchors: Dict[Path, Dict[str, FrozenSet[str]]] = {}
+    primary: Dict[Path, Optional[str]] = {}
+    pending: List[Tuple[Path, CrossLink]] = []
+    for path in paths:
+        key = Path(path).resolve()
+        order.append(Path(path))
+        try:
+            doc = load_mdkv(path)
+        except Exception as e:
+            logger.warning("skipping %s: %s", path, e)
+            results[key] = [ValidationIssue("ERROR", f"cannot load container: {e}")]
+            continue
+        cross: List[CrossLink] = []
+        results[key] = check_links(doc, cross)
+        anchors[key] = {t.path: links_for(t).anchors for t in doc.tracks.values()}
+        primary[key] = next((t.path for t in doc.tracks.values() if t.track_type == "primary"), None)
+        pending.extend((key, link) for link in cross)
+    for source, link in pending:
+        target = (source.parent / link.container).resolve()
+        reason: Optional[str] = None
+        if target not in anchors:
+            if not target.is_file():
+                reason = f"no container at {link.container}"
+        else:
+            track_path = link.track_path or primary[target]
+            if track_path not in anchors[target]:
+                reason = f"no track at {link.track_path or 'primary'} in {link.container}"
+            elif link.anchor and link.anchor not in anchors[target][track_path]:
+                reason = f"no anchor '{link.anchor}' in {link.container}/{track_path}"
+        if reason is not None:
+            results[source].append(ValidationIssue(
+                "WARN", f"broken link '{link.href}' (line {link.line}): {reason}",
+                track_id=link.track_id, entry=link.entry,
+            ))
+    for path in order:
+        yield path, results[path.resolve()]
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+"""Import multi-track Markdown produced by `to_markdown`/`write_markdown`.
+
+The export layout is a `<!-- MDKV: title -->` line followed, per track, by a
+blank line, a `<!-- track:ID type:TYPE lang:LANG -->` header, a blank line
+and the track content. The importer reads the input in fixed-size chunks in a
+single pass and only carries over a possible partial header line, so memory
+stays bounded when writing straight to a container with `import_markdown`.
+Text before the first header becomes a `primary` track, so plain Markdown
+files import as single-track documents.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple, Union, cast
+
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.storage.io import ContainerWriter
+
+
+_TITLE_RE = re.compile(r"^<!-- MDKV: (.*) -->$")
+_HEADER_RE = re.compile(r"^<!-- track:(\S+) type:(\S+) lang:(\S+) -->$")
+_HEADER_PREFIX = "<!-- track:"
+_MAX_HEADER = 4096
+_CHUNK_CHARS = 1 << 16
+
+
+@dataclass(frozen=True)
+class TrackHeader:
+    track_id: str
+    track_type: str
+    language: Optional[str]
+
+
+Event = Tuple[str, Union[str, TrackHeader]]
+
+
+def iter_markdown_events(stream: TextIO) -> Iterator[Event]:
+    """Yield `("title", str)`, `("track", TrackHeader)` and `("text", chunk)` events.
+
+    `stream` is read in 64 KiB chunks. Header lines are found with `str.find`
+    inside each chunk, and only a short tail (a possible partial header line
+    and the two newlines before it) is carried over to the next chunk.
+    """
+    buf = ""
+    line_start = True  # buf[0] begins a line
+    eof = False
+    first_line = True
+    started = False  # inside a track
+    skip_blank = False  # drop the blank line that follows a header
+
+    def emit(text: str) -> Iterator[Event]:
+        nonlocal started
+        if not started:
+            text = text.lstrip("\n")
+            if not text.strip():
+                return
+            yield "track", TrackHeader("primary", "primary", None)
+            started = True
+        if text:
+            yield "text", text
+
+    while not eof:
+        chunk = stream.read(_CHUNK_CHARS)
+        eof = not chunk
+        buf += chunk
+        if first_line:
+            newline = buf.find("\n")
+            if newline < 0 and not eof:
+                continue
+            first_line = False
+            title = _TITLE_RE.match((buf if newline < 0 else buf[:newline]).rstrip("\r"))
+            if title:
+                yield "title", title.group(1)
+                buf = "" if newline < 0 else buf[newline + 1:]
+        pos = 0
+        while True:
+            if skip_blank:
+                if pos >= len(buf) and not eof:
+                    break
+                skip_blank = False
+                if buf.startswith("\n", pos):
+                    pos += 1
+            header, line_end = _next_header(buf, pos, line_start, eof)
+            if header is None:
+                break
+            text = buf[pos:line_end[0]]
+            cut = len(text)
+            for _ in range(2):
+                if cut and text[cut - 1] == "\n":
+                    cut -= 1
+            yield from emit(text[:cut])
+            yield "track", header
+            started, skip_blank = True, True
+            pos = line_end[1]
+        if eof:
+            if not skip_blank:
+                yield from emit(buf[pos:])
+            break
+        # carry over a possible partial header line plus the two newlines before it
+        last_newline = buf.rfind("\n", pos)
+        tail = buf[last_newline + 1:]
+        if skip_blank:
+            keep = pos
+        elif tail and (len(tail) > _MAX_HEADER or not _HEADER_PREFIX.startswith(tail[:len(_HEADER_PREFIX)])):
+            keep = len(buf)
+        else:
+            keep = max(pos, last_newline - 1)
+        yield from emit(buf[pos:keep])
+        if keep:
+            line_start = buf[keep - 1] == "\n"
+        buf = buf[keep:]
+
+
+def _next_header(buf: str, pos: int, line_start: bool, eof: bool) -> Tuple[Optional[TrackHeader], Tuple[int, int]]:
+    """Find the next complete header line in `buf[pos:]`; return it and its `(start, after)` span."""
+    i = buf.find(_HEADER_PREFIX, pos)
+    while i >= 0:
+        if (i > 0 and buf[i - 1] == "\n") or (i == 0 and line_start):
+            end = buf.find("\n", i)
+            if end < 0 and not eof:
+                break
+            line = buf[i:] if end < 0 else buf[i:end]
+            m = _HEADER_RE.match(line.rstrip("\r"))
+            if m:
+                track_id, track_type, lang = m.groups()
+                after = len(buf) if end < 0 else end + 1
+                return TrackHeader(track_id, track_type, None if lang == "None" else lang), (i, after)
+        i = buf.find(_HEADER_PREFIX, i + 1)
+    return None, (0, 0)
+
+
+def from_markdown(
+    stream: TextIO,
+    authors: Iterable[str] = (),
+    created: Optional[datetime] = None,
+    title: Optional[str] = None,
+) -> MDKVDocument:
+    """Rebuild an `MDKVDocument` from exported multi-track Markdown.
+
+    `title` overrides the title line of the input (required if it has none).
+    Raises `ValueError` on duplicate track ids.
+    """
+    doc = MDKVDocument(title=title or "", authors=list(authors), created=created or datetime.utcnow())
+    header: Optional[TrackHeader] = None
+    parts: List[str] = []
+
+    def flush() -> None:
+        if header is not None:
+            path = f"tracks/{header.track_id}.md"
+            doc.add_track(Track(header.track_id, header.track_type, header.language, path, "".join(parts)))
+
+    for kind, value in iter_markdown_events(stream):
+        if kind == "title":
+            doc.title = title or str(value)
+        elif kind == "track":
+            flush()
+            header, parts = cast(TrackHeader, value), []
+        else:
+            parts.append(str(value))
+    flush()
+    return doc
+
+
+def import_markdown(
+    stream: TextIO,
+    output_path: Path,
+    authors: Iterable[str] = (),
+    created: Optional[datetime] = None,
+    title: Optional[str] = None,
+) -> int:
+    """Stream exported multi-track Markdown straight into a container at `output_path`.
+
+    Track contents are never held in memory as a whole. Returns the number of
+    tracks written.
+    """
+    events = iter_markdown_events(stream)
+    doc_title = title
+    first = next(events, None)
+    if first is not None and first[0] == "title":
+        doc_title = title or str(first[1])
+        first = next(events, None)
+    with ContainerWriter(Path(output_path), title=doc_title or "", authors=authors, created=created) as writer:
+        fp: Optional[TextIO] = None
+        event = first
+        while event is not None:
+            kind, value = event
+            if kind == "track":
+                if fp is not None:
+                    fp.close()
+                track = cast(TrackHeader, value)
+                fp = writer.open_track(track.track_id, track.track_type, track.language)
+            elif fp is not None:
+                fp.write(str(value))
+            event = next(events, None)
+        if fp is not None:
+            fp.close()
+        return len(writer.tracks)
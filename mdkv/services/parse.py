@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+"""Shared Markdown parser and parse cache.
+
+A single `MarkdownIt` instance is reused across the package, and parsed token
+streams are cached by content hash, so search and export parse each track
+revision once. `ParsedContent.segments` maps Markdown elements (headings,
+paragraphs, code, links, ...) back to source character offsets, and rendered
+HTML fragments are cached per content hash by `render_track` (and seeded from
+containers that store pre-rendered HTML).
+"""
+
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List, Optional, Tuple
+from urllib.parse import unquote
+
+from markdown_it import MarkdownIt
+from markdown_it.token import Token
+
+from mdkv.common.cache import LRUCache
+from mdkv.core.model import Track, content_hash
+
+
+ELEMENT_KINDS = ("heading", "paragraph", "code", "html", "link", "image")
+
+_parser = MarkdownIt()
+_parses: "LRUCache[ParsedContent]" = LRUCache(maxsize=64)
+_renders: "LRUCache[str]" = LRUCache(maxsize=256)
+
+
+def markdown_parser() -> MarkdownIt:
+    """Return the shared `MarkdownIt` instance (CommonMark preset)."""
+    return _parser
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A Markdown element located at `content[start:end]`.
+
+    `info` carries the fence language for `code` and the target URL for
+    `link`/`image`.
+    """
+    kind: str
+    start: int
+    end: int
+    info: str = ""
+
+
+class ParsedContent:
+    """Token stream of one content string plus derived element segments."""
+
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.tokens: List[Token] = _parser.parse(content)
+
+    @cached_property
+    def line_starts(self) -> List[int]:
+        return [0] + [m.end() for m in re.finditer("\n", self.content)]
+
+    def line_span(self, first: int, last: int) -> Tuple[int, int]:
+        """Character span of source lines `[first, last)` without the final newline."""
+        starts = self.line_starts
+        start = starts[first] if first < len(starts) else len(self.content)
+        end = starts[last] if last < len(starts) else len(self.content)
+        if end > start and self.content[end - 1] == "\n":
+            end -= 1
+        return start, end
+
+    @cached_property
+    def segments(self) -> List[Segment]:
+        """Element segments in document order."""
+        content = self.content
+        segments: List[Segment] = []
+        heading_open = False
+        for token in self.tokens:
+            if token.type == "heading_open":
+                heading_open = True
+                continue
+            if token.type == "inline" and token.map:
+                start, end = self.line_span(*token.map)
+                if heading_open:
+                    found = content.find(token.content, start, end) if token.content else -1
+                    if found >= 0:
+                        start, end = found, found + len(token.content)
+                    segments.append(Segment("heading", start, end))
+                else:
+                    segments.append(Segment("paragraph", start, end))
+                segments.extend(self._inline_targets(token, start, end))
+                heading_open = False
+            elif token.type == "fence" and token.map:
+                first, last = token.map
+                closed = last - first >= 2 and content[slice(*self.line_span(last - 1, last))].strip().startswith(token.markup)
+                start, end = self.line_span(first + 1, last - 1 if closed else last)
+                segments.append(Segment("code", start, max(start, end), token.info.strip()))
+            elif token.type == "code_block" and token.map:
+                segments.append(Segment("code", *self.line_span(*token.map)))
+            elif token.type == "html_block" and token.map:
+                segments.append(Segment("html", *self.line_span(*token.map)))
+        return segments
+
+    def _inline_targets(self, inline: Token, start: int, end: int) -> List[Segment]:
+        targets: List[Segment] = []
+        cursor = start
+        for child in inline.children or []:
+            if child.type == "link_open":
+                kind, url = "link", str(child.attrGet("href") or "")
+            elif child.type == "image":
+                kind, url = "image", str(child.attrGet("src") or "")
+            else:
+                continue
+            if not url:
+                continue
+            span = self._find_url(url, cursor, end)
+            if span is None:
+                continue
+            if span[0] >= start:
+                cursor = span[1]
+            targets.append(Segment(kind, span[0], span[1], url))
+        return targets
+
+    def _find_url(self, url: str, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """Locate `url` (or its unescaped form) in the block, else anywhere (reference links)."""
+        for candidate in dict.fromkeys((url, unquote(url))):
+            found = self.content.find(candidate, start, end)
+            if found < 0:
+                found = self.content.find(candidate)
+            if found >= 0:
+                return found, found + len(candidate)
+        return None
+
+
+def parse_content(content: str) -> ParsedContent:
+    """Return the cached parse of `content`."""
+    return _parses.get_or_create(content_hash(content), lambda: ParsedContent(content))
+
+
+def parse_track(track: Track) -> ParsedContent:
+    """Return the cached parse of `track`'s current content (uses its memoized hash)."""
+    content = track.content
+    return _parses.get_or_create(track.content_hash, lambda: ParsedContent(content))
+
+
+def render_tokens(parsed: ParsedContent) -> str:
+    """Render a cached token stream to HTML with the shared parser."""
+    return _parser.renderer.render(parsed.tokens, _parser.options, {})
+
+
+def prime_render(digest: str, html: str) -> None:
+    """Seed the render cache with `html` rendered from content whose hash is `digest`."""
+    _renders.put(digest, html)
+
+
+def cached_render(track: Track) -> Optional[str]:
+    """Return `track`'s cached HTML fragment without rendering, or None."""
+    return _renders.get(track.content_hash)
+
+
+def render_track(track: Track) -> str:
+    """Return the cached HTML fragment for `track`'s current content.
+
+    On a miss the track is rendered block by block (see `mdkv.services.blocks`),
+    so an edit only re-renders the blocks whose source changed.
+    """
+    from .blocks import render_track_blocks
+
+    content = track.content
+    return _renders.get_or_create(track.content_hash, lambda: render_track_blocks(track.track_id, content))
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+"""BM25-ranked search over paragraphs or sections of MDKV tracks.
+
+Each track is split into units (paragraphs separated by blank lines, or
+sections starting at ATX headings) and analyzed with the analyzer for the
+track's `language` (see `mdkv.services.analysis`). `TermStatsIndex` keeps
+per-track term statistics keyed by content hash, so repeated queries only
+score postings and re-index tracks that changed; with an `IndexCache` the
+per-track statistics also persist across runs.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mdkv.core.model import MDKVDocument, Track
+
+from .analysis import get_analyzer
+from .search import SearchMatch
+
+if TYPE_CHECKING:
+    from .index_cache import IndexCache
+
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+_HEADING_START = re.compile(r"^#{1,6}[ \t]", re.MULTILINE)
+_EXTRACT_CHARS = 200
+STATS_FORMAT = 1
+
+
+@dataclass
+class RankedMatch(SearchMatch):
+    """A `SearchMatch` spanning one unit, with its BM25 `score`."""
+    __slots__ = ("score",)
+    score: float
+
+
+def split_units(content: str, unit: str = "paragraph") -> List[Tuple[int, int]]:
+    """Return `(start, end)` spans of non-blank paragraphs or sections of `content`."""
+    if unit == "paragraph":
+        bounds = [0] + [m.end() for m in _PARAGRAPH_BREAK.finditer(content)]
+    elif unit == "section":
+        bounds = [0] + [m.start() for m in _HEADING_START.finditer(content) if m.start() > 0]
+    else:
+        raise ValueError(f"unsupported unit: {unit}")
+    spans = []
+    for start, end in zip(bounds, bounds[1:] + [len(content)]):
+        text = content[start:end]
+        if text.strip():
+            stripped = len(text) - len(text.rstrip())
+            spans.append((start, end - stripped))
+    return spans
+
+
+@dataclass
+class TrackStats:
+    """Per-track unit spans, lengths and term postings `(unit, tf)`."""
+    content_hash: str
+    language: Optional[str]
+    spans: List[Tuple[int, int]]
+    lengths: List[int]
+    postings: Dict[str, List[Tuple[int, int]]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, track: Track, unit: str = "paragraph") -> "TrackStats":
+        analyzer = get_analyzer(track.language)
+        spans = split_units(track.content, unit)
+        lengths: List[int] = []
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for idx, (start, end) in enumerate(spans):
+            counts = Counter(term for term, _, _ in analyzer.analyze(track.content[start:end]))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((idx, tf))
+        return cls(track.content_hash, track.language, spans, lengths, postings)
+
+    @classmethod
+    def load_or_build(cls, track: Track, unit: str, cache: Optional["IndexCache"]) -> "TrackStats":
+        """Return stats from `cache` when present for this content, analyzer and unit."""
+        if cache is None:
+            return cls.build(track, unit)
+        kind = f"bm25-{STATS_FORMAT}"
+        key = f"{track.content_hash}-{get_analyzer(track.language).language}-{unit}"
+        data = cache.get(kind, key)
+        if data is not None:
+            return cls(
+                track.content_hash,
+                track.language,
+                [tuple(span) for span in data["spans"]],
+                data["lengths"],
+                {term: [tuple(p) for p in units] for term, units in data["postings"].items()},
+            )
+        stats = cls.build(track, unit)
+        cache.put(kind, key, {"spans": stats.spans, "lengths": stats.lengths, "postings": stats.postings})
+        return stats
+
+
+class TermStatsIndex:
+    """Document-wide BM25 statistics assembled from per-track `TrackStats`."""
+
+    def __init__(
+        self,
+        unit: str = "paragraph",
+        k1: float = 1.2,
+        b: float = 0.75,
+        cache: Optional["IndexCache"] = None,
+    ) -> None:
+        self.unit = unit
+        self.k1 = k1
+        self.b = b
+        self.cache = cache
+        self.tracks: Dict[str, TrackStats] = {}
+        self.doc_freq: Counter = Counter()
+        self.unit_count = 0
+        self.avg_length = 0.0
+
+    @classmethod
+    def build(cls, doc: MDKVDocument, unit: str = "paragraph", cache: Optional["IndexCache"] = None) -> "TermStatsIndex":
+        index = cls(unit=unit, cache=cache)
+        index.refresh(doc)
+        return index
+
+    def refresh(self, doc: MDKVDocument) -> bool:
+        """Re-index tracks whose content or language changed; return True if anything did."""
+        changed = False
+        for track_id in list(self.tracks):
+            if track_id not in doc.tracks:
+                del self.tracks[track_id]
+                changed = True
+        for track_id, track in doc.tracks.items():
+            stats = self.tracks.get(track_id)
+            if stats is None or stats.content_hash != track.content_hash or stats.language != track.language:
+                self.tracks[track_id] = TrackStats.load_or_build(track, self.unit, self.cache)
+                changed = True
+        if changed or not self.unit_count:
+            self._aggregate()
+        return changed
+
+    def _aggregate(self) -> None:
+        self.doc_freq = Counter()
+        total_length = 0
+        self.unit_count = 0
+        for stats in self.tracks.values():
+            self.unit_count += len(stats.spans)
+            total_length += sum(stats.lengths)
+            for term, units in stats.postings.items():
+                self.doc_freq[term] += len(units)
+        self.avg_length = total_length / self.unit_count if self.unit_count else 0.0
+
+    def idf(self, term: str) -> float:
+        df = self.doc_freq.get(term, 0)
+        return math.log(1 + (self.unit_count - df + 0.5) / (df + 0.5))
+
+    def score_track(self, track_id: str, terms: Iterable[str]) -> Dict[int, float]:
+        """Return BM25 scores for units of `track_id` containing any of `terms`."""
+        stats = self.tracks[track_id]
+        scores: Dict[int, float] = {}
+        avg = self.avg_length or 1.0
+        for term in terms:
+            units = stats.postings.get(term)
+            if not units:
+                continue
+            idf = self.idf(term)
+            for idx, tf in units:
+                norm = self.k1 * (1 - self.b + self.b * stats.lengths[idx] / avg)
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+
+def ranked_search(
+    doc: MDKVDocument,
+    query: str,
+    k: int = 10,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+    index: Optional[TermStatsIndex] = None,
+    unit: str = "paragraph",
+) -> List[RankedMatch]:
+    """Return the top-`k` units of `doc` for `query` ranked by BM25.
+
+    The query is analyzed with each track's language analyzer. Pass a reusable
+    `index` to avoid rebuilding statistics between queries; it is refreshed
+    for changed tracks automatically.
+    """
+    if index is None:
+        index = TermStatsIndex(unit=unit)
+    index.refresh(doc)
+    allowed_types = set(track_types) if track_types else None
+    allowed_langs = set(languages) if languages else None
+    query_terms: Dict[Optional[str], List[str]] = {}
+
+    def candidates() -> Iterator[Tuple[float, int, str, int]]:
+        order = 0
+        for track_id, track in doc.tracks.items():
+            if allowed_types is not None and track.track_type not in allowed_types:
+                continue
+            if allowed_langs is not None and track.language not in allowed_langs:
+                continue
+            if track.language not in query_terms:
+                analyzer = get_analyzer(track.language)
+                query_terms[track.language] = list(dict.fromkeys(t for t, _, _ in analyzer.analyze(query)))
+            for idx, score in index.score_track(track_id, query_terms[track.language]).items():
+                # negative order keeps document order among equal scores
+                yield score, -order, track_id, idx
+                order += 1
+
+    results: List[RankedMatch] = []
+    for score, _, track_id, idx in heapq.nlargest(k, candidates()):
+        start, end = index.tracks[track_id].spans[idx]
+        content = doc.tracks[track_id].content
+        extract = content[start:min(end, start + _EXTRACT_CHARS)]
+        results.append(RankedMatch(track_id=track_id, start=start, end=end, extract=extract, score=score))
+    return results
@@ -3,39 +3,268 @@ from __future__ import annotations
 """Search utilities for MDKV documents.
 
 Provides a simple regex-based search across tracks with optional filtering by
-track type and language.
+track type and language. `iter_search` yields matches lazily so callers can
+stream or paginate results with bounded memory.
 """
 
+import heapq
 import re
 from dataclasses import dataclass
-from typing import List, Iterable, Optional
+from functools import lru_cache
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Iterable, Optional, Tuple
 
 from mdkv.core.model import MDKVDocument
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .trigram import TrigramIndex
+
 
 @dataclass
 class SearchMatch:
+    __slots__ = ("track_id", "start", "end", "extract")
     track_id: str
     start: int
     end: int
     extract: str
 
 
+@dataclass
+class TermMatch(SearchMatch):
+    """A `SearchMatch` tagged with the glossary `term` that produced it."""
+    __slots__ = ("term",)
+    term: str
+
+
+@dataclass
+class SearchPage:
+    """One page of results; pass `next_cursor` back to fetch the next page."""
+    matches: List[SearchMatch]
+    next_cursor: Optional[str]
+
+
+def match_cursor(match: SearchMatch) -> str:
+    """Return an opaque cursor that resumes a search right after `match`."""
+    resume = match.end if match.end > match.start else match.end + 1
+    return f"{resume}:{match.track_id}"
+
+
+def _parse_cursor(cursor: str) -> tuple[str, int]:
+    pos, sep, track_id = cursor.partition(":")
+    if not sep or not pos.isdigit():
+        raise ValueError(f"invalid search cursor: {cursor!r}")
+    return track_id, int(pos)
+
+
+def _extract(content: str, start: int, end: int, window: int = 20) -> str:
+    """Return `content[start:end]` padded by up to `window` characters per side."""
+    return content[max(0, start - window):min(len(content), end + window)]
+
+
+def iter_search(
+    doc: MDKVDocument,
+    pattern: str,
+    flags: int = 0,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+    cursor: Optional[str] = None,
+) -> Iterator[SearchMatch]:
+    """Lazily yield matches of `pattern` in `doc`, in track order then position.
+
+    Filters behave as in `search_document`. `cursor` (from `match_cursor`)
+    resumes after a previously returned match. Raises `ValueError` if the
+    cursor is malformed or names a track no longer in `doc`.
+    """
+    regex = re.compile(pattern, flags)
+    allowed_types = set(track_types) if track_types else None
+    allowed_langs = set(languages) if languages else None
+    resume_track, resume_pos = _parse_cursor(cursor) if cursor else (None, 0)
+    if resume_track is not None and resume_track not in doc.tracks:
+        raise ValueError(f"search cursor refers to unknown track: {resume_track}")
+    for track_id, track in doc.tracks.items():
+        pos = 0
+        if resume_track is not None:
+            if track_id != resume_track:
+                continue
+            pos, resume_track = resume_pos, None
+        if allowed_types is not None and track.track_type not in allowed_types:
+            continue
+        if allowed_langs is not None and track.language not in allowed_langs:
+            continue
+        content = track.content
+        for m in regex.finditer(content, pos):
+            start, end = m.span()
+            yield SearchMatch(track_id=track_id, start=start, end=end, extract=_extract(content, start, end))
+
+
 def search_document(
     doc: MDKVDocument,
     pattern: str,
     flags: int = 0,
     track_types: Optional[Iterable[str]] = None,
     languages: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    mode: str = "regex",
+    max_edits: int = 1,
+    trigram_index: Optional["TrigramIndex"] = None,
 ) -> List[SearchMatch]:
     """Search `doc` for `pattern`.
 
     - `track_types`: optional subset filter (e.g. `["primary", "commentary"]`)
     - `languages`: optional subset filter (e.g. `["en", "es"]`)
+    - `limit`/`offset`: return at most `limit` matches after skipping `offset`
+    - `cursor`: resume after the match a cursor was made from (`match_cursor`)
+    - `mode`: `"regex"` (default), `"substring"` (literal) or `"fuzzy"`
+      (literal within `max_edits` edits, returning `FuzzyMatch`); the latter two
+      use `trigram_index` when given (see `mdkv.services.trigram`)
     Returns a list of `SearchMatch` with small surrounding extracts.
     """
-    regex = re.compile(pattern, flags)
-    results: List[SearchMatch] = []
+    if mode == "regex":
+        matches: Iterator[SearchMatch] = iter_search(doc, pattern, flags, track_types, languages, cursor=cursor)
+    else:
+        if cursor is not None:
+            raise ValueError("cursors are only supported in regex mode")
+        from .trigram import iter_trigram_search
+
+        matches = iter_trigram_search(
+            doc, pattern, mode=mode, flags=flags, track_types=track_types, languages=languages,
+            max_edits=max_edits, index=trigram_index,
+        )
+    stop = offset + limit if limit is not None else None
+    return list(islice(matches, offset, stop))
+
+
+def search_page(
+    doc: MDKVDocument,
+    pattern: str,
+    limit: int,
+    flags: int = 0,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+    cursor: Optional[str] = None,
+) -> SearchPage:
+    """Return up to `limit` matches plus a cursor for the next page (None when exhausted)."""
+    matches = search_document(doc, pattern, flags, track_types, languages, limit=limit + 1, cursor=cursor)
+    if len(matches) <= limit:
+        return SearchPage(matches=matches, next_cursor=None)
+    page = matches[:limit]
+    return SearchPage(matches=page, next_cursor=match_cursor(page[-1]))
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Return a regex matching any of `words`, factored on common prefixes.
+
+    Each position then costs one branch per distinct next character instead
+    of one attempt per word. A node's continuations are tried before the word
+    ending there, so the longest word wins, as in a longest-first alternation.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: Dict[str, Any]) -> str:
+    prefix = []
+    # follow single-child chains without recursing
+    while "" not in node and len(node) == 1:
+        char, node = next(iter(node.items()))
+        prefix.append(re.escape(char))
+    branches: List[str] = []
+    leaves: List[str] = []
+    for char in sorted(k for k in node if k):
+        child = node[char]
+        if len(child) == 1 and "" in child:
+            leaves.append(re.escape(char))
+        else:
+            branches.append(re.escape(char) + _node_pattern(child))
+    if leaves:
+        branches.append(leaves[0] if len(leaves) == 1 else "[" + "".join(leaves) + "]")
+    if len(branches) == 1 and leaves:
+        body = branches[0]  # a single character or character class
+    else:
+        body = "(?:" + "|".join(branches) + ")" if branches else ""
+    if body and "" in node:
+        body += "?"
+    return "".join(prefix) + body
+
+
+@lru_cache(maxsize=32)
+def _compile_terms(terms: Tuple[str, ...], flags: int, whole_words: bool) -> Tuple["re.Pattern[str]", Dict[str, str]]:
+    """Compile `terms` into one prefix-factored pattern plus a text → term lookup."""
+    fold = str.lower if flags & re.IGNORECASE else (lambda text: text)
+    lookup: Dict[str, str] = {}
+    for term in terms:
+        lookup.setdefault(fold(term), term)
+    pattern = _trie_pattern(lookup)
+    # lookarounds rather than \b, so terms like "C++" or ".NET" work as whole words
+    if whole_words:
+        pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+    return re.compile(pattern, flags), lookup
+
+
+# up to this many terms, `str.find` per term beats the combined pattern's scan
+_FIND_MAX_TERMS = 64
+
+
+def _term_spans(content: str, regex: "re.Pattern[str]", lookup: Dict[str, str], flags: int) -> Iterator[Tuple[int, int]]:
+    """Yield the spans `regex.finditer(content)` would, using `str.find` for small term sets.
+
+    The next occurrence of each term is kept in a heap; `regex` is only tried
+    at the leftmost one, where it picks the longest term (and checks word
+    boundaries). Case-insensitive search only takes this path for ASCII text,
+    where `str.lower` agrees with the regex engine.
+    """
+    ignore_case = bool(flags & re.IGNORECASE)
+    if len(lookup) > _FIND_MAX_TERMS or (ignore_case and not (content.isascii() and all(k.isascii() for k in lookup))):
+        for m in regex.finditer(content):
+            yield m.span()
+        return
+    haystack = content.lower() if ignore_case else content
+    heap = [(found, key) for key in lookup for found in (haystack.find(key),) if found >= 0]
+    heapq.heapify(heap)
+    pos = 0
+    while heap:
+        start, key = heap[0]
+        if start < pos:
+            found = haystack.find(key, pos)
+            if found < 0:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (found, key))
+            continue
+        m = regex.match(content, start)
+        if m is not None:
+            yield m.span()
+        pos = max(start + 1, m.end() if m is not None else 0)
+
+
+def iter_search_terms(
+    doc: MDKVDocument,
+    terms: Iterable[str],
+    flags: int = 0,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+    whole_words: bool = False,
+) -> Iterator[TermMatch]:
+    """Yield matches of any literal in `terms`, scanning each track once.
+
+    Up to 64 terms are located with `str.find` and the combined pattern is
+    only tried where one occurs; larger sets scan with one cached pattern
+    factored on common prefixes. At a given position the longest term wins;
+    matches do not overlap. With
+    `whole_words`, a match may not touch a word character on either side.
+    """
+    unique = tuple(dict.fromkeys(t for t in terms if t))
+    if not unique:
+        return
+    regex, lookup = _compile_terms(unique, flags, whole_words)
+    fold = str.lower if flags & re.IGNORECASE else (lambda text: text)
     allowed_types = set(track_types) if track_types else None
     allowed_langs = set(languages) if languages else None
     for track_id, track in doc.tracks.items():
@@ -43,12 +272,25 @@ def search_document(
             continue
         if allowed_langs is not None and track.language not in allowed_langs:
             continue
-        for m in regex.finditer(track.content):
-            start, end = m.span()
-            window_start = max(0, start - 20)
-            window_end = min(len(track.content), end + 20)
-            extract = track.content[window_start:window_end]
-            results.append(SearchMatch(track_id=track_id, start=start, end=end, extract=extract))
-    return results
+        content = track.content
+        for start, end in _term_spans(content, regex, lookup, flags):
+            text = content[start:end]
+            term = lookup.get(fold(text))
+            if term is None:  # case folding differs from the regex engine's
+                term = next(t for t in unique if re.fullmatch(re.escape(t), text, flags))
+            yield TermMatch(track_id=track_id, start=start, end=end, extract=_extract(content, start, end), term=term)
 
 
+def search_terms(
+    doc: MDKVDocument,
+    terms: Iterable[str],
+    flags: int = 0,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+    whole_words: bool = False,
+) -> List[TermMatch]:
+    """Search `doc` for a list of literal `terms` in one pass per track.
+
+    Returns `TermMatch` objects carrying the matched term; see `iter_search_terms`.
+    """
+    return list(iter_search_terms(doc, terms, flags, track_types, languages, whole_words))
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+"""Incremental static-site export.
+
+Every document gets one page per language: the primary track and each
+`translation` track. Other tracks (commentary, references, ...) without a
+language or in the page's language are appended as collapsible `<details>`
+sections. Pages share one stylesheet under `assets/` and a site `index.html`.
+
+A build manifest in the output directory records each source's size and
+mtime and a signature per page (hash of the tracks and metadata the page is
+built from). Unchanged sources are skipped without being opened; changed
+sources only rewrite pages whose signature changed, and pages of removed
+documents or tracks are deleted.
+"""
+
+import hashlib
+import html
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from mdkv.common.fs import atomic_write, common_parent, load_json_manifest, write_json_manifest
+from mdkv.common.logging import get_logger
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.storage.io import load_mdkv
+
+from .parse import render_track
+
+
+SITE_MANIFEST = ".mdkv-site.json"
+ASSET_PATH = "assets/mdkv.css"
+_MANIFEST_FORMAT = 1
+# bump when the page template changes so every page is rebuilt
+_TEMPLATE_VERSION = "1"
+
+_STYLESHEET = """\
+body { font-family: system-ui, sans-serif; line-height: 1.5; max-width: 48rem; margin: 2rem auto; padding: 0 1rem; }
+nav.mdkv-languages a { margin-right: .75rem; }
+nav.mdkv-languages a[aria-current] { font-weight: bold; }
+details.mdkv-side { border-left: 3px solid #ccc; margin: 1.5rem 0; padding-left: 1rem; }
+details.mdkv-side > summary { cursor: pointer; color: #555; }
+pre { overflow-x: auto; }
+"""
+
+logger = get_logger("mdkv.site")
+
+
+@dataclass
+class SiteReport:
+    """Pages written, skipped (unchanged) and deleted by `build_site`."""
+    written: int = 0
+    skipped: int = 0
+    deleted: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "written": self.written,
+            "skipped": self.skipped,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+@dataclass(frozen=True)
+class PagePlan:
+    """One page: its file name within the document directory, main track and side tracks."""
+    name: str
+    language: str
+    main: Track
+    sides: Tuple[Track, ...]
+
+
+def plan_pages(doc: MDKVDocument) -> List[PagePlan]:
+    """Return the pages of `doc`: the primary track first, then translations in document order."""
+    mains = [t for t in doc.tracks.values() if t.track_type == "primary"]
+    mains += [t for t in doc.tracks.values() if t.track_type == "translation"]
+    others = [t for t in doc.tracks.values() if t.track_type not in ("primary", "translation")]
+    pages: List[PagePlan] = []
+    used: set = set()
+    for main in mains:
+        language = main.language or "und"
+        name = f"{language}.html" if f"{language}.html" not in used else f"{main.track_id}.html"
+        used.add(name)
+        sides = tuple(t for t in others if t.language in (None, main.language))
+        pages.append(PagePlan(name, language, main, sides))
+    return pages
+
+
+def _signature(doc: MDKVDocument, page: PagePlan, pages: List[PagePlan]) -> str:
+    parts = [_TEMPLATE_VERSION, doc.title, page.name, page.main.track_id, page.main.content_hash]
+    parts += [f"{t.track_id}:{t.track_type}:{t.content_hash}" for t in page.sides]
+    parts += [f"{p.name}:{p.language}" for p in pages]
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def render_page(doc: MDKVDocument, page: PagePlan, pages: List[PagePlan], asset_href: str) -> str:
+    """Return the HTML page for `page`, linking its sibling language pages."""
+    esc = html.escape
+    current = ' aria-current="page"'
+    links = "".join(
+        f'<a href="{esc(p.name)}" hreflang="{esc(p.language)}"{current if p is page else ""}>{esc(p.language)}</a>'
+        for p in pages
+    )
+    parts = [
+        "<!DOCTYPE html>\n",
+        f'<html lang="{esc(page.language)}">\n<head>\n<meta charset="utf-8">\n',
+        f"<title>{esc(doc.title)}</title>\n",
+        f'<link rel="stylesheet" href="{esc(asset_href)}">\n</head>\n<body>\n',
+        f'<nav class="mdkv-languages">{links}</nav>\n',
+        f'<main class="mdkv-track" data-track="{esc(page.main.track_id)}">\n{render_track(page.main)}</main>\n',
+    ]
+    for side in page.sides:
+        parts.append(
+            f'<details class="mdkv-side" data-track="{esc(side.track_id)}" data-type="{esc(side.track_type)}">\n'
+            f"<summary>{esc(side.track_type)}: {esc(side.track_id)}</summary>\n{render_track(side)}</details>\n"
+        )
+    parts.append("</body>\n</html>\n")
+    return "".join(parts)
+
+
+def _write_if_changed(path: Path, text: str) -> bool:
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return False
+    except FileNotFoundError:
+        pass
+    with atomic_write(path) as fp:
+        fp.write(text)
+    return True
+
+
+def _render_index(entries: Dict[str, Any]) -> str:
+    esc = html.escape
+    items = "".join(
+        f'<li><a href="{esc(key)}/{esc(entry["pages"][0])}">{esc(entry["title"])}</a></li>\n'
+        for key, entry in sorted(entries.items())
+        if entry.get("pages")
+    )
+    return (
+        "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>MDKV library</title>\n"
+        f'<link rel="stylesheet" href="{ASSET_PATH}">\n</head>\n<body>\n<ul>\n{items}</ul>\n</body>\n</html>\n'
+    )
+
+
+def build_site(paths: Iterable[Path], out_dir: Path, base: Optional[Path] = None, force: bool = False) -> SiteReport:
+    """Build or update the static site for `paths` in `out_dir`.
+
+    Document directories mirror source paths relative to `base` (default:
+    the common parent directory of `paths`; pass a fixed directory so page
+    URLs do not depend on which sources are present). With `force`, every
+    page is rewritten.
+    """
+    started = time.perf_counter()
+    sources = [Path(p) for p in paths]
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if base is None:
+        base = common_parent(sources)
+    manifest_path = out_dir / SITE_MANIFEST
+    previous = load_json_manifest(manifest_path, _MANIFEST_FORMAT, "sources")
+    current: Dict[str, Any] = {}
+    report = SiteReport()
+
+    _write_if_changed(out_dir / ASSET_PATH, _STYLESHEET)
+    for source in sources:
+        key = source.resolve().relative_to(base.resolve()).with_suffix("").as_posix()
+        stat = source.stat()
+        entry = previous.get(key)
+        doc_dir = out_dir / key
+        if (
+            entry is not None and not force
+            and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+            and all((doc_dir / name).exists() for name in entry["signatures"])
+        ):
+            current[key] = entry
+            report.skipped += len(entry["signatures"])
+            continue
+        try:
+            doc = load_mdkv(source)
+        except Exception as e:
+            logger.warning("skipping %s: %s", source, e)
+            report.failed += 1
+            if entry is not None:
+                current[key] = entry
+            continue
+        pages = plan_pages(doc)
+        old_signatures = {} if force or entry is None else entry["signatures"]
+        signatures: Dict[str, str] = {}
+        asset_href = os.path.relpath(out_dir / ASSET_PATH, doc_dir).replace(os.sep, "/")
+        for page in pages:
+            signature = _signature(doc, page, pages)
+            signatures[page.name] = signature
+            if old_signatures.get(page.name) == signature and (doc_dir / page.name).exists():
+                report.skipped += 1
+                continue
+            with atomic_write(doc_dir / page.name) as fp:
+                fp.write(render_page(doc, page, pages, asset_href))
+            report.written += 1
+        for name in set(entry["signatures"] if entry else ()) - set(signatures):
+            (doc_dir / name).unlink(missing_ok=True)
+            report.deleted += 1
+        current[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "title": doc.title,
+            "pages": [p.name for p in pages],
+            "signatures": signatures,
+        }
+    # documents that are no longer part of the site
+    for key, entry in previous.items():
+        if key in current:
+            continue
+        for name in entry.get("signatures", {}):
+            (out_dir / key / name).unlink(missing_ok=True)
+            report.deleted += 1
+        try:
+            (out_dir / key).rmdir()
+        except OSError:
+            pass
+    _write_if_changed(out_dir / "index.html", _render_index(current))
+    write_json_manifest(manifest_path, _MANIFEST_FORMAT, "sources", current)
+    report.seconds = time.perf_counter() - started
+    return report
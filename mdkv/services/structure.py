@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+"""Structure-aware search scoped to Markdown elements.
+
+Tracks are parsed once into element segments (see `mdkv.services.parse`),
+and patterns are matched only inside the requested element kinds, e.g.
+headings, fenced code in `code` tracks or link targets in `media_ref` tracks.
+Offsets refer to the original track content.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+from mdkv.core.model import MDKVDocument
+
+from .parse import ELEMENT_KINDS, parse_track
+from .search import SearchMatch, _extract
+
+
+@dataclass
+class ElementMatch(SearchMatch):
+    """A `SearchMatch` found inside a Markdown element of the given `kind`."""
+    __slots__ = ("kind",)
+    kind: str
+
+
+def iter_search_elements(
+    doc: MDKVDocument,
+    pattern: str,
+    kinds: Optional[Iterable[str]] = None,
+    flags: int = 0,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+) -> Iterator[ElementMatch]:
+    """Yield matches of `pattern` inside elements of `kinds` (default: all kinds).
+
+    Valid kinds are listed in `ELEMENT_KINDS`. Raises `ValueError` for others.
+    """
+    wanted = set(kinds) if kinds else set(ELEMENT_KINDS)
+    unknown = wanted - set(ELEMENT_KINDS)
+    if unknown:
+        raise ValueError(f"unknown element kinds: {', '.join(sorted(unknown))}")
+    regex = re.compile(pattern, flags)
+    allowed_types = set(track_types) if track_types else None
+    allowed_langs = set(languages) if languages else None
+    for track_id, track in doc.tracks.items():
+        if allowed_types is not None and track.track_type not in allowed_types:
+            continue
+        if allowed_langs is not None and track.language not in allowed_langs:
+            continue
+        content = track.content
+        for segment in parse_track(track).segments:
+            if segment.kind not in wanted:
+                continue
+            for m in regex.finditer(content, segment.start, segment.end):
+                start, end = m.span()
+                yield ElementMatch(
+                    track_id=track_id, start=start, end=end, extract=_extract(content, start, end), kind=segment.kind
+                )
+
+
+def search_elements(
+    doc: MDKVDocument,
+    pattern: str,
+    kinds: Optional[Iterable[str]] = None,
+    flags: int = 0,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+) -> List[ElementMatch]:
+    """Search `doc` for `pattern` only within the given Markdown element `kinds`."""
+    return list(iter_search_elements(doc, pattern, kinds, flags, track_types, languages))
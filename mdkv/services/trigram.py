@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+"""Trigram index for substring and fuzzy (edit-distance) search.
+
+Each track's case-folded content is indexed as trigram → list of positions.
+Substring queries only verify positions where every trigram of the needle
+lines up; fuzzy queries use the q-gram lemma (a match with at most `k` edits
+shares at least `len - 2 - 3k` trigrams with the needle) to pick candidate
+windows and run an edit-distance scan only inside them. When that bound is
+too weak (short needles), the pigeonhole principle is used instead: a match
+contains at least one of `k + 1` needle pieces unchanged.
+
+Indexes can be built in memory or saved as a gzip JSON sidecar next to the
+container (`sidecar_path`). Postings carry the track content hash, so stale
+tracks are re-indexed on demand, or read from an `IndexCache` when one is
+attached.
+"""
+
+import gzip
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mdkv.core.model import MDKVDocument, Track
+
+from .search import SearchMatch, _extract
+
+if TYPE_CHECKING:
+    from .index_cache import IndexCache
+
+
+TRIGRAM_FORMAT = 1
+
+
+@dataclass
+class FuzzyMatch(SearchMatch):
+    """A `SearchMatch` with the edit `distance` between needle and matched text."""
+    __slots__ = ("distance",)
+    distance: int
+
+
+def _fold(text: str) -> str:
+    """Lower-case `text` without changing its length (offsets stay valid)."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+def sidecar_path(container_path: Path) -> Path:
+    """Return the trigram sidecar location for `container_path`."""
+    container_path = Path(container_path)
+    return container_path.with_name(container_path.name + ".trigrams.json.gz")
+
+
+@dataclass
+class TrackTrigrams:
+    content_hash: str
+    grams: Dict[str, List[int]]
+
+    @classmethod
+    def build(cls, track: Track) -> "TrackTrigrams":
+        folded = _fold(track.content)
+        grams: Dict[str, List[int]] = {}
+        for pos in range(len(folded) - 2):
+            grams.setdefault(folded[pos:pos + 3], []).append(pos)
+        return cls(content_hash=track.content_hash, grams=grams)
+
+
+class TrigramIndex:
+    """Per-track trigram positions for a document."""
+
+    def __init__(
+        self,
+        tracks: Optional[Dict[str, TrackTrigrams]] = None,
+        cache: Optional["IndexCache"] = None,
+    ) -> None:
+        self.tracks: Dict[str, TrackTrigrams] = dict(tracks or {})
+        self.cache = cache
+
+    @classmethod
+    def build(cls, doc: MDKVDocument, cache: Optional["IndexCache"] = None) -> "TrigramIndex":
+        index = cls(cache=cache)
+        for track in doc.tracks.values():
+            index.postings_for(track)
+        return index
+
+    def postings_for(self, track: Track) -> TrackTrigrams:
+        """Return up-to-date trigram postings for `track`, re-indexing it if stale."""
+        postings = self.tracks.get(track.track_id)
+        if postings is None or postings.content_hash != track.content_hash:
+            postings = self._load_or_build(track)
+            self.tracks[track.track_id] = postings
+        return postings
+
+    def _load_or_build(self, track: Track) -> TrackTrigrams:
+        if self.cache is None:
+            return TrackTrigrams.build(track)
+        kind = f"trigrams-{TRIGRAM_FORMAT}"
+        data = self.cache.get(kind, track.content_hash)
+        if data is not None:
+            return TrackTrigrams(content_hash=track.content_hash, grams=data["grams"])
+        postings = TrackTrigrams.build(track)
+        self.cache.put(kind, track.content_hash, {"grams": postings.grams})
+        return postings
+
+    def substring_candidates(self, track: Track, needle: str) -> List[int]:
+        """Return start offsets where all trigrams of `needle` (case-folded) line up."""
+        folded = _fold(needle)
+        grams = self.postings_for(track).grams
+        first = grams.get(folded[:3], [])
+        others = [(i, set(grams.get(folded[i:i + 3], ()))) for i in range(1, len(folded) - 2)]
+        return [p for p in first if all(p + i in positions for i, positions in others)]
+
+    def fuzzy_windows(self, track: Track, needle: str, max_edits: int) -> Optional[List[Tuple[int, int]]]:
+        """Return merged `(lo, hi)` windows that may hold a match within `max_edits`.
+
+        Uses the q-gram bound when it is positive. Otherwise (short needle or
+        large `max_edits`), a match must contain one of `max_edits + 1` pieces of
+        the needle exactly, so windows come from `str.find` on those pieces.
+        Returns None only when the needle has `max_edits` characters or fewer,
+        meaning the whole track must be scanned.
+        """
+        folded = _fold(needle)
+        threshold = (len(folded) - 2) - 3 * max_edits
+        if threshold <= 0:
+            return self._piece_windows(track, folded, max_edits)
+        grams = self.postings_for(track).grams
+        votes: Counter = Counter()
+        for i in range(len(folded) - 2):
+            for pos in grams.get(folded[i:i + 3], ()):
+                votes[pos - i] += 1
+        diagonals = sorted(votes)
+        windows: List[Tuple[int, int]] = []
+        lo_idx = 0
+        window_votes = 0
+        hi_idx = 0
+        for diag in diagonals:
+            # count votes on diagonals within max_edits of this one
+            while hi_idx < len(diagonals) and diagonals[hi_idx] <= diag + max_edits:
+                window_votes += votes[diagonals[hi_idx]]
+                hi_idx += 1
+            while diagonals[lo_idx] < diag - max_edits:
+                window_votes -= votes[diagonals[lo_idx]]
+                lo_idx += 1
+            if window_votes >= threshold:
+                _add_window(windows, diag, len(needle), max_edits, len(track.content))
+        return windows
+
+    @staticmethod
+    def _piece_windows(track: Track, folded: str, max_edits: int) -> Optional[List[Tuple[int, int]]]:
+        """Pigeonhole filter: windows around exact occurrences of `max_edits + 1` needle pieces."""
+        pieces = max_edits + 1
+        if len(folded) < pieces:
+            return None
+        haystack = _fold(track.content)
+        diagonals = set()
+        for k in range(pieces):
+            lo, hi = len(folded) * k // pieces, len(folded) * (k + 1) // pieces
+            piece = folded[lo:hi]
+            pos = haystack.find(piece)
+            while pos >= 0:
+                diagonals.add(pos - lo)
+                pos = haystack.find(piece, pos + 1)
+        windows: List[Tuple[int, int]] = []
+        for diag in sorted(diagonals):
+            _add_window(windows, diag, len(folded), max_edits, len(track.content))
+        return windows
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "format": TRIGRAM_FORMAT,
+            "tracks": {tid: {"content_hash": p.content_hash, "grams": p.grams} for tid, p in self.tracks.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "TrigramIndex":
+        if data.get("format") != TRIGRAM_FORMAT:
+            return cls()
+        tracks = data.get("tracks", {})
+        return cls({
+            tid: TrackTrigrams(content_hash=p["content_hash"], grams=p["grams"])
+            for tid, p in tracks.items()  # type: ignore[union-attr]
+        })
+
+    def save(self, path: Path) -> None:
+        """Write the index as gzip-compressed JSON to `path`."""
+        with gzip.open(Path(path), "wt", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"), ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "TrigramIndex":
+        with gzip.open(Path(path), "rt", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def _add_window(windows: List[Tuple[int, int]], diag: int, length: int, max_edits: int, limit: int) -> None:
+    """Append the window of a match starting near `diag`, merging with the previous one."""
+    lo = max(0, diag - max_edits)
+    hi = min(limit, diag + length + 2 * max_edits)
+    if windows and lo <= windows[-1][1]:
+        windows[-1] = (windows[-1][0], max(windows[-1][1], hi))
+    else:
+        windows.append((lo, hi))
+
+
+def _fuzzy_scan(text: str, needle: str, max_edits: int, offset: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield `(start, end, distance)` of best approximate matches of `needle` in `text`.
+
+    Sellers' dynamic programme: row 0 is free so matches may start anywhere.
+    Overlapping candidates collapse to the one with the lowest distance.
+    """
+    m = len(needle)
+    prev_cost = list(range(m + 1))
+    prev_origin = [0] * (m + 1)
+    best: Optional[Tuple[int, int, int]] = None
+    for j, char in enumerate(text, start=1):
+        cost = [0] * (m + 1)
+        origin = [j] * (m + 1)
+        for i in range(1, m + 1):
+            sub = prev_cost[i - 1] + (needle[i - 1] != char)
+            skip_text = prev_cost[i] + 1
+            skip_needle = cost[i - 1] + 1
+            if sub <= skip_text and sub <= skip_needle:
+                cost[i], origin[i] = sub, prev_origin[i - 1]
+            elif skip_text <= skip_needle:
+                cost[i], origin[i] = skip_text, prev_origin[i]
+            else:
+                cost[i], origin[i] = skip_needle, origin[i - 1]
+        prev_cost, prev_origin = cost, origin
+        if cost[m] > max_edits:
+            continue
+        candidate = (offset + origin[m], offset + j, cost[m])
+        if best is not None and candidate[0] >= best[1]:
+            yield best
+            best = candidate
+        elif best is None or candidate[2] < best[2]:
+            best = candidate
+    if best is not None:
+        yield best
+
+
+def iter_trigram_search(
+    doc: MDKVDocument,
+    needle: str,
+    mode: str = "substring",
+    flags: int = 0,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+    max_edits: int = 1,
+    index: Optional[TrigramIndex] = None,
+) -> Iterator[SearchMatch]:
+    """Yield literal (`mode="substring"`) or approximate (`mode="fuzzy"`) matches of `needle`.
+
+    Substring mode without an `index` falls back to `str.find`; fuzzy mode
+    builds trigram postings on demand when no `index` is given.
+    """
+    if mode not in ("substring", "fuzzy"):
+        raise ValueError(f"unsupported trigram search mode: {mode}")
+    if not needle:
+        return
+    ignore_case = bool(flags & re.IGNORECASE)
+    allowed_types = set(track_types) if track_types else None
+    allowed_langs = set(languages) if languages else None
+    if mode == "fuzzy" and index is None:
+        index = TrigramIndex()
+    probe = _fold(needle) if ignore_case else needle
+    for track_id, track in doc.tracks.items():
+        if allowed_types is not None and track.track_type not in allowed_types:
+            continue
+        if allowed_langs is not None and track.language not in allowed_langs:
+            continue
+        content = track.content
+        haystack = _fold(content) if ignore_case else content
+        if mode == "substring":
+            if index is not None and len(needle) >= 3:
+                starts = [p for p in index.substring_candidates(track, needle) if haystack.startswith(probe, p)]
+            else:
+                starts = [m.start() for m in re.finditer(re.escape(probe), haystack)]
+            last_end = 0
+            for start in starts:
+                # candidates may overlap; keep non-overlapping matches like the scan does
+                if start < last_end:
+                    continue
+                end = last_end = start + len(needle)
+                yield SearchMatch(track_id=track_id, start=start, end=end, extract=_extract(content, start, end))
+            continue
+        windows = index.fuzzy_windows(track, needle, max_edits)  # type: ignore[union-attr]
+        if windows is None:
+            windows = [(0, len(content))]
+        for lo, hi in windows:
+            for start, end, distance in _fuzzy_scan(haystack[lo:hi], probe, max_edits, lo):
+                yield FuzzyMatch(
+                    track_id=track_id, start=start, end=end, extract=_extract(content, start, end), distance=distance
+                )
@@ -1,5 +1,14 @@
-from .io import save_mdkv, load_mdkv
-
-__all__ = ["save_mdkv", "load_mdkv"]
-
+from .io import ContainerWriter, save_mdkv, load_mdkv, load_index, iter_mdkv_paths, iter_mdkv_base, container_features
+from .validate import validate_container, validate_containers
 
+__all__ = [
+    "save_mdkv",
+    "load_mdkv",
+    "load_index",
+    "iter_mdkv_paths",
+    "iter_mdkv_base",
+    "ContainerWriter",
+    "container_features",
+    "validate_container",
+    "validate_containers",
+]
@@ -5,47 +5,88 @@ from __future__ import annotations
 A `.mdkv` file is a ZIP archive containing a `manifest.yaml` and a `tracks/`
 directory with UTF-8 Markdown files. This module serializes/deserializes
 `MDKVDocument` instances to/from that container format.
+
+Containers saved with `prerender=True` also hold `rendered/<track_id>.html`
+per track, with the hash of the source content it was rendered from recorded
+in the manifest. On load, fragments whose hash still matches seed the render
+cache, so viewers and `to_html` skip Markdown rendering; stale fragments are
+ignored and the track is rendered on demand.
 """
 
+import io
 import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, TextIO, Type
 
 import yaml
 
+from mdkv.common.fs import atomic_write
 from mdkv.core.model import MDKVDocument, Track
 
+if TYPE_CHECKING:  # pragma: no cover
+    from mdkv.services.index import FullTextIndex
+
 
 MANIFEST_NAME = "manifest.yaml"
+RENDERED_DIR = "rendered"
+# libyaml's loader is an order of magnitude faster when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def read_manifest(zf: zipfile.ZipFile) -> Any:
+    """Parse the manifest of an open container (raises `KeyError` if absent)."""
+    with zf.open(MANIFEST_NAME) as f:
+        return yaml.load(f.read().decode("utf-8"), Loader=_YAML_LOADER)
+
+
+def _rendered_path(track: Track) -> str:
+    return f"{RENDERED_DIR}/{track.track_id}.html"
 
 
-def _manifest_from_doc(doc: MDKVDocument) -> Dict[str, Any]:
+def _manifest_from_doc(doc: MDKVDocument, prerender: bool = False) -> Dict[str, Any]:
     """Create a manifest dictionary suitable for YAML emission.
 
     The manifest lists metadata and an index of tracks with paths. Track content
-    is stored separately as files within the ZIP.
+    is stored separately as files within the ZIP. With `prerender`, each track
+    entry also names its rendered HTML and the content hash it matches.
     """
+    tracks = []
+    for t in doc.tracks.values():
+        entry: Dict[str, Any] = {
+            "track_id": t.track_id,
+            "track_type": t.track_type,
+            "language": t.language,
+            "path": t.path,
+        }
+        if prerender:
+            entry["rendered"] = _rendered_path(t)
+            entry["rendered_hash"] = t.content_hash
+        tracks.append(entry)
     return {
         "title": doc.title,
         "authors": list(doc.authors),
         "created": doc.created.isoformat(),
         "version": doc.version,
         "metadata": dict(doc.metadata),
-        "tracks": [
-            {
-                "track_id": t.track_id,
-                "track_type": t.track_type,
-                "language": t.language,
-                "path": t.path,
-            }
-            for t in doc.tracks.values()
-        ],
+        "tracks": tracks,
     }
 
 
-def _doc_from_manifest(manifest: Dict[str, Any], file_reader: zipfile.ZipFile) -> MDKVDocument:
-    """Reconstruct a document from a parsed manifest and the ZIP handle."""
+def _doc_from_manifest(
+    manifest: Dict[str, Any],
+    file_reader: zipfile.ZipFile,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+) -> MDKVDocument:
+    """Reconstruct a document from a parsed manifest and the ZIP handle.
+
+    Tracks filtered out by `track_types`/`languages` are not decompressed.
+    Stored rendered HTML that matches its track's content seeds the render cache.
+    """
+    allowed_types = set(track_types) if track_types else None
+    allowed_langs = set(languages) if languages else None
     doc = MDKVDocument(
         title=manifest["title"],
         authors=list(manifest.get("authors", [])),
@@ -54,6 +95,10 @@ def _doc_from_manifest(manifest: Dict[str, Any], file_reader: zipfile.ZipFile) -
     )
     doc.metadata.update(manifest.get("metadata", {}))
     for t in manifest.get("tracks", []):
+        if allowed_types is not None and t["track_type"] not in allowed_types:
+            continue
+        if allowed_langs is not None and t.get("language") not in allowed_langs:
+            continue
         path = t["path"]
         with file_reader.open(path) as f:
             content = f.read().decode("utf-8")
@@ -65,31 +110,236 @@ def _doc_from_manifest(manifest: Dict[str, Any], file_reader: zipfile.ZipFile) -
             content=content,
         )
         doc.add_track(track)
+        if t.get("rendered") and t.get("rendered_hash") == track.content_hash:
+            from mdkv.services.parse import prime_render
+
+            try:
+                with file_reader.open(t["rendered"]) as f:
+                    prime_render(track.content_hash, f.read().decode("utf-8"))
+            except KeyError:
+                pass  # the fragment is an optional cache; render on demand instead
     return doc
 
 
-def save_mdkv(doc: MDKVDocument, output_path: Path) -> None:
+def save_mdkv(doc: MDKVDocument, output_path: Path, build_index: bool = False, prerender: bool = False) -> None:
     """Write `doc` to `output_path` as a `.mdkv` ZIP container.
 
-    Overwrites existing files. Creates parent directories as needed.
+    Overwrites existing files atomically (readers never see a partial
+    container). Creates parent directories as needed. With
+    `build_index=True`, a full-text index is stored alongside the tracks
+    (see `load_index`). With `prerender=True`, each track's rendered HTML is
+    stored as well (see module docstring).
     """
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    manifest = _manifest_from_doc(doc)
-    with zipfile.ZipFile(output_path, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+    manifest = _manifest_from_doc(doc, prerender=prerender)
+    # entries are stamped with the document's creation time, so saving the same
+    # document twice gives identical bytes
+    stamp = max(doc.created.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+
+    def entry(name: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name, date_time=stamp)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        return info
+
+    with atomic_write(output_path, "wb") as fp, zipfile.ZipFile(fp, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
         for track in doc.tracks.values():
-            zf.writestr(track.path, track.content)
-        zf.writestr(MANIFEST_NAME, yaml.safe_dump(manifest, sort_keys=False))
+            zf.writestr(entry(track.path), track.content)
+        if prerender:
+            from mdkv.services.parse import render_track
+
+            for track in doc.tracks.values():
+                zf.writestr(entry(_rendered_path(track)), render_track(track))
+        if build_index:
+            from mdkv.services.index import INDEX_ENTRY, FullTextIndex
 
+            zf.writestr(entry(INDEX_ENTRY), FullTextIndex.build(doc).dumps())
+        zf.writestr(entry(MANIFEST_NAME), yaml.safe_dump(manifest, sort_keys=False))
 
-def load_mdkv(input_path: Path) -> MDKVDocument:
+
+def load_mdkv(
+    input_path: Path,
+    track_types: Optional[Iterable[str]] = None,
+    languages: Optional[Iterable[str]] = None,
+) -> MDKVDocument:
     """Load a `.mdkv` document from `input_path`.
 
+    `track_types`/`languages` optionally restrict which tracks are read; the
+    result then holds only the matching tracks.
     Raises `KeyError`/`yaml.YAMLError` if the manifest is missing/invalid.
     """
     with zipfile.ZipFile(Path(input_path), mode="r") as zf:
-        with zf.open(MANIFEST_NAME) as f:
-            manifest = yaml.safe_load(f.read().decode("utf-8"))
-        return _doc_from_manifest(manifest, zf)
+        manifest = read_manifest(zf)
+        return _doc_from_manifest(manifest, zf, track_types=track_types, languages=languages)
+
+
+def container_features(input_path: Path) -> Dict[str, bool]:
+    """Report which optional entries `input_path` holds: `{"index": ..., "rendered": ...}`.
+
+    Lets commands that rewrite a container keep them.
+    """
+    from mdkv.services.index import INDEX_ENTRY
+
+    with zipfile.ZipFile(Path(input_path), mode="r") as zf:
+        names = zf.namelist()
+    return {
+        "index": INDEX_ENTRY in names,
+        "rendered": any(name.startswith(RENDERED_DIR + "/") for name in names),
+    }
+
+
+def iter_mdkv_paths(target: Path | str) -> List[Path]:
+    """Resolve `target` to a sorted list of `.mdkv` files.
+
+    `target` may be a file, a directory (searched recursively) or a glob
+    pattern such as `library/**/*.mdkv`.
+    """
+    target_path = Path(target)
+    if target_path.is_file():
+        return [target_path]
+    if target_path.is_dir():
+        return sorted(p for p in target_path.rglob("*.mdkv") if p.is_file())
+    pattern = str(target)
+    root = Path(target_path.anchor) if target_path.is_absolute() else Path(".")
+    relative = pattern[len(target_path.anchor):] if target_path.is_absolute() else pattern
+    return sorted(p for p in root.glob(relative) if p.is_file())
+
+
+def iter_mdkv_base(target: Path | str) -> Path:
+    """Return the directory that `iter_mdkv_paths(target)` results are laid out relative to.
+
+    The file's directory, the directory itself, or the part of a glob before
+    its first wildcard. Unlike the common parent of the matches, it does not
+    change when files are added or removed.
+    """
+    target_path = Path(target)
+    if target_path.is_file():
+        return target_path.parent
+    if target_path.is_dir():
+        return target_path
+    parts = []
+    for part in target_path.parts:
+        if any(c in part for c in "*?["):
+            break
+        parts.append(part)
+    return Path(*parts) if parts else Path(".")
+
+
+def load_index(input_path: Path) -> Optional["FullTextIndex"]:
+    """Load the full-text index stored in `input_path`, or None if absent."""
+    from mdkv.services.index import INDEX_ENTRY, FullTextIndex
+
+    with zipfile.ZipFile(Path(input_path), mode="r") as zf:
+        if INDEX_ENTRY not in zf.namelist():
+            return None
+        with zf.open(INDEX_ENTRY) as f:
+            return FullTextIndex.loads(f.read().decode("utf-8"))
+
+
+class ContainerWriter:
+    """Write a `.mdkv` container track by track without holding contents in memory.
+
+    Usage::
+
+        with ContainerWriter(path, title="T", authors=["A"]) as writer:
+            with writer.open_track("primary", "primary", "en") as fp:
+                fp.write("# Heading\n")
+
+    Each track is streamed into its ZIP entry; the manifest is written on
+    close and the file only appears at `output_path` once complete.
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        title: str,
+        authors: Iterable[str] = (),
+        created: Optional[datetime] = None,
+        version: str = "0.1",
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.title = title
+        self.authors = list(authors)
+        self.created = created or datetime.utcnow()
+        self.version = version
+        self.metadata = dict(metadata or {})
+        self.tracks: List[Dict[str, Any]] = []
+        self._atomic = atomic_write(Path(output_path), "wb")
+        self._zip = zipfile.ZipFile(self._atomic.__enter__(), mode="w", compression=zipfile.ZIP_DEFLATED)
+        self._open: Optional[TextIO] = None
+        self._closed = False
+
+    def open_track(
+        self,
+        track_id: str,
+        track_type: str,
+        language: Optional[str] = None,
+        path: Optional[str] = None,
+    ) -> TextIO:
+        """Start a track entry and return a text stream for its content.
+
+        `path` defaults to `tracks/<track_id>.md`. Raises `ValueError` for a
+        duplicate `track_id`, a track `Track` would reject, an id containing a
+        path separator, or while another track is open.
+        """
+        if self._open is not None and not self._open.closed:
+            raise ValueError("previous track is still open")
+        if any(t["track_id"] == track_id for t in self.tracks):
+            raise ValueError(f"Track with id '{track_id}' already exists")
+        if "/" in track_id or "\\" in track_id:
+            raise ValueError(f"track_id must not contain path separators: {track_id}")
+        path = path or f"tracks/{track_id}.md"
+        Track(track_id, track_type, language, path, "")  # same checks as the reader
+        self.tracks.append({"track_id": track_id, "track_type": track_type, "language": language, "path": path})
+        self._open = io.TextIOWrapper(self._zip.open(path, mode="w"), encoding="utf-8", newline="")
+        return self._open
+
+    def write_track(self, track: Track) -> None:
+        with self.open_track(track.track_id, track.track_type, track.language, track.path) as fp:
+            fp.write(track.content)
+
+    def close(self) -> None:
+        """Write the manifest and move the finished container into place."""
+        self._finish(None)
+
+    def _finish(self, error: Optional[BaseException]) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        failure: Optional[BaseException] = None
+        try:
+            if self._open is not None and not self._open.closed:
+                self._open.close()
+            if error is None:
+                manifest = {
+                    "title": self.title,
+                    "authors": self.authors,
+                    "created": self.created.isoformat(),
+                    "version": self.version,
+                    "metadata": self.metadata,
+                    "tracks": self.tracks,
+                }
+                self._zip.writestr(MANIFEST_NAME, yaml.safe_dump(manifest, sort_keys=False))
+            self._zip.close()
+        except BaseException as e:
+            failure = e
+        exc = error or failure
+        if exc is None:
+            self._atomic.__exit__(None, None, None)
+        else:
+            # discards the partial file
+            self._atomic.__exit__(type(exc), exc, exc.__traceback__)
+        if failure is not None and error is None:
+            raise failure
 
+    def __enter__(self) -> "ContainerWriter":
+        return self
 
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self._finish(exc)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+"""Container-level validation of `.mdkv` files.
+
+`validate_container` checks a container against the format rules without
+building an `MDKVDocument`: the manifest schema, presence of every referenced
+entry, track path rules, duplicate ids and paths, and UTF-8 validity of track
+files. Entries are decoded incrementally in fixed-size chunks, so memory does
+not grow with track size. `validate_containers` runs it across a process pool.
+"""
+
+import codecs
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import yaml
+
+from mdkv.core.model import allowed_track_types
+from mdkv.core.validate import ValidationIssue
+
+from .io import MANIFEST_NAME, read_manifest
+
+
+_CHUNK = 1 << 16
+
+
+def _check_path(path: Any) -> Optional[str]:
+    """Return why `path` is not a valid track path, or None."""
+    if not isinstance(path, str) or not path:
+        return "path must be a non-empty string"
+    if not path.startswith("tracks/"):
+        return "path must begin with 'tracks/'"
+    if "\\" in path or ".." in PurePosixPath(path).parts:
+        return "path must not contain '..' or backslashes"
+    return None
+
+
+def _check_utf8(zf: zipfile.ZipFile, entry: str) -> Optional[str]:
+    """Decode `entry` chunk by chunk; return an error message or None."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    offset = 0
+    try:
+        with zf.open(entry) as f:
+            while True:
+                chunk = f.read(_CHUNK)
+                decoder.decode(chunk, final=not chunk)
+                if not chunk:
+                    return None
+                offset += len(chunk)
+    except UnicodeDecodeError as e:
+        return f"invalid UTF-8 near byte {offset + e.start}"
+    except (zipfile.BadZipFile, OSError, EOFError) as e:
+        return f"unreadable entry: {e}"
+
+
+def _check_metadata(manifest: Dict[str, Any], issues: List[ValidationIssue]) -> None:
+    title = manifest.get("title")
+    if not isinstance(title, str) or not title:
+        issues.append(ValidationIssue("ERROR", "title is required", entry=MANIFEST_NAME))
+    authors = manifest.get("authors")
+    if not isinstance(authors, list) or not authors:
+        issues.append(ValidationIssue("ERROR", "at least one author is required", entry=MANIFEST_NAME))
+    elif not all(isinstance(a, str) for a in authors):
+        issues.append(ValidationIssue("ERROR", "authors must be strings", entry=MANIFEST_NAME))
+    created = manifest.get("created")
+    try:
+        # YAML may already have resolved an unquoted timestamp
+        if not isinstance(created, datetime):
+            datetime.fromisoformat(created)
+    except (TypeError, ValueError):
+        issues.append(ValidationIssue("ERROR", "created must be an ISO-8601 datetime", entry=MANIFEST_NAME))
+    if "version" in manifest and not isinstance(manifest["version"], str):
+        issues.append(ValidationIssue("WARN", "version should be a string", entry=MANIFEST_NAME))
+    if not isinstance(manifest.get("metadata", {}), dict):
+        issues.append(ValidationIssue("ERROR", "metadata must be a mapping", entry=MANIFEST_NAME))
+
+
+def _check_tracks(zf: zipfile.ZipFile, tracks: List[Any], issues: List[ValidationIssue]) -> None:
+    names = set(zf.namelist())
+    allowed = set(allowed_track_types())
+    ids: Set[str] = set()
+    paths: Set[str] = set()
+    has_primary = False
+    for index, t in enumerate(tracks):
+        if not isinstance(t, dict):
+            issues.append(ValidationIssue("ERROR", f"track #{index} must be a mapping", entry=MANIFEST_NAME))
+            continue
+        track_id = t.get("track_id")
+        tid = track_id if isinstance(track_id, str) else None
+        if not tid:
+            issues.append(ValidationIssue("ERROR", f"track #{index} has no track_id", entry=MANIFEST_NAME))
+        elif tid in ids:
+            issues.append(ValidationIssue("ERROR", f"duplicate track_id '{tid}'", track_id=tid, entry=MANIFEST_NAME))
+        else:
+            ids.add(tid)
+        track_type = t.get("track_type")
+        if track_type not in allowed:
+            issues.append(ValidationIssue("ERROR", f"unsupported track_type: {track_type}", track_id=tid))
+        has_primary = has_primary or track_type == "primary"
+        language = t.get("language")
+        if language is not None and not isinstance(language, str):
+            issues.append(ValidationIssue("ERROR", "language must be a string or null", track_id=tid))
+        path = t.get("path")
+        problem = _check_path(path)
+        if problem is not None:
+            issues.append(ValidationIssue("ERROR", problem, track_id=tid, entry=path if isinstance(path, str) else None))
+            continue
+        if path in paths:
+            issues.append(ValidationIssue("ERROR", "path is used by another track", track_id=tid, entry=path))
+            continue
+        paths.add(path)
+        if not path.endswith(".md"):
+            issues.append(ValidationIssue("WARN", "track path should end with '.md'", track_id=tid, entry=path))
+        if path not in names:
+            issues.append(ValidationIssue("ERROR", "track file is missing", track_id=tid, entry=path))
+            continue
+        problem = _check_utf8(zf, path)
+        if problem is not None:
+            issues.append(ValidationIssue("ERROR", problem, track_id=tid, entry=path))
+        rendered = t.get("rendered")
+        if rendered and rendered not in names:
+            issues.append(ValidationIssue("WARN", "rendered HTML entry is missing", track_id=tid, entry=rendered))
+    if not has_primary:
+        issues.append(ValidationIssue("ERROR", "primary track is required", entry=MANIFEST_NAME))
+    for name in sorted(names):
+        if name.startswith("tracks/") and not name.endswith("/") and name not in paths:
+            issues.append(ValidationIssue("WARN", "entry is not referenced by the manifest", entry=name))
+
+
+def validate_container(path: Path) -> List[ValidationIssue]:
+    """Validate the container at `path` against the format rules.
+
+    Returns every issue found (empty when valid); unlike `validate_document`
+    it never raises for invalid input.
+    """
+    issues: List[ValidationIssue] = []
+    try:
+        zf = zipfile.ZipFile(Path(path), mode="r")
+    except (zipfile.BadZipFile, OSError) as e:
+        return [ValidationIssue("ERROR", f"not a readable ZIP container: {e}")]
+    with zf:
+        try:
+            manifest = read_manifest(zf)
+        except KeyError:
+            return [ValidationIssue("ERROR", "manifest is missing", entry=MANIFEST_NAME)]
+        except (yaml.YAMLError, UnicodeDecodeError, zipfile.BadZipFile, OSError) as e:
+            return [ValidationIssue("ERROR", f"manifest is unreadable: {e}", entry=MANIFEST_NAME)]
+        if not isinstance(manifest, dict):
+            return [ValidationIssue("ERROR", "manifest must be a mapping", entry=MANIFEST_NAME)]
+        _check_metadata(manifest, issues)
+        tracks = manifest.get("tracks", [])
+        if not isinstance(tracks, list):
+            issues.append(ValidationIssue("ERROR", "tracks must be a list", entry=MANIFEST_NAME))
+            tracks = []
+        _check_tracks(zf, tracks, issues)
+    return issues
+
+
+def validate_containers(
+    paths: Iterable[Path],
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[Path, List[ValidationIssue]]]:
+    """Yield `(path, issues)` for each container, in input order.
+
+    `workers` is the process count (defaults to CPU count); `<= 1` validates
+    in-process. Paths are sent to workers in chunks to amortize dispatch cost.
+    """
+    paths = [Path(p) for p in paths]
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield path, validate_container(path)
+        return
+    chunksize = max(1, min(64, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(paths, executor.map(validate_container, paths, chunksize=chunksize))
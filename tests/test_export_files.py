@@ -15,3 +15,18 @@ def test_export_to_files(tmp_path: Path):
     assert (outdir / "n.md").read_text(encoding="utf-8").strip() == "note"
 
 
+def test_export_to_files_skips_unchanged_and_prunes(tmp_path: Path):
+    doc = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    doc.add_track(Track("p", "primary", "en", "tracks/p.md", "# H"))
+    doc.add_track(Track("n", "commentary", None, "tracks/n.md", "note"))
+    doc.add_track(Track("x", "commentary", None, "tracks/x.md", "extra"))
+    outdir = tmp_path / "out"
+    assert export_to_files(doc, outdir).written == 3
+    mtime = (outdir / "p.md").stat().st_mtime_ns
+    doc.update_track_content("n", "new note")
+    doc.remove_track("x")
+    (outdir / "keep.txt").write_text("other")
+    report = export_to_files(doc, outdir, prune=True)
+    assert (report.written, report.skipped, report.deleted) == (1, 1, 1)
+    assert (outdir / "p.md").stat().st_mtime_ns == mtime
+    assert sorted(p.name for p in outdir.iterdir()) == ["keep.txt", "n.md", "p.md"]
@@ -0,0 +1,50 @@
+import io
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.demo import build_multitrack_demo_document
+from mdkv.services.export import to_html, to_markdown, write_html, write_markdown
+from mdkv.storage import save_mdkv
+
+
+class _Sink(io.TextIOBase):
+    """Writable text stream that only counts characters."""
+
+    def __init__(self) -> None:
+        self.chars = 0
+
+    def write(self, s: str) -> int:
+        self.chars += len(s)
+        return len(s)
+
+
+def test_streamed_output_matches_string_export(tmp_path: Path):
+    doc = build_multitrack_demo_document()
+    md, html = io.StringIO(), io.StringIO()
+    write_markdown(doc, md)
+    write_html(doc, html)
+    assert md.getvalue() == to_markdown(doc) and html.getvalue() == to_html(doc)
+    path = tmp_path / "d.mdkv"
+    save_mdkv(doc, path)
+    out = tmp_path / "d.html"
+    r = CliRunner().invoke(main, ["export", str(path), "--html", "--out", str(out)])
+    assert r.exit_code == 0 and out.read_text(encoding="utf-8") == to_html(doc)
+
+
+def test_write_html_peak_memory_bounded_by_block():
+    content = "".join(f"## Part {i}\n\nParagraph {i} with *emphasis* and [a ref][r].\n\n" for i in range(3000))
+    doc = MDKVDocument(title="Big", authors=["A"], created=datetime(2025, 1, 1))
+    doc.add_track(Track("primary", "primary", "en", "tracks/primary.md", content + "[r]: /ref\n"))
+    write_html(doc, _Sink())  # warm up parser internals
+    sink = _Sink()
+    tracemalloc.start()
+    write_html(doc, sink)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert sink.chars > len(content)
+    assert peak < len(content) // 8
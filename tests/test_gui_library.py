@@ -0,0 +1,47 @@
+import shutil
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from mdkv.gui.server import create_app, state
+
+
+def _library(tmp_path: Path, monkeypatch) -> Path:
+    root = tmp_path / "library"
+    shutil.copytree("library/definitions", root / "definitions")
+    for name, value in (("library_dir", root), ("library_build", None), ("library_build_started", 0.0), ("catalog", None)):
+        monkeypatch.setattr(state, name, value)
+    return root
+
+
+def test_library_endpoint_builds_in_background_and_queries_catalog(tmp_path: Path, monkeypatch):
+    root = _library(tmp_path, monkeypatch)
+    c = TestClient(create_app())
+    first = c.get("/api/library").json()
+    # nothing was built yet: the request only started the background build
+    assert first["files"] == [] and first["total"] == 0
+    state.library_build.join()
+    r = c.get("/api/library", params={"language": "es", "track_type": "translation"}).json()
+    assert "bilingual_es.mdkv" in {f["name"] for f in r["files"]} and r["building"] is False
+    assert all(Path(f["path"]).parent == root / "_built" for f in r["files"])
+    page = c.get("/api/library", params={"sort": "size", "order": "desc", "offset": 1, "limit": 2}).json()
+    sizes = [f["size"] for f in c.get("/api/library", params={"sort": "size", "order": "desc"}).json()["files"]]
+    assert page["total"] == 6 and [f["size"] for f in page["files"]] == sizes[1:3]
+    assert c.get("/api/library", params={"q": "SMALL"}).json()["files"][0]["name"] == "small_en.mdkv"
+    assert c.get("/api/library", params={"sort": "bogus"}).status_code == 400
+    assert c.get("/api/library", params={"order": "sideways"}).status_code == 400
+
+
+def test_library_endpoint_refreshes_changed_definitions(tmp_path: Path, monkeypatch):
+    root = _library(tmp_path, monkeypatch)
+    c = TestClient(create_app())
+    c.get("/api/library")
+    state.library_build.join()
+    definition = root / "definitions" / "small_en.yaml"
+    definition.write_text(definition.read_text(encoding="utf-8").replace("title: ", "title: Renamed ", 1), encoding="utf-8")
+    # within the refresh interval the catalog is served as is
+    assert c.get("/api/library", params={"q": "renamed"}).json()["total"] == 0
+    state.library_build_started = 0.0
+    c.get("/api/library")
+    state.library_build.join()
+    assert [f["name"] for f in c.get("/api/library", params={"q": "renamed"}).json()["files"]] == ["small_en.mdkv"]
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.core.validate import IncrementalValidator
+from mdkv.gui.server import create_app, state
+
+
+def _doc():
+    doc = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    doc.add_track(Track("primary", "primary", "en", "tracks/primary.md", "Hello"))
+    doc.add_track(Track("fr", "translation", None, "tracks/fr.md", "Bonjour"))
+    doc.add_track(Track("notes", "commentary", None, "tracks/notes.md", ""))
+    return doc
+
+
+def test_only_changed_tracks_are_rechecked():
+    doc = _doc()
+    validator = IncrementalValidator()
+    first = validator.validate(doc)
+    assert validator.checked_tracks == 3
+    assert {(i.track_id, i.message) for i in first} == {
+        ("fr", "translation track has no language"),
+        ("notes", "track is empty"),
+    }
+    assert validator.validate(doc) == first and validator.checked_tracks == 0
+
+    doc.update_track_content("notes", "Some notes")
+    doc.update_track_content("primary", "Hello")  # new object, same content
+    issues = validator.validate(doc)
+    assert validator.checked_tracks == 1
+    assert [i.track_id for i in issues] == ["fr"]
+
+    doc.remove_track("primary")
+    assert [i.message for i in validator.validate(doc)][0] == "primary track is required"
+    assert validator.checked_tracks == 0
+
+
+def test_validate_endpoint_reports_issues():
+    state.doc = _doc()
+    state.validator = IncrementalValidator()
+    c = TestClient(create_app())
+    body = c.post("/api/validate").json()
+    assert body["ok"] is True and body["checked_tracks"] == 3
+    assert {i["track_id"] for i in body["issues"]} == {"fr", "notes"}
+    state.doc.title = ""
+    body = c.post("/api/validate").json()
+    assert body["ok"] is False and body["error"] == "title is required" and body["checked_tracks"] == 0
@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from mdkv.library import build_all_examples
+from mdkv.library import LIBRARY_CATALOG, LibraryCatalog, build_all_examples, build_library
 from mdkv.storage import load_mdkv
 from mdkv.core.validate import validate_document
 
@@ -29,3 +29,65 @@ def test_library_build_and_validate(tmp_path: Path):
     assert rev and "revision" in rev[1]
 
 
+def test_library_build_is_incremental(tmp_path: Path):
+    defs = tmp_path / "defs"
+    defs.mkdir()
+    for src in sorted(Path("library/definitions").glob("*.yaml")):
+        (defs / src.name).write_bytes(src.read_bytes())
+    out = tmp_path / "built"
+    first = build_library(defs, out, workers=1)
+    assert first.built == len(first.outputs) and first.skipped == 0
+    assert build_library(defs, out, workers=1).to_dict()["skipped"] == first.built
+
+    changed, removed = sorted(defs.glob("*.yaml"))[:2]
+    changed.write_text(changed.read_text(encoding="utf-8").replace("title:", "title: Changed", 1), encoding="utf-8")
+    removed.unlink()
+    mtimes = {p.name: p.stat().st_mtime_ns for p in out.glob("*.mdkv")}
+    report = build_library(defs, out, workers=1)
+    assert (report.built, report.skipped, report.removed) == (1, first.built - 2, 1)
+    assert load_mdkv(out / (changed.stem + ".mdkv")).title.startswith("Changed")
+    assert not (out / (removed.stem + ".mdkv")).exists()
+    untouched = {p.name: p.stat().st_mtime_ns for p in out.glob("*.mdkv") if p.stem != changed.stem}
+    assert all(mtimes[name] == mtime for name, mtime in untouched.items())
+
+
+def test_library_catalog_query(tmp_path: Path):
+    out = tmp_path / "built"
+    build_library(Path("library/definitions"), out, workers=1)
+    catalog = LibraryCatalog.load(out / LIBRARY_CATALOG)
+    assert len(catalog) == len(list(out.glob("*.mdkv")))
+    total, page = catalog.query(language="es", track_type="translation")
+    assert total >= 1 and "bilingual_es.mdkv" in {d["name"] for d in page}
+    bilingual = next(d for d in page if d["name"] == "bilingual_es.mdkv")
+    assert bilingual["title"] == load_mdkv(out / "bilingual_es.mdkv").title and bilingual["tracks"] == 4
+    total, page = catalog.query(sort="size", descending=True, limit=2)
+    assert total == len(catalog) and len(page) == 2 and page[0]["size"] >= page[1]["size"]
+    assert catalog.query(q="BILINGUAL")[1][0]["name"] == "bilingual_es.mdkv"
+    assert catalog.query(q="no such document") == (0, [])
+
+
+def test_library_multi_document_definitions(tmp_path: Path):
+    defs = tmp_path / "defs"
+    (defs / "text").mkdir(parents=True)
+    (defs / "text" / "main.md").write_text("# From file\n", encoding="utf-8")
+    (defs / "book.yaml").write_text(
+        "title: Book\nauthors: [A]\ntracks:\n  - {id: main, type: primary, content_file: text/main.md}\n"
+        "---\ntitle: Second\nauthors: [A]\ntracks:\n  - {id: main, type: primary, content: '# Two'}\n"
+        "---\nname: notes\ntitle: Notes\nauthors: [A]\ntracks:\n  - {id: main, type: primary}\n",
+        encoding="utf-8",
+    )
+    out = tmp_path / "built"
+    report = build_library(defs, out, workers=1)
+    assert [p.name for p in report.outputs] == ["book-2.mdkv", "book.mdkv", "notes.mdkv"]
+    assert load_mdkv(out / "book.mdkv").get_track("main").content == "# From file\n"
+    assert build_library(defs, out, workers=1).skipped == 1
+
+    (defs / "text" / "main.md").write_text("# Changed on disk\n", encoding="utf-8")
+    assert build_library(defs, out, workers=1).built == 1
+    assert load_mdkv(out / "book.mdkv").get_track("main").content == "# Changed on disk\n"
+
+
+def test_library_builds_are_reproducible(tmp_path: Path):
+    first = build_all_examples(Path("library/definitions"), tmp_path / "a", workers=1)
+    second = build_all_examples(Path("library/definitions"), tmp_path / "b", workers=1)
+    assert [p.read_bytes() for p in first] == [p.read_bytes() for p in second]
@@ -0,0 +1,57 @@
+import io
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.export import to_markdown
+from mdkv.services.markdown_import import from_markdown, import_markdown
+from mdkv.storage import load_mdkv, save_mdkv
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="Round trip", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("primary", "primary", "en", "tracks/primary.md", "# Title\n\nBody\n"))
+    d.add_track(Track("empty", "commentary", None, "tracks/empty.md", ""))
+    d.add_track(Track("blank", "commentary", "en", "tracks/blank.md", "\n\nstarts blank\n\n\n"))
+    d.add_track(Track("es", "translation", "es", "tracks/es.md", "sin salto final"))
+    return d
+
+
+def _tracks(doc: MDKVDocument) -> list:
+    return [(t.track_id, t.track_type, t.language, t.content) for t in doc.tracks.values()]
+
+
+def test_round_trip_from_markdown_and_container(tmp_path: Path):
+    doc = _doc()
+    text = to_markdown(doc)
+    imported = from_markdown(io.StringIO(text), authors=["A"])
+    assert imported.title == "Round trip" and _tracks(imported) == _tracks(doc)
+    out = tmp_path / "rt.mdkv"
+    assert import_markdown(io.StringIO(text), out, authors=["A"]) == 4
+    assert _tracks(load_mdkv(out)) == _tracks(doc)
+    plain = from_markdown(io.StringIO("# Just markdown\n"), title="Plain")
+    assert _tracks(plain) == [("primary", "primary", None, "# Just markdown\n")]
+
+
+def test_cli_import_markdown(tmp_path: Path):
+    src = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), src)
+    md = tmp_path / "doc.md"
+    assert CliRunner().invoke(main, ["export", str(src), "--out", str(md)]).exit_code == 0
+    out = tmp_path / "back.mdkv"
+    r = CliRunner().invoke(main, ["import-markdown", str(md), str(out), "--author", "B"])
+    assert r.exit_code == 0, r.output
+    back = load_mdkv(out)
+    assert back.authors == ["B"] and _tracks(back) == _tracks(_doc())
+
+
+def test_import_rejects_headers_the_reader_would_reject(tmp_path: Path):
+    for header in ("<!-- track:x type:bogus lang:en -->", "<!-- track:../evil type:primary lang:en -->"):
+        out = tmp_path / "out.mdkv"
+        with pytest.raises(ValueError):
+            import_markdown(io.StringIO(f"<!-- MDKV: T -->\n\n{header}\n\ntext\n"), out)
+        assert not out.exists()
@@ -0,0 +1,69 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.export import to_markdown
+
+
+def _doc(n_tracks: int = 50) -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("primary", "primary", "en", "tracks/primary.md", "v0|" * 100))
+    for i in range(n_tracks):
+        d.add_track(Track(f"n{i}", "commentary", None, f"tracks/n{i}.md", "v0|" * 100))
+    return d
+
+
+def test_snapshot_is_immutable_and_shares_unchanged_tracks():
+    d = _doc()
+    snap = d.snapshot()
+    with pytest.raises(TypeError):
+        snap.tracks["x"] = snap.tracks["primary"]  # type: ignore[index]
+    d.update_track_content("n3", "changed")
+    d.rename_track("n4", "renamed")
+    d.title = "New"
+    after = d.snapshot()
+    assert snap.title == "T" and snap.tracks["n3"].content.startswith("v0|")
+    assert "n4" in snap.tracks and "n4" not in after.tracks
+    # copy-on-write: only the edited tracks are new objects
+    fresh = [tid for tid in snap.tracks if tid in after.tracks and after.tracks[tid] is not snap.tracks[tid]]
+    assert fresh == ["n3"]
+    assert after.tracks["n5"] is snap.tracks["n5"] is d.tracks["n5"]
+    assert all(d.snapshot().tracks[tid] is track for tid, track in after.tracks.items())
+    assert after.find_tracks_by_type("primary")[0] is snap.get_track("primary")
+
+
+def test_concurrent_writers_and_snapshot_readers_stay_consistent():
+    d = _doc(20)
+    ids = list(d.tracks)
+    stop = threading.Event()
+    failures: list[str] = []
+
+    def writer(offset: int) -> None:
+        version = 0
+        while not stop.is_set():
+            version += 1
+            tid = ids[(version + offset) % len(ids)]
+            d.update_track_content(tid, f"v{version}|" * 100)
+
+    def reader() -> None:
+        while not stop.is_set():
+            snap = d.snapshot()
+            first = to_markdown(snap)
+            for track in snap.tracks.values():
+                token = track.content[: track.content.index("|") + 1]
+                if track.content != token * 100:
+                    failures.append(track.track_id)
+            if to_markdown(snap) != first:
+                failures.append("snapshot changed while reading")
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(3)]
+    threads += [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    stop.wait(0.5)
+    stop.set()
+    for t in threads:
+        t.join()
+    assert failures == []
@@ -0,0 +1,54 @@
+import zipfile
+
+import yaml
+
+from mdkv.demo import build_multitrack_demo_document
+from mdkv.services import parse
+from mdkv.services.export import to_html
+from mdkv.storage import container_features, load_mdkv, save_mdkv
+
+
+def test_prerendered_html_seeds_render_cache(tmp_path):
+    doc = build_multitrack_demo_document()
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(doc, path, prerender=True)
+    assert container_features(path) == {"index": False, "rendered": True}
+    expected = to_html(doc)
+    parse._renders.clear()
+    loaded = load_mdkv(path)
+    assert all(parse.cached_render(t) is not None for t in loaded.tracks.values())
+    assert to_html(loaded) == expected
+
+
+def test_stale_prerendered_html_is_ignored(tmp_path):
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(build_multitrack_demo_document(), path, prerender=True)
+    with zipfile.ZipFile(path) as zf:
+        entries = {name: zf.read(name) for name in zf.namelist()}
+    manifest = yaml.safe_load(entries["manifest.yaml"])
+    primary = manifest["tracks"][0]
+    entries[primary["path"]] = b"# Edited elsewhere\n"
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    parse._renders.clear()
+    track = load_mdkv(path).tracks[primary["track_id"]]
+    assert parse.cached_render(track) is None
+    assert parse.render_track(track) == "<h1>Edited elsewhere</h1>\n"
+
+
+def test_missing_prerendered_entry_is_skipped(tmp_path):
+    doc = build_multitrack_demo_document()
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(doc, path, prerender=True)
+    with zipfile.ZipFile(path) as zf:
+        entries = {name: zf.read(name) for name in zf.namelist()}
+    primary = yaml.safe_load(entries["manifest.yaml"])["tracks"][0]
+    del entries[primary["rendered"]]
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    parse._renders.clear()
+    loaded = load_mdkv(path)
+    assert parse.cached_render(loaded.tracks[primary["track_id"]]) is None
+    assert to_html(loaded) == to_html(doc)
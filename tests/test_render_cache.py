@@ -0,0 +1,27 @@
+from markdown_it import MarkdownIt
+
+from fastapi.testclient import TestClient
+
+from mdkv.demo import build_multitrack_demo_document
+from mdkv.gui.server import create_app, state
+from mdkv.services.export import to_markdown, tracks_to_html
+from mdkv.services.parse import render_track
+
+
+def test_composed_fragments_match_full_render():
+    doc = build_multitrack_demo_document()
+    assert tracks_to_html(doc) == MarkdownIt().render(to_markdown(doc))
+    track = next(iter(doc.tracks.values()))
+    assert render_track(track) is render_track(track)
+    doc.update_track_content(track.track_id, "# Changed\n")
+    assert render_track(doc.tracks[track.track_id]) == "<h1>Changed</h1>\n"
+
+
+def test_tracks_html_endpoint_subset():
+    state.doc = build_multitrack_demo_document()
+    c = TestClient(create_app())
+    ids = list(state.doc.tracks)[:2]
+    r = c.post("/api/render/tracks_html", json={"track_ids": ids})
+    assert r.status_code == 200 and r.text == tracks_to_html(state.doc, track_ids=ids)
+    assert r.text.count("<!-- track:") == 2
+    assert c.post("/api/render/tracks_html", json={"track_ids": []}).text == "<!-- MDKV: empty selection -->"
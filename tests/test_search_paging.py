@@ -0,0 +1,54 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.search import SearchMatch, iter_search, search_document, search_page
+from mdkv.storage import save_mdkv
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("p", "primary", "en", "tracks/p.md", "ab " * 5))
+    d.add_track(Track("n", "commentary", None, "tracks/n.md", "ab ab"))
+    return d
+
+
+def test_iter_search_is_lazy_and_slotted():
+    gen = iter_search(_doc(), "ab")
+    first = next(gen)
+    assert (first.track_id, first.start, first.end) == ("p", 0, 2)
+    assert not hasattr(first, "__dict__") and SearchMatch.__slots__
+
+
+def test_limit_offset_and_cursor_pages():
+    d = _doc()
+    everything = search_document(d, "ab")
+    assert len(everything) == 7
+    assert search_document(d, "ab", limit=2, offset=4) == everything[4:6]
+    seen = []
+    cursor = None
+    while True:
+        page = search_page(d, "ab", limit=3, cursor=cursor)
+        seen.extend(page.matches)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == everything
+    with pytest.raises(ValueError):
+        search_document(d, "ab", cursor="bogus")
+
+
+def test_cli_search_limit_and_ndjson(tmp_path: Path):
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), path)
+    r = CliRunner().invoke(main, ["search", str(path), "--pattern", "ab", "--limit", "2", "--ndjson"])
+    assert r.exit_code == 0
+    rows = [json.loads(line) for line in r.output.splitlines()]
+    assert [row["start"] for row in rows] == [0, 3]
+    r2 = CliRunner().invoke(main, ["search", str(path), "--pattern", "ab", "--offset", "5"])
+    assert [row["track_id"] for row in json.loads(r2.output)] == ["n", "n"]
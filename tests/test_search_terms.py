@@ -0,0 +1,63 @@
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.search import search_document, search_terms
+from mdkv.storage import save_mdkv
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("p", "primary", "en", "tracks/p.md", "Free energy and free-energy principle (FEP)."))
+    d.add_track(Track("es", "translation", "es", "tracks/es.md", "Energía libre y principio de energía libre."))
+    return d
+
+
+def test_search_terms_tags_matches_and_prefers_longest():
+    d = _doc()
+    hits = search_terms(d, ["energy", "free energy", "FEP", "energía libre"], flags=re.IGNORECASE)
+    assert [(m.track_id, m.term, d.tracks[m.track_id].content[m.start:m.end]) for m in hits] == [
+        ("p", "free energy", "Free energy"),
+        ("p", "energy", "energy"),
+        ("p", "FEP", "FEP"),
+        ("es", "energía libre", "Energía libre"),
+        ("es", "energía libre", "energía libre"),
+    ]
+
+
+def test_search_terms_matches_looped_search_and_filters():
+    d = _doc()
+    terms = ["principle", "principio", "libre"]
+    looped = sorted(
+        (m.track_id, m.start) for t in terms for m in search_document(d, re.escape(t), languages=["es"])
+    )
+    combined = search_terms(d, terms, languages=["es"])
+    assert sorted((m.track_id, m.start) for m in combined) == looped
+    assert [m.term for m in search_terms(d, ["free"], whole_words=True)] == ["free"]
+    assert search_terms(d, []) == []
+
+
+def test_cli_search_terms(tmp_path: Path):
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), path)
+    terms = tmp_path / "terms.txt"
+    terms.write_text("energía libre\nprincipio\n", encoding="utf-8")
+    r = CliRunner().invoke(main, ["search-terms", str(path), "--terms-file", str(terms), "--ignore-case"])
+    assert r.exit_code == 0
+    assert [json.loads(line)["term"] for line in r.output.splitlines()] == ["energía libre", "principio", "energía libre"]
+
+
+def test_search_terms_whole_words_with_symbols_and_both_scan_paths(monkeypatch):
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    text = "C++ and .NET, not C++11 or x.NETy; Ca, cab, CAB."
+    d.add_track(Track("p", "primary", "en", "tracks/p.md", text))
+    terms = ["C++", ".NET", "ca", "cab"]
+    spans = [(m.start, m.term) for m in search_terms(d, terms, flags=re.IGNORECASE, whole_words=True)]
+    assert spans == [(0, "C++"), (8, ".NET"), (text.index("Ca"), "ca"), (text.index("cab"), "cab"), (text.index("CAB"), "cab")]
+    monkeypatch.setattr("mdkv.services.search._FIND_MAX_TERMS", 0)
+    assert [(m.start, m.term) for m in search_terms(d, terms, flags=re.IGNORECASE, whole_words=True)] == spans
@@ -0,0 +1,51 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.align import align_matches, aligned_segments, alignment_for
+from mdkv.services.search import search_document
+from mdkv.storage import save_mdkv
+
+
+EN = "# Guide\n\nIntro.\n\n## Setup\n\nInstall it.\n\nThen run it.\n\n<!-- align:faq -->\nAsk us.\n"
+ES = "# Guía\n\nIntroducción.\n\n## Instalación\n\nInstálalo.\n\nLuego ejecútalo.\n\nNota extra.\n\n<!-- align:faq -->\nPregúntanos.\n"
+FR = "# Guide\n\nIntroduction.\n\n## Installation\n\nInstallez-le.\n"
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("primary", "primary", "en", "tracks/primary.md", EN))
+    d.add_track(Track("es", "translation", "es", "tracks/es.md", ES))
+    d.add_track(Track("fr", "translation", "fr", "tracks/fr.md", FR))
+    d.add_track(Track("notes", "commentary", None, "tracks/notes.md", "Intro."))
+    return d
+
+
+def test_alignment_by_structure_and_anchor():
+    d = _doc()
+    source, aligned = aligned_segments(d, "primary", EN.index("Then"))
+    assert source is not None and source.text == "Then run it." and source.key == ("p", (1, 1), 1)
+    assert [(s.track_id, s.text) for s in aligned] == [("es", "Luego ejecútalo.")]
+    _, faq = aligned_segments(d, "primary", EN.index("Ask"))
+    assert [(s.track_id, s.text) for s in faq] == [("es", "Pregúntanos.")]
+    _, heading = aligned_segments(d, "es", ES.index("Instalación"))
+    assert [(s.track_id, s.text) for s in heading] == [("primary", "## Setup"), ("fr", "## Installation")]
+    assert alignment_for(d.tracks["es"]) is alignment_for(d.tracks["es"])
+
+
+def test_align_matches_and_cli(tmp_path: Path):
+    d = _doc()
+    pairs = list(align_matches(d, search_document(d, "Install", track_types=["primary"])))
+    assert [[s.text for s in aligned] for _, aligned in pairs] == [["Instálalo.", "Installez-le."]]
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(d, path)
+    r = CliRunner().invoke(main, ["align", str(path), "--pattern", "Intro"])
+    out = json.loads(r.output)
+    assert r.exit_code == 0 and [a["text"] for a in out["aligned"]] == ["Introducción.", "Introduction."]
+    r2 = CliRunner().invoke(main, ["search", str(path), "--pattern", "run", "--types", "primary", "--aligned"])
+    rows = json.loads(r2.output)
+    assert [a["language"] for a in rows[0]["aligned"]] == ["es"]
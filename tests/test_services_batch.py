@@ -0,0 +1,74 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.common.fs import atomic_write
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.batch import export_batch
+from mdkv.services.export import to_html
+from mdkv.storage import iter_mdkv_paths, load_mdkv, save_mdkv
+
+
+def _corpus(root: Path, count: int = 4) -> list:
+    paths = []
+    for i in range(count):
+        d = MDKVDocument(title=f"D{i}", authors=["A"], created=datetime(2025, 1, 1))
+        d.add_track(Track("primary", "primary", "en", "tracks/primary.md", f"# Doc {i}\n"))
+        d.add_track(Track("notes", "commentary", None, "tracks/notes.md", "note"))
+        p = root / ("sub" if i % 2 else "") / f"d{i}.mdkv"
+        save_mdkv(d, p)
+        paths.append(p)
+    return paths
+
+
+def test_batch_skips_unchanged_and_retries_failures(tmp_path: Path):
+    src = tmp_path / "src"
+    paths = _corpus(src)
+    (src / "broken.mdkv").write_bytes(b"not a zip")
+    out = tmp_path / "out"
+    first = export_batch(iter_mdkv_paths(src), out, fmt="html", workers=2)
+    assert (first.exported, first.skipped, len(first.failures)) == (4, 0, 1)
+    assert (out / "sub" / "d1.html").read_text(encoding="utf-8") == to_html(load_mdkv(paths[1]))
+    doc = load_mdkv(paths[0])
+    doc.update_track_content("primary", "# Changed\n")
+    save_mdkv(doc, paths[0])
+    seen = []
+    second = export_batch(iter_mdkv_paths(src), out, fmt="html", workers=1, progress=lambda *a: seen.append(a[3]))
+    assert (second.exported, second.skipped, len(second.failures)) == (1, 3, 1)
+    assert sorted(seen) == ["exported", "failed", "skipped", "skipped", "skipped"]
+    (out / "sub" / "d3.html").unlink()
+    assert export_batch(paths, out, fmt="html", workers=1, base=src).exported == 1
+
+
+def test_cli_export_batch_files(tmp_path: Path):
+    _corpus(tmp_path / "src", count=2)
+    out = tmp_path / "out"
+    r = CliRunner().invoke(main, ["export-batch", str(tmp_path / "src"), "--out", str(out), "--format", "files", "--quiet"])
+    assert r.exit_code == 0 and json.loads(r.output)["exported"] == 2
+    assert sorted(p.name for p in (out / "sub" / "d1").iterdir()) == ["notes.md", "primary.md"]
+
+
+def test_cli_export_batch_layout_survives_removed_sources(tmp_path: Path):
+    paths = _corpus(tmp_path / "src", count=2)
+    out = tmp_path / "out"
+    args = ["export-batch", str(tmp_path / "src"), "--out", str(out), "--quiet"]
+    assert CliRunner().invoke(main, args).exit_code == 0
+    paths[0].unlink()
+    r = CliRunner().invoke(main, args)
+    assert r.exit_code == 0 and json.loads(r.output)["skipped"] == 1
+    assert sorted(p.relative_to(out).as_posix() for p in out.rglob("*.md")) == ["sub/d1.md"]
+
+
+def test_atomic_write_applies_umask_without_changing_it(tmp_path: Path):
+    old = os.umask(0o027)
+    try:
+        with atomic_write(tmp_path / "out.txt") as fp:
+            fp.write("x")
+        assert os.umask(0o027) == 0o027
+    finally:
+        os.umask(old)
+    assert (tmp_path / "out.txt").stat().st_mode & 0o777 == 0o640
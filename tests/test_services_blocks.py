@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+from markdown_it import MarkdownIt
+
+from mdkv.demo import build_multitrack_demo_document
+from mdkv.gui.server import create_app, state
+from mdkv.services.blocks import IncrementalRenderer, iter_block_html, iter_blocks, render_blocks
+
+
+CONTENT = (
+    "# Title\n\nSee [the docs][d].\n\n1. one\n\n2. two\n\n```\ncode\n\nmore\n```\n\n"
+    "<!--\nnote\n\nstill note\n-->\n\n    indented\n\n[d]: /docs\n"
+)
+
+
+def test_blocks_render_like_whole_document():
+    # the indented code after the comment stays attached (no cut before indented lines)
+    spans = list(iter_blocks(CONTENT))
+    assert [CONTENT[s:e].split("\n")[0] for s, e in spans] == ["# Title", "See [the docs][d].", "1. one", "```", "<!--", "[d]: /docs"]
+    assert "".join(b.html for b in render_blocks(CONTENT)) == MarkdownIt().render(CONTENT)
+
+
+def test_incremental_changes_and_reference_definitions():
+    renderer = IncrementalRenderer()
+    first = renderer.render(CONTENT, key="t")
+    assert [(c.old_start, c.old_end, c.new_start, c.new_end) for c in first.changes] == [(0, 0, 0, 6)]
+    edited = renderer.render(CONTENT.replace("# Title", "# Renamed"), key="t")
+    assert [(c.new_start, c.new_end) for c in edited.changes] == [(0, 1)]
+    relinked = renderer.render(CONTENT.replace("/docs", "/guide"), key="t")
+    # back to "# Title", and the link block depends on the definition, so it changes with it
+    assert [(c.new_start, c.new_end) for c in relinked.changes] == [(0, 2), (5, 6)]
+    assert 'href="/guide"' in relinked.html
+
+
+def test_track_blocks_endpoint():
+    state.doc = build_multitrack_demo_document()
+    tid = next(iter(state.doc.tracks))
+    c = TestClient(create_app())
+    r = c.get("/api/render/track_blocks", params={"track_id": tid}).json()
+    assert r["html"] == "".join(b["html"] for b in r["blocks"])
+    again = c.get("/api/render/track_blocks", params={"track_id": tid}).json()
+    assert again["changes"] == []
+
+
+def test_blocks_match_whole_render_for_fence_and_html_edge_cases():
+    cases = [
+        "- ```\n\n\n",  # unclosed fence in a list item, blank lines at EOF
+        "- ```\ncode\n\nmore\n\ntext\n",  # blank lines inside an item's fence
+        "- item\n  ```\n```\n\nx\n",  # item fence ended by a less indented line
+        "<span>\n```\n\ntext\n",  # a lone tag line: the fence is HTML, not code
+        "<div>\n```\n\n# h\n",
+        "> q\n2) a\n\n2) b\n",  # ordered lists start at any number after non-paragraphs
+        "    code\n2) a\n\n2) b\n",
+        "<!-- c -->\n2) a\n \n2) b",
+        "[a]: /x\n3. b\n \n3. b\n",
+    ]
+    for content in cases:
+        expected = MarkdownIt().render(content)
+        assert "".join(b.html for b in render_blocks(content)) == expected, content
+        assert "".join(iter_block_html(content)) == expected, content
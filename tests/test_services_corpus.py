@@ -0,0 +1,50 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.corpus import search_corpus
+from mdkv.storage import iter_mdkv_paths, load_mdkv, save_mdkv
+
+
+def _corpus(root: Path, count: int = 6) -> list:
+    paths = []
+    for i in range(count):
+        d = MDKVDocument(title=f"D{i}", authors=["A"], created=datetime(2025, 1, 1))
+        d.add_track(Track("primary", "primary", "en", "tracks/primary.md", f"alpha {i} alpha"))
+        d.add_track(Track("es", "translation", "es", "tracks/es.md", "alpha uno"))
+        p = root / ("sub" if i % 2 else "") / f"d{i}.mdkv"
+        save_mdkv(d, p)
+        paths.append(p)
+    (root / "ignored.txt").write_text("alpha")
+    return paths
+
+
+def test_filtered_load_and_path_resolution(tmp_path: Path):
+    paths = _corpus(tmp_path)
+    assert iter_mdkv_paths(tmp_path) == sorted(paths)
+    assert iter_mdkv_paths(str(tmp_path / "sub" / "*.mdkv")) == sorted(p for p in paths if p.parent.name == "sub")
+    assert iter_mdkv_paths(paths[0]) == [paths[0]]
+    assert list(load_mdkv(paths[0], languages=["es"]).tracks) == ["es"]
+
+
+def test_search_corpus_serial_and_parallel(tmp_path: Path):
+    paths = _corpus(tmp_path)
+    (tmp_path / "broken.mdkv").write_text("not a zip")
+    serial = list(search_corpus(iter_mdkv_paths(tmp_path), "alpha", workers=1, track_types=["primary"]))
+    assert len(serial) == 12 and {m.track_id for _, m in serial} == {"primary"}
+    parallel = list(search_corpus(iter_mdkv_paths(tmp_path), "alpha", workers=2, languages=["es"]))
+    assert sorted(str(p) for p, _ in parallel) == sorted(str(p) for p in paths)
+    limited = list(search_corpus(paths, "alpha", workers=2, limit=3))
+    assert len(limited) == 3
+
+
+def test_cli_search_corpus_ndjson(tmp_path: Path):
+    _corpus(tmp_path, count=2)
+    r = CliRunner().invoke(main, ["search-corpus", str(tmp_path), "--pattern", "uno", "--workers", "1"])
+    assert r.exit_code == 0
+    rows = [json.loads(line) for line in r.output.splitlines()]
+    assert len(rows) == 2 and all(row["track_id"] == "es" for row in rows)
@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.index import FullTextIndex, parse_query, query_document
+from mdkv.storage import load_index, load_mdkv, save_mdkv
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("p", "primary", "en", "tracks/p.md", "The free energy principle.\n\nFree energy bounds surprise."))
+    d.add_track(Track("es", "translation", "es", "tracks/es.md", "El principio de energía libre."))
+    d.add_track(Track("n", "commentary", None, "tracks/n.md", "energy free"))
+    return d
+
+
+def test_terms_phrases_and_filters():
+    d = _doc()
+    index = FullTextIndex.build(d)
+    assert parse_query('"free energy" surprise') == [["free", "energy"], ["surprise"]]
+    phrase = index.search(d, '"free energy"')
+    assert [(m.track_id, d.tracks[m.track_id].content[m.start:m.end]) for m in phrase] == [
+        ("p", "free energy"),
+        ("p", "Free energy"),
+    ]
+    # all query parts must occur in a track
+    assert {m.track_id for m in index.search(d, "energy surprise")} == {"p"}
+    assert {m.track_id for m in index.search(d, "energy", track_types=["commentary"])} == {"n"}
+    assert [m.track_id for m in index.search(d, "energía", languages=["es"])] == ["es"]
+    # raw patterns fall back to the regex scan
+    assert len(query_document(d, r"en\w+y", raw=True)) == 3
+
+
+def test_stale_tracks_are_reindexed():
+    d = _doc()
+    index = FullTextIndex.build(d)
+    d.update_track_content("n", "surprise")
+    assert [m.track_id for m in index.search(d, "surprise")] == ["p", "n"]
+    assert index.search(d, "energy", track_types=["commentary"]) == []
+
+
+def test_index_persisted_in_container(tmp_path: Path):
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), path)
+    assert load_index(path) is None
+    r = CliRunner().invoke(main, ["index", str(path)])
+    assert r.exit_code == 0
+    index = load_index(path)
+    assert index is not None and set(index.tracks) == {"p", "es", "n"}
+    doc = load_mdkv(path)
+    assert set(doc.tracks) == {"p", "es", "n"}
+    assert all(index.tracks[t.track_id].content_hash == t.content_hash for t in doc.tracks.values())
+    r2 = CliRunner().invoke(main, ["search", str(path), "--pattern", '"energy principle"', "--indexed"])
+    assert r2.exit_code == 0 and [m["track_id"] for m in json.loads(r2.output)] == ["p"]
+
+
+def test_track_edits_keep_stored_index(tmp_path: Path):
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), path)
+    assert CliRunner().invoke(main, ["index", str(path)]).exit_code == 0
+    r = CliRunner().invoke(main, ["update-track", str(path), "--id", "n", "--content", "surprise"])
+    assert r.exit_code == 0
+    index = load_index(path)
+    assert index is not None and index.tracks["n"].content_hash == load_mdkv(path).tracks["n"].content_hash
+    assert [m.track_id for m in index.search(load_mdkv(path), "surprise")] == ["p", "n"]
@@ -0,0 +1,59 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.index import FullTextIndex
+from mdkv.services.index_cache import IndexCache
+from mdkv.services.rank import TermStatsIndex, ranked_search
+from mdkv.services.trigram import TrigramIndex
+from mdkv.storage import save_mdkv
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("primary", "primary", "en", "tracks/primary.md", "# Energy\n\nFree energy principle.\n"))
+    d.add_track(Track("es", "translation", "es", "tracks/es.md", "# Energía\n\nPrincipio de energía libre.\n"))
+    return d
+
+
+def test_segments_reused_across_indexes(tmp_path: Path):
+    cache = IndexCache(tmp_path / "cache")
+    d = _doc()
+    cold = FullTextIndex.build(d, cache=cache)
+    TrigramIndex.build(d, cache=cache)
+    ranked_search(d, "energy", index=TermStatsIndex(cache=cache))
+    assert (cache.hits, cache.misses) == (0, 6)
+    warm = FullTextIndex(cache=cache)
+    assert [m.start for m in warm.search(d, "energy")] == [m.start for m in cold.search(d, "energy")]
+    d.update_track_content("es", "Otra cosa.\n")
+    TrigramIndex.build(d, cache=cache)
+    assert (cache.hits, cache.misses) == (3, 7)
+    assert ranked_search(d, "energy", index=TermStatsIndex(cache=cache))[0].track_id == "primary"
+
+
+def test_eviction_is_lru_by_mtime(tmp_path: Path):
+    cache = IndexCache(tmp_path, max_bytes=10**6)
+    for n, key in enumerate(["aa1", "bb2", "cc3"]):
+        cache.put("k", key, {"v": "x" * 200})
+        os.utime(cache._path("k", key), (n, n))
+    cache.get("k", "aa1")
+    removed = cache.evict(cache.size() - 1)
+    assert removed == 1 and cache.get("k", "bb2") is None and cache.get("k", "aa1") is not None
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_cli_search_cache(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("MDKV_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), path)
+    r = CliRunner().invoke(main, ["search", str(path), "--pattern", "energy", "--mode", "ranked", "--cache"])
+    assert r.exit_code == 0 and json.loads(r.output)[0]["track_id"] == "primary"
+    info = json.loads(CliRunner().invoke(main, ["cache"]).output)
+    assert info["bytes"] > 0
+    assert json.loads(CliRunner().invoke(main, ["cache", "--clear"]).output)["bytes"] == 0
@@ -0,0 +1,61 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.lines import LineIndex, add_context, line_index_for, snap_extract
+from mdkv.services.search import search_document
+from mdkv.storage import save_mdkv
+
+
+CONTENT = (
+    "# Guide\n"
+    "Intro text.\n"
+    "## Setup\n"
+    "```bash\n"
+    "# not a heading\n"
+    "```\n"
+    "### Install\n"
+    "Run the installer now.\n"
+    "## Usage\n"
+    "Call the installer"
+)
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("p", "primary", "en", "tracks/p.md", CONTENT))
+    return d
+
+
+def test_line_index_locates_lines_and_headings():
+    index = LineIndex(CONTENT)
+    assert index.locate(0) == (1, 1)
+    assert index.locate(CONTENT.index("installer")) == (8, 9)
+    assert index.locate(len(CONTENT)) == (10, 19)
+    assert index.heading_path(CONTENT.index("# not")) == ("Guide", "Setup")
+    assert index.heading_path(CONTENT.index("Run")) == ("Guide", "Setup", "Install")
+    assert index.heading_path(CONTENT.index("Call")) == ("Guide", "Usage")
+
+
+def test_add_context_uses_cached_index_and_snaps_extracts():
+    d = _doc()
+    assert line_index_for(d.tracks["p"]) is line_index_for(d.tracks["p"])
+    hits = list(add_context(d, search_document(d, "installer"), window=6))
+    assert [(h.line, h.column, h.heading_path) for h in hits] == [
+        (8, 9, ("Guide", "Setup", "Install")),
+        (10, 10, ("Guide", "Usage")),
+    ]
+    assert hits[0].extract == " the installer now.\n"
+    assert snap_extract("alpha beta gamma", 6, 10, window=3, snap_words=False) == "ha beta ga"
+
+
+def test_cli_search_context(tmp_path: Path):
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), path)
+    r = CliRunner().invoke(main, ["search", str(path), "--pattern", "Intro", "--context"])
+    row = json.loads(r.output)[0]
+    assert r.exit_code == 0 and (row["line"], row["column"], row["heading_path"]) == (2, 1, ["Guide"])
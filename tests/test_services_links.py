@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.links import check_corpus_links, check_links, links_for
+from mdkv.storage import save_mdkv
+
+
+def _doc(primary: str, notes: str = "# Notes\n\n## Setup\n") -> MDKVDocument:
+    doc = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    doc.add_track(Track("primary", "primary", "en", "tracks/primary.md", primary))
+    doc.add_track(Track("notes", "commentary", None, "tracks/notes.md", notes))
+    return doc
+
+
+def test_intra_document_links_and_anchors():
+    doc = _doc(
+        "# Intro *here*\n\n## Intro here\n\n<a id=\"custom\"></a>\n\n"
+        "[a](#intro-here) [b](#intro-here-1) [c](#custom) [d](notes.md#setup) [e](https://x.org/#nope)\n\n"
+        "[f](#missing) [g](notes.md#nope) [h](gone.md)\n"
+    )
+    assert {"intro-here", "intro-here-1", "custom"} <= links_for(doc.tracks["primary"]).anchors
+    issues = check_links(doc)
+    assert [i.message.split(":")[0] for i in issues] == [
+        "broken link '#missing' (line 9)",
+        "broken link 'notes.md#nope' (line 9)",
+        "broken link 'gone.md' (line 9)",
+    ]
+    assert all(i.level == "WARN" and i.track_id == "primary" for i in issues)
+
+    doc.rename_track("notes", "commentary")
+    assert any("no track at tracks/notes.md" in i.message for i in check_links(doc))
+
+
+def test_corpus_links(tmp_path):
+    save_mdkv(_doc("[ok](b.mdkv#b) [bad](b.mdkv#zzz) [t](b.mdkv/tracks/notes.md#setup) [x](c.mdkv)\n"), tmp_path / "a.mdkv")
+    save_mdkv(_doc("# B\n"), tmp_path / "b.mdkv")
+    results = dict(check_corpus_links([tmp_path / "a.mdkv", tmp_path / "b.mdkv"]))
+    messages = [i.message for i in results[tmp_path / "a.mdkv"]]
+    assert messages == [
+        "broken link 'b.mdkv#zzz' (line 1): no anchor 'zzz' in b.mdkv/tracks/primary.md",
+        "broken link 'c.mdkv' (line 1): no container at c.mdkv",
+    ]
+    assert results[tmp_path / "b.mdkv"] == []
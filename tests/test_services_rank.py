@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.analysis import get_analyzer, supported_languages
+from mdkv.services.rank import TermStatsIndex, ranked_search, split_units
+from mdkv.storage import save_mdkv
+
+
+EN = (
+    "# Intro\n\nThe brain predicts its inputs.\n\n"
+    "# Free energy\n\nMinimising free energy bounds surprise. Free energy principles guide inference.\n\n"
+    "A closing remark about energy.\n"
+)
+ES = "# Introducción\n\nEl cerebro predice sus entradas.\n\nLa energía libre acota la sorpresa.\n"
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("primary", "primary", "en", "tracks/primary.md", EN))
+    d.add_track(Track("es", "translation", "es", "tracks/es.md", ES))
+    return d
+
+
+def test_analyzers_stem_and_drop_stopwords():
+    assert set(supported_languages()) >= {"en", "es", "fr", "de"}
+    en = [t for t, _, _ in get_analyzer("en-GB").analyze("The principles of minimising")]
+    assert en == [t for t, _, _ in get_analyzer("en").analyze("principle minimise")]
+    assert [t for t, _, _ in get_analyzer("es").analyze("la energía libre")] == ["energi", "libr"]
+    assert [t for t, _, _ in get_analyzer("xx").analyze("Der Hund")] == ["der", "hund"]
+
+
+def test_ranked_search_orders_by_bm25_and_reuses_index():
+    d = _doc()
+    assert len(split_units(EN)) == 5 and len(split_units(EN, unit="section")) == 2
+    index = TermStatsIndex.build(d)
+    hits = ranked_search(d, "free energy principle", k=2, index=index)
+    assert [(h.track_id, EN[h.start:h.end].split(".")[0]) for h in hits] == [
+        ("primary", "Minimising free energy bounds surprise"),
+        ("primary", "# Free energy"),
+    ]
+    assert hits[0].score > hits[1].score
+    assert [h.track_id for h in ranked_search(d, "energía libre", index=index, languages=["es"])] == ["es"]
+    assert index.refresh(d) is False
+    d.update_track_content("es", "Nada.")
+    assert ranked_search(d, "energía", index=index, languages=["es"]) == []
+
+
+def test_cli_ranked_mode(tmp_path: Path):
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), path)
+    r = CliRunner().invoke(main, ["search", str(path), "--pattern", "surprise", "--mode", "ranked", "--limit", "1"])
+    rows = json.loads(r.output)
+    assert r.exit_code == 0 and len(rows) == 1 and rows[0]["score"] > 0
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.site import build_site
+from mdkv.storage import load_mdkv, save_mdkv
+
+
+def _doc(i: int) -> MDKVDocument:
+    d = MDKVDocument(title=f"Doc {i}", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("primary", "primary", "en", "tracks/primary.md", f"# Doc {i}\n"))
+    d.add_track(Track("es", "translation", "es", "tracks/es.md", f"# Doc {i} (es)\n"))
+    d.add_track(Track("notes", "commentary", "en", "tracks/notes.md", "An *English* note.\n"))
+    d.add_track(Track("refs", "reference", None, "tracks/refs.md", "- ref\n"))
+    return d
+
+
+def test_pages_per_language_with_side_sections(tmp_path: Path):
+    save_mdkv(_doc(0), tmp_path / "src" / "a.mdkv")
+    out = tmp_path / "site"
+    report = build_site([tmp_path / "src" / "a.mdkv"], out)
+    assert report.written == 2
+    en = (out / "a" / "en.html").read_text(encoding="utf-8")
+    es = (out / "a" / "es.html").read_text(encoding="utf-8")
+    assert '<main class="mdkv-track" data-track="primary">\n<h1>Doc 0</h1>' in en
+    assert 'data-track="notes"' in en and 'data-track="refs"' in en
+    assert 'data-track="notes"' not in es and 'data-track="refs"' in es
+    assert 'href="../assets/mdkv.css"' in es and (out / "assets" / "mdkv.css").exists()
+    assert 'href="a/en.html"' in (out / "index.html").read_text(encoding="utf-8")
+
+
+def test_rebuild_only_touches_changed_pages(tmp_path: Path):
+    src = tmp_path / "src"
+    paths = []
+    for i in range(3):
+        paths.append(src / f"d{i}.mdkv")
+        save_mdkv(_doc(i), paths[-1])
+    out = tmp_path / "site"
+    build_site(paths, out)
+    doc = load_mdkv(paths[1])
+    doc.update_track_content("es", "# Cambiado\n")
+    save_mdkv(doc, paths[1])
+    report = build_site(paths, out)
+    assert (report.written, report.skipped, report.deleted) == (1, 5, 0)
+    assert "Cambiado" in (out / "d1" / "es.html").read_text(encoding="utf-8")
+    paths[2].unlink()
+    r = CliRunner().invoke(main, ["export-site", str(src), "--out", str(out)])
+    assert r.exit_code == 0 and json.loads(r.output)["deleted"] == 2
+    assert not (out / "d2").exists()
+
+
+def test_removing_a_sibling_keeps_page_urls(tmp_path: Path):
+    src = tmp_path / "src"
+    save_mdkv(_doc(0), src / "a.mdkv")
+    save_mdkv(_doc(1), src / "sub" / "b.mdkv")
+    out = tmp_path / "site"
+    args = ["export-site", str(src), "--out", str(out)]
+    assert CliRunner().invoke(main, args).exit_code == 0
+    (src / "a.mdkv").unlink()
+    r = CliRunner().invoke(main, args)
+    report = json.loads(r.output)
+    assert r.exit_code == 0 and (report["written"], report["skipped"], report["deleted"]) == (0, 2, 2)
+    assert (out / "sub" / "b" / "en.html").exists() and not (out / "a").exists() and not (out / "b").exists()
@@ -0,0 +1,57 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.parse import parse_content, parse_track
+from mdkv.services.structure import search_elements
+from mdkv.storage import save_mdkv
+
+
+CODE = "# Snippets for run\n\nCall run() here.\n\n```python\ndef run():\n    return 1\n```\n\n    run_indented()\n"
+MEDIA = "# Media\n\n- [clip](https://example.org/run.mp4)\n- ![still](img/run.png)\n- [ref][r]\n\n[r]: https://example.org/ref-run\n"
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("primary", "primary", "en", "tracks/primary.md", "# Run\n\nWe run."))
+    d.add_track(Track("code", "code", None, "tracks/code.md", CODE))
+    d.add_track(Track("media", "media_ref", None, "tracks/media.md", MEDIA))
+    return d
+
+
+def test_segments_map_back_to_source():
+    parsed = parse_content(CODE)
+    kinds = [(s.kind, CODE[s.start:s.end], s.info) for s in parsed.segments]
+    assert kinds == [
+        ("heading", "Snippets for run", ""),
+        ("paragraph", "Call run() here.", ""),
+        ("code", "def run():\n    return 1", "python"),
+        ("code", "    run_indented()", ""),
+    ]
+    d = _doc()
+    assert parse_track(d.tracks["code"]) is parse_content(CODE)
+
+
+def test_search_scoped_to_elements():
+    d = _doc()
+    heads = search_elements(d, "run", kinds=["heading"], flags=2)
+    assert [(m.track_id, m.kind) for m in heads] == [("primary", "heading"), ("code", "heading")]
+    code = search_elements(d, r"run\w*", kinds=["code"], track_types=["code"])
+    assert [CODE[m.start:m.end] for m in code] == ["run", "run_indented"]
+    links = search_elements(d, "run|ref", kinds=["link", "image"], track_types=["media_ref"])
+    assert [(m.kind, MEDIA[m.start:m.end]) for m in links] == [("link", "run"), ("image", "run"), ("link", "ref"), ("link", "run")]
+    with pytest.raises(ValueError):
+        search_elements(d, "x", kinds=["table"])
+
+
+def test_cli_search_elements(tmp_path: Path):
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), path)
+    r = CliRunner().invoke(main, ["search", str(path), "--pattern", "return", "--elements", "code"])
+    rows = json.loads(r.output)
+    assert r.exit_code == 0 and [(row["track_id"], row["kind"]) for row in rows] == [("code", "code")]
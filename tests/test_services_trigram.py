@@ -0,0 +1,78 @@
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from mdkv.cli import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.services.search import search_document
+from mdkv.services.trigram import FuzzyMatch, TrigramIndex, sidecar_path
+from mdkv.storage import save_mdkv
+
+
+TEXT = "Active inference minimises free energy. Actve inferance is a typo. " * 3
+
+
+def _doc() -> MDKVDocument:
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("p", "primary", "en", "tracks/p.md", TEXT))
+    d.add_track(Track("n", "commentary", None, "tracks/n.md", "INFERENCE notes"))
+    return d
+
+
+def test_substring_mode_with_and_without_index():
+    d = _doc()
+    index = TrigramIndex.build(d)
+    plain = search_document(d, "inference", mode="substring")
+    indexed = search_document(d, "inference", mode="substring", trigram_index=index)
+    assert plain == indexed and len(plain) == 3
+    folded = search_document(d, "inference", mode="substring", flags=re.IGNORECASE, trigram_index=index)
+    assert {m.track_id for m in folded} == {"p", "n"} and len(folded) == 4
+
+
+def test_fuzzy_mode_finds_typos_and_matches_unindexed_scan():
+    d = _doc()
+    index = TrigramIndex.build(d)
+    hits = search_document(d, "active inference", mode="fuzzy", max_edits=2, flags=re.IGNORECASE, trigram_index=index)
+    assert all(isinstance(m, FuzzyMatch) for m in hits)
+    found = [(TEXT[m.start:m.end], m.distance) for m in hits]
+    assert found[:2] == [("Active inference", 0), ("Actve inferance", 2)] and len(found) == 6
+    # short needles use the pigeonhole filter instead of the trigram bound
+    assert search_document(d, "typo", mode="fuzzy", max_edits=2, trigram_index=index) == search_document(
+        d, "typo", mode="fuzzy", max_edits=2
+    )
+    # stale tracks are re-indexed
+    d.update_track_content("n", "active inferense")
+    assert [m.track_id for m in search_document(d, "inference", mode="fuzzy", trigram_index=index)][-1] == "n"
+
+
+def test_trigram_sidecar_and_cli(tmp_path: Path):
+    path = tmp_path / "doc.mdkv"
+    save_mdkv(_doc(), path)
+    r = CliRunner().invoke(main, ["index", str(path), "--trigrams"])
+    assert r.exit_code == 0 and sidecar_path(path).exists()
+    assert set(TrigramIndex.load(sidecar_path(path)).tracks) == {"p", "n"}
+    r2 = CliRunner().invoke(main, ["search", str(path), "--pattern", "inferance", "--mode", "fuzzy", "--ndjson"])
+    rows = [json.loads(line) for line in r2.output.splitlines()]
+    assert r2.exit_code == 0 and len(rows) == 6 and {row["distance"] for row in rows} == {0, 1}
+
+
+def test_indexed_substring_matches_do_not_overlap():
+    d = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+    d.add_track(Track("p", "primary", "en", "tracks/p.md", "aaaaaa baaab aaaa"))
+    plain = search_document(d, "aaa", mode="substring")
+    assert search_document(d, "aaa", mode="substring", trigram_index=TrigramIndex.build(d)) == plain
+    assert [m.start for m in plain] == [0, 3, 8, 13]
+
+
+def test_short_fuzzy_needles_are_filtered_by_pieces():
+    d = _doc()
+    index = TrigramIndex.build(d)
+    content = d.tracks["p"].content
+    windows = index.fuzzy_windows(d.tracks["p"], "typos", 1)
+    assert windows is not None and sum(hi - lo for lo, hi in windows) < len(content) // 4
+    assert search_document(d, "typos", mode="fuzzy", trigram_index=index) == search_document(d, "typos", mode="fuzzy")
+    # a needle no longer than max_edits matches anywhere: whole-track scan
+    assert index.fuzzy_windows(d.tracks["p"], "ab", 2) is None
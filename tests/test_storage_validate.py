@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+import zipfile
+
+import yaml
+from click.testing import CliRunner
+
+from mdkv.cli.main import main
+from mdkv.core.model import MDKVDocument, Track
+from mdkv.core.validate import check_document
+from mdkv.demo import build_multitrack_demo_document
+from mdkv.storage import load_mdkv, save_mdkv, validate_container, validate_containers
+
+
+def _rewrite(path, manifest_edit=None, extra=None):
+    with zipfile.ZipFile(path) as zf:
+        entries = {name: zf.read(name) for name in zf.namelist()}
+    manifest = yaml.safe_load(entries["manifest.yaml"])
+    if manifest_edit:
+        manifest_edit(manifest)
+    entries["manifest.yaml"] = yaml.safe_dump(manifest).encode("utf-8")
+    entries.update(extra or {})
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+
+
+def test_validate_container_reports_structured_issues(tmp_path):
+    good = tmp_path / "good.mdkv"
+    save_mdkv(build_multitrack_demo_document(), good)
+    assert validate_container(good) == []
+
+    bad = tmp_path / "bad.mdkv"
+    doc = build_multitrack_demo_document()
+    save_mdkv(doc, bad)
+    primary = next(t for t in doc.tracks.values() if t.track_type == "primary")
+
+    def edit(manifest):
+        manifest["authors"] = []
+        manifest["tracks"][1]["track_id"] = primary.track_id
+        manifest["tracks"].append({"track_id": "x", "track_type": "bogus", "path": "../x.md"})
+
+    _rewrite(bad, edit, {primary.path: b"caf\xc3 broken", "tracks/stray.md": b""})
+    issues = validate_container(bad)
+    messages = {i.message for i in issues}
+    assert "at least one author is required" in messages
+    assert any(m.startswith("duplicate track_id") for m in messages)
+    assert "unsupported track_type: bogus" in messages
+    assert any(i.entry == "../x.md" and i.level == "ERROR" for i in issues)
+    utf8 = [i for i in issues if i.message.startswith("invalid UTF-8")]
+    assert utf8 and utf8[0].entry == primary.path and utf8[0].track_id == primary.track_id
+    assert any(i.level == "WARN" and i.entry == "tracks/stray.md" for i in issues)
+
+    assert [p.name for p, _ in validate_containers([good, bad], workers=2)] == ["good.mdkv", "bad.mdkv"]
+
+
+def test_cli_validate_directory(tmp_path):
+    save_mdkv(build_multitrack_demo_document(), tmp_path / "a.mdkv")
+    (tmp_path / "b.mdkv").write_bytes(b"PK\x03\x04bogus")
+    r = CliRunner().invoke(main, ["validate", str(tmp_path), "--workers", "1"])
+    assert r.exit_code == 1
+    rows = [json.loads(line) for line in r.stdout.splitlines()]
+    assert [row["path"].endswith("b.mdkv") for row in rows] == [True]
+    assert rows[0]["level"] == "ERROR"
+
+
+def test_container_and_document_validators_agree_on_primary_rule(tmp_path):
+    verdicts = []
+    for track_id, track_type in (("main", "primary"), ("primary", "commentary")):
+        doc = MDKVDocument(title="T", authors=["A"], created=datetime(2025, 1, 1))
+        doc.add_track(Track(track_id, track_type, "en", f"tracks/{track_id}.md", "# Hi"))
+        path = tmp_path / f"{track_id}.mdkv"
+        save_mdkv(doc, path)
+        errors = {i.message for i in validate_container(path) if i.level == "ERROR"}
+        assert errors == {i.message for i in check_document(load_mdkv(path)) if i.level == "ERROR"}
+        verdicts.append(errors)
+    assert verdicts == [set(), {"primary track is required"}]